@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+backtest.py
+-----------
+Evaluate the daily sentiment signals from news_harm.aggregate_daily against
+forward returns, for a whole grid of parameters at once:
+
+  - threshold     : |mean_sentiment| needed to go long (>= +th) or short (<= -th)
+  - lookahead     : holding period in trading bars (bar_align.forward_returns,
+                    the same definition as the fwd_return column of add_returns)
+  - min_articles  : minimum n_articles for a day to be traded
+
+All combinations are evaluated with NumPy broadcasting over a
+(threshold, min_articles, lookahead, observation) cube. Long histories are
+split into observation chunks that are reduced in parallel threads (NumPy
+releases the GIL), then combined, since every statistic is a plain sum.
+
+Usage:
+  python backtest.py --daily news_bot_output/daily_signals_YYYYmmdd_HHMMSS.csv
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from bar_align import align_next_bar, forward_returns
+
+# Optional: prices
+try:
+    import yfinance as yf
+    YF_AVAILABLE = True
+except Exception:
+    YF_AVAILABLE = False
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+DEFAULT_THRESHOLDS: List[float] = [0.05, 0.10, 0.15, 0.20, 0.30]
+DEFAULT_LOOKAHEADS: List[int] = [1, 3, 5, 10]
+DEFAULT_MIN_ARTICLES: List[int] = [1, 2, 3, 5]
+
+# same proxy add_returns uses for the MARKET bucket
+PRICE_PROXIES: Dict[str, str] = {"MARKET": "^GSPC"}
+
+# observations per chunk handed to a worker thread
+CHUNK_SIZE = 20_000
+
+TRADING_DAYS = 252
+
+
+# -----------------------------
+# Prices
+# -----------------------------
+def fetch_price_panel(tickers: Sequence[str], start, end) -> pd.DataFrame:
+    """
+    One batched download for all tickers. Returns adjusted closes on the
+    sessions each symbol traded (index=date, columns=ticker as given; NaN
+    where a symbol has no bar, never filled).
+    """
+    if not YF_AVAILABLE or not tickers:
+        return pd.DataFrame()
+    symbols = {t: PRICE_PROXIES.get(t, t) for t in tickers}
+    try:
+        raw = yf.download(
+            sorted(set(symbols.values())),
+            start=str(start), end=str(end),
+            progress=False, auto_adjust=False,
+        )["Adj Close"]
+    except Exception as ex:
+        print(f"[warn] price panel fetch failed: {ex}", file=sys.stderr)
+        return pd.DataFrame()
+    if isinstance(raw, pd.Series):
+        raw = raw.to_frame(next(iter(symbols.values())))
+    return pd.DataFrame(
+        {t: raw[s] for t, s in symbols.items() if s in raw.columns},
+        index=pd.to_datetime(raw.index).normalize(),
+    )
+
+
+def lookahead_returns(daily: pd.DataFrame, prices: pd.DataFrame, lookaheads: Sequence[int]) -> np.ndarray:
+    """
+    (n_obs, n_lookaheads) matrix of forward returns for each row of `daily`,
+    measured over each ticker's real bars only. Rows are as-of joined to the
+    first bar on or after their date (as in news_harm.add_returns), so a
+    holiday takes the next session that traded. Rows without a price get NaN.
+    """
+    n = len(daily)
+    if prices.empty or n == 0:
+        return np.full((n, len(lookaheads)), np.nan)
+    cols = [f"_ret{j}" for j in range(len(lookaheads))]
+    bars = []
+    for tkr in prices.columns:
+        px = prices[tkr].dropna()
+        bars.append(pd.DataFrame({
+            "ticker": tkr,
+            "bar_date": px.index,
+            **{c: forward_returns(px, la).to_numpy() for c, la in zip(cols, lookaheads)},
+        }))
+    events = daily[["date", "ticker"]].astype({"ticker": str})
+    res = align_next_bar(events, pd.concat(bars, ignore_index=True).astype({"ticker": str}),
+                         on="date", bar_on="bar_date", by="ticker")
+    return res[cols].to_numpy(dtype=float)
+
+
+# -----------------------------
+# Grid evaluation
+# -----------------------------
+def _grid_sums(sent: np.ndarray, n_art: np.ndarray, rets: np.ndarray,
+               thresholds: np.ndarray, min_articles: np.ndarray):
+    """
+    Raw sums over one chunk of observations, shape (K, J, L) each:
+    trade count, sum of returns, sum of squared returns, winning trades.
+    """
+    s = sent[None, None, None, :]
+    th = thresholds[:, None, None, None]
+    pos = np.where(s >= th, 1.0, np.where(s <= -th, -1.0, 0.0))            # (K,1,1,n)
+    enough = (n_art[None, :] >= min_articles[:, None])[None, :, None, :]    # (1,J,1,n)
+    r = rets.T[None, None, :, :]                                            # (1,1,L,n)
+    active = (pos != 0.0) & enough & np.isfinite(r)                         # (K,J,L,n)
+    pnl = np.where(active, pos * np.nan_to_num(r), 0.0)
+    return (
+        active.sum(axis=-1),
+        pnl.sum(axis=-1),
+        np.square(pnl).sum(axis=-1),
+        (pnl > 0).sum(axis=-1),
+    )
+
+
+def evaluate_grid(
+    sent: np.ndarray,
+    n_art: np.ndarray,
+    rets: np.ndarray,
+    thresholds: Sequence[float],
+    lookaheads: Sequence[int],
+    min_articles: Sequence[int],
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    th = np.asarray(thresholds, dtype=float)
+    mn = np.asarray(min_articles, dtype=float)
+    n = len(sent)
+    bounds = [(i, min(i + CHUNK_SIZE, n)) for i in range(0, n, CHUNK_SIZE)] or [(0, 0)]
+
+    def run_chunk(b):
+        lo, hi = b
+        return _grid_sums(sent[lo:hi], n_art[lo:hi], rets[lo:hi], th, mn)
+
+    if len(bounds) > 1:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+            parts = list(ex.map(run_chunk, bounds))
+    else:
+        parts = [run_chunk(bounds[0])]
+    count, total, sq, hits = (sum(p[i] for p in parts) for i in range(4))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        var = (sq - count * mean ** 2) / (count - 1)
+        std = np.sqrt(np.clip(var, 0.0, None))
+        ann = np.sqrt(TRADING_DAYS / np.asarray(lookaheads, dtype=float))[None, None, :]
+        sharpe = np.where(std > 0, mean / std * ann, np.nan)
+        hit_rate = hits / count
+
+    K, J, L = count.shape
+    kk, jj, ll = np.meshgrid(np.arange(K), np.arange(J), np.arange(L), indexing="ij")
+    res = pd.DataFrame({
+        "threshold": th[kk.ravel()],
+        "lookahead": np.asarray(lookaheads)[ll.ravel()],
+        "min_articles": np.asarray(min_articles)[jj.ravel()],
+        "n_trades": count.ravel(),
+        "hit_rate": hit_rate.ravel(),
+        "mean_return": mean.ravel(),
+        "sharpe": sharpe.ravel(),
+    })
+    return res.sort_values("sharpe", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def run_backtest(
+    daily: pd.DataFrame,
+    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+    lookaheads: Sequence[int] = DEFAULT_LOOKAHEADS,
+    min_articles: Sequence[int] = DEFAULT_MIN_ARTICLES,
+    prices: Optional[pd.DataFrame] = None,
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    daily: output of aggregate_daily / add_returns (date, ticker, mean_sentiment, n_articles, ...)
+    prices: optional close panel (index=date, columns=ticker, NaN where no bar);
+            fetched in one batch if omitted.
+    """
+    if daily is None or daily.empty:
+        return pd.DataFrame()
+    daily = daily.dropna(subset=["mean_sentiment"]).reset_index(drop=True)
+    if prices is None:
+        dates = pd.to_datetime(daily["date"])
+        start = (dates.min() - pd.Timedelta(days=7)).date()
+        end = (dates.max() + pd.Timedelta(days=max(lookaheads) * 2 + 7)).date()
+        prices = fetch_price_panel(daily["ticker"].unique().tolist(), start, end)
+    if prices.empty:
+        print("[warn] no prices available; backtest skipped", file=sys.stderr)
+        return pd.DataFrame()
+
+    rets = lookahead_returns(daily, prices, lookaheads)
+    return evaluate_grid(
+        daily["mean_sentiment"].to_numpy(dtype=float),
+        daily["n_articles"].to_numpy(dtype=float),
+        rets,
+        thresholds, lookaheads, min_articles,
+        workers=workers,
+    )
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Backtest daily sentiment signals over a parameter grid")
+    ap.add_argument("--daily", type=str, required=True, help="daily_signals CSV written by news_harm.py")
+    ap.add_argument("--thresholds", nargs="+", type=float, default=DEFAULT_THRESHOLDS)
+    ap.add_argument("--lookaheads", nargs="+", type=int, default=DEFAULT_LOOKAHEADS)
+    ap.add_argument("--min-articles", nargs="+", type=int, default=DEFAULT_MIN_ARTICLES)
+    ap.add_argument("--workers", type=int, default=None, help="Threads for long histories (default: all cores)")
+    ap.add_argument("--output", type=str, default=None, help="Optional CSV path for the full grid")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    daily = pd.read_csv(args.daily, parse_dates=["date"])
+    res = run_backtest(daily, args.thresholds, args.lookaheads, args.min_articles, workers=args.workers)
+    if res.empty:
+        return
+    if args.output:
+        res.to_csv(args.output, index=False)
+        print(f"[ok] Wrote {len(res)} grid rows to {args.output}")
+    print(res.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
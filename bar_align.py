@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+bar_align.py
+------------
+Map news timestamps onto the first price bar they can still affect.
+
+Articles keep their full publication time (UTC, tz-naive) end to end; these
+helpers decide which bar that time belongs to:
+
+  session_dates   publication time -> trading session whose close comes
+                  after it, in the exchange's local time: news after the
+                  16:00 close (or on a weekend) is credited to the next
+                  business day instead of the calendar day it appeared.
+  align_next_bar  as-of join (pd.merge_asof, direction="forward") of
+                  events onto sorted bar timestamps, optionally per ticker,
+                  so daily rows landing on a holiday and intraday articles
+                  landing outside market hours both roll to the next bar
+                  that actually traded.
+  forward_returns return from each bar to the bar `lookahead` bars later,
+                  over real bars only (no filled-in non-trading days).
+
+Everything is vectorized over sorted arrays; nothing loops per row.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = "America/New_York"   # US listings and ADRs (incl. the Argentine ones), ^GSPC
+MARKET_CLOSE = "16:00"           # local time; news at or after it counts for the next session
+
+
+def session_dates(
+    published: pd.Series,
+    tz: str = MARKET_TZ,
+    close: str = MARKET_CLOSE,
+    holidays: Sequence = (),
+) -> pd.Series:
+    """
+    UTC publication times (tz-naive) -> session date (midnight) of the first
+    close at or after them. Weekends and `holidays` roll forward to the next
+    business day.
+    """
+    local = pd.to_datetime(published).dt.tz_localize("UTC").dt.tz_convert(tz).dt.tz_localize(None)
+    day = local.dt.normalize()
+    after_close = (local - day) >= pd.Timedelta(f"{close}:00")
+    day = day + pd.to_timedelta(after_close.astype(int), unit="D")
+    days = day.to_numpy(dtype="datetime64[D]")
+    ok = ~np.isnat(days)
+    days[ok] = np.busday_offset(days[ok], 0, roll="forward",
+                                holidays=np.asarray(holidays, dtype="datetime64[D]"))
+    return pd.Series(days.astype("datetime64[ns]"), index=published.index, name="date")
+
+
+def align_next_bar(
+    events: pd.DataFrame,
+    bars: pd.DataFrame,
+    on: str,
+    bar_on: str = "bar_time",
+    by: Optional[str] = None,
+    strict: bool = False,
+) -> pd.DataFrame:
+    """
+    events joined with the first row of `bars` whose `bar_on` is at or after
+    (strict: after) events[on], matched within `by` when given. Keeps the row
+    order of `events` (index reset); rows past the last bar get NaN.
+    """
+    left = events.assign(_row=np.arange(len(events)))
+    left[on] = pd.to_datetime(left[on]).astype("datetime64[ns]")
+    right = bars.assign(**{bar_on: pd.to_datetime(bars[bar_on]).astype("datetime64[ns]")})
+    out = pd.merge_asof(
+        left.sort_values(on, kind="stable"),
+        right.sort_values(bar_on, kind="stable"),
+        left_on=on, right_on=bar_on, by=by,
+        direction="forward", allow_exact_matches=not strict,
+    )
+    return out.sort_values("_row").drop(columns="_row").reset_index(drop=True)
+
+
+def forward_returns(entry: pd.Series, lookahead: int = 1, exit: Optional[pd.Series] = None) -> pd.Series:
+    """
+    entry[i] -> exit[i + lookahead - 1] (exit defaults to entry shifted by one
+    more bar, i.e. close-to-close over `lookahead` bars).
+    """
+    if exit is None:
+        return entry.shift(-lookahead) / entry - 1.0
+    return exit.shift(-(lookahead - 1)) / entry - 1.0
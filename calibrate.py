@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+calibrate.py
+------------
+Measure the pipeline on this machine and store the settings that run best.
+
+run_calibration() micro-benchmarks each news_harm stage on a synthetic sample
+(headlines built from the universe's own aliases, English and Spanish, with
+summaries of realistic and long lengths):
+
+  fetch   synthetic RSS feeds served from a local HTTP server with a fixed
+          per-request latency, downloaded and parsed with 1, 2, 4, ...
+          concurrent workers                            -> fetch_workers
+  match   map_articles_to_tickers over the sample      (articles/s)
+  score   every backend that loads; for FinBERT also torch threads, batch
+          size and truncation length, one knob at a time
+                                                        -> torch_threads,
+                                                           finbert_batch_size,
+                                                           finbert_max_length
+  write   CSV and xlsx output of the scored sample      (rows/s)
+
+Quality is only traded for speed when needed: the recommended backend is
+the highest-quality one (FinBERT, then VADER, then the lexicon), and the
+FinBERT truncation length the longest one, that still scores the
+universe's expected article volume within the time budget.
+
+The result goes to a JSON profile (PROFILE_PATH). news_harm.py and
+portfolio_news_profit.py read its throughput settings at startup via
+load_profile(); they replace the built-in defaults, and explicit CLI flags
+still win. The recommended backend changes the sentiment columns, so it is
+only used on request (--profile-backend, see pick_backend()). A profile
+written on another host (different name or core count) is ignored.
+
+Usage:
+  python news_harm.py --calibrate [--tickers ...]
+  python calibrate.py --articles 2000 --latency 0.2 --budget 120
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+
+PROFILE_PATH = os.path.join("news_bot_output", "tuning_profile.json")
+PROFILE_ENV = "NEWS_BOT_PROFILE"   # alternative profile path; '' disables
+
+SAMPLE_ARTICLES = 2000
+FETCH_LATENCY = 0.2          # seconds per simulated feed request
+ITEMS_PER_FEED = 50          # typical RSS feed length, also used for volume estimates
+SCORE_BUDGET = 120.0         # seconds a run may spend scoring
+TOLERANCE = 0.05             # settings within 5% of the best count as equally fast
+
+WORKER_TRIALS = (1, 2, 4, 8, 16, 32)
+BATCH_TRIALS = (8, 16, 32, 64)
+LENGTH_TRIALS = (64, 128, 256, 512)
+FINBERT_SAMPLE = 128         # texts per FinBERT trial
+QUALITY_ORDER = ["finbert", "vader", "lexicon"]
+
+WORDS = {
+    "en": ("shares stock rose fell after the company reported quarterly earnings above below estimates "
+           "investors analysts expect guidance revenue growth deal lawsuit upgrade downgrade market "
+           "rally slump federal reserve rates oil prices demand record profit loss").split(),
+    "es": ("acciones suben caen tras el anuncio de resultados del trimestre la empresa inversores "
+           "mercado analistas esperan ganancias perdidas acuerdo demanda bonos dolar riesgo pais "
+           "petroleo tasas inflacion record deuda").split(),
+}
+
+
+# -----------------------------
+# Profile I/O
+# -----------------------------
+def _host() -> Dict[str, object]:
+    return {"host": platform.node(), "cpus": os.cpu_count()}
+
+
+def profile_path() -> str:
+    return os.environ.get(PROFILE_ENV, PROFILE_PATH)
+
+
+_WARNED = set()   # news_harm and portfolio_news_profit both load it; warn once
+
+
+def _warn_once(path: str, msg: str) -> None:
+    if path not in _WARNED:
+        _WARNED.add(path)
+        print(f"[warn] {msg}")
+
+
+def _read_profile(path: Optional[str] = None) -> dict:
+    """The stored profile, or {} (no file, unreadable, or another host)."""
+    path = profile_path() if path is None else path
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as ex:
+        _warn_once(path, f"ignoring tuning profile {path}: {ex}")
+        return {}
+    if profile.get("machine") != _host():
+        _warn_once(path, f"tuning profile {path} was measured on {profile.get('machine')}; "
+                         "ignoring it (re-run --calibrate)")
+        return {}
+    return profile
+
+
+def load_profile(path: Optional[str] = None) -> Dict[str, object]:
+    """Throughput settings of the stored profile (workers, threads, FinBERT batch/length), or {}."""
+    settings = dict(_read_profile(path).get("settings", {}))
+    settings.pop("backend", None)   # older profiles kept the backend pick here
+    return settings
+
+
+def recommended_backend(path: Optional[str] = None) -> Optional[str]:
+    profile = _read_profile(path)
+    return profile.get("recommended_backend") or profile.get("settings", {}).get("backend")
+
+
+def pick_backend(backend: str, use_profile: bool = False, flag: str = "--profile-backend",
+                 path: Optional[str] = None) -> str:
+    """`backend`, or with use_profile the profile's recommended one; either way says so."""
+    rec = recommended_backend(path)
+    if use_profile and rec:
+        if rec != backend:
+            print(f"[info] backend {rec} from the tuning profile (instead of {backend})")
+        return rec
+    if use_profile:
+        print(f"[warn] the tuning profile recommends no backend (run --calibrate); using {backend}")
+    elif rec and rec != backend:
+        print(f"[info] tuning profile recommends backend {rec}; pass {flag} to use it")
+    return backend
+
+
+def save_profile(profile: dict, path: str = PROFILE_PATH) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Synthetic sample
+# -----------------------------
+def synthetic_news(n: int, aliases: Dict[str, List[str]], seed: int = 0) -> pd.DataFrame:
+    """
+    n fetch_feed_urls-style rows. About half mention one or two of the
+    aliases; summaries range from empty to a few hundred words so
+    truncation lengths matter.
+    """
+    rng = random.Random(seed)
+    names = [a for als in aliases.values() for a in als] or ["ACME"]
+    now = pd.Timestamp.now(tz="UTC").tz_convert(None).floor("s")
+    rows = []
+    for i in range(n):
+        words = WORDS["es" if rng.random() < 0.4 else "en"]
+        title = rng.choices(words, k=rng.randint(6, 14))
+        if rng.random() < 0.5:
+            for name in rng.sample(names, k=min(len(names), rng.randint(1, 2))):
+                title.insert(rng.randrange(len(title)), name)
+        n_summary = rng.choice([0, rng.randint(20, 60), rng.randint(60, 300)])
+        published = now - pd.Timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+        rows.append({
+            "uid": f"{i:032x}",
+            "date": published.normalize(),
+            "published": published,
+            "title": " ".join(title).capitalize(),
+            "summary": " ".join(rng.choices(words, k=n_summary)),
+            "link": f"https://example.invalid/{i}",
+            "source": "calibration",
+        })
+    return pd.DataFrame(rows)
+
+
+def rss_bytes(news: pd.DataFrame, title: str) -> bytes:
+    from xml.sax.saxutils import escape
+    items = "".join(
+        f"<item><title>{escape(r.title)}</title><description>{escape(r.summary)}</description>"
+        f"<link>{escape(r.link)}</link><pubDate>{r.published:%a, %d %b %Y %H:%M:%S} GMT</pubDate></item>"
+        for r in news.itertuples()
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{title}</title>{items}</channel></rss>'.encode()
+
+
+class _FeedServer:
+    """Local HTTP server answering /<n> with feed n after `latency` seconds."""
+
+    def __init__(self, feeds: List[bytes], latency: float):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latency)
+                body = feeds[int(self.path.strip("/")) % len(feeds)]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.urls = [f"http://127.0.0.1:{self.server.server_port}/{i}" for i in range(len(feeds))]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+def rate(fn: Callable[[], object], n: int) -> float:
+    """Items per second for one call of fn processing n items."""
+    t = time.perf_counter()
+    fn()
+    return n / max(time.perf_counter() - t, 1e-9)
+
+
+def pick(rates: Dict[int, float], prefer: str = "low") -> int:
+    """Trial value within TOLERANCE of the best rate; the lowest (or highest) such value."""
+    best = max(rates.values())
+    ok = [k for k, r in rates.items() if r >= best * (1 - TOLERANCE)]
+    return min(ok) if prefer == "low" else max(ok)
+
+
+def bench_fetch(nh, sample: pd.DataFrame, latency: float, n_feeds: int) -> Dict[int, float]:
+    feeds = [rss_bytes(sample.iloc[i::n_feeds].head(ITEMS_PER_FEED), f"feed {i}") for i in range(n_feeds)]
+    server = _FeedServer(feeds, latency)
+    try:
+        trials = [w for w in WORKER_TRIALS if w <= max(n_feeds, 1)]
+        return {w: rate(lambda: nh.fetch_feed_urls(server.urls, max_workers=w), n_feeds) for w in trials}
+    finally:
+        server.close()
+
+
+def bench_finbert(backend, texts: List[str]) -> Dict[str, Dict[int, float]]:
+    import torch
+    base_threads = torch.get_num_threads()
+    cpus = os.cpu_count() or 1
+    threads = sorted({t for t in (1, 2, 4, 8, 16) if t <= cpus} | {cpus})
+    res: Dict[str, Dict[int, float]] = {"threads": {}, "batch": {}, "length": {}}
+    backend.score_batch(texts[:8])                      # warm-up
+    for t in threads:
+        torch.set_num_threads(t)
+        res["threads"][t] = rate(lambda: backend.score_batch(texts, 32, 256), len(texts))
+    torch.set_num_threads(pick(res["threads"]))
+    for b in BATCH_TRIALS:
+        res["batch"][b] = rate(lambda: backend.score_batch(texts, b, 256), len(texts))
+    best_batch = pick(res["batch"], prefer="high")
+    for m in LENGTH_TRIALS:
+        res["length"][m] = rate(lambda: backend.score_batch(texts, best_batch, m), len(texts))
+    torch.set_num_threads(base_threads)
+    return res
+
+
+def bench_write(scored: pd.DataFrame) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as d:
+        csv = rate(lambda: scored.to_csv(os.path.join(d, "x.csv"), index=False), len(scored))
+        with pd.ExcelWriter(os.path.join(d, "x.xlsx"), engine="xlsxwriter") as xw:
+            xlsx = rate(lambda: scored.to_excel(xw, sheet_name="MappedScored", index=False), len(scored))
+    return {"csv": csv, "xlsx": xlsx}
+
+
+def expected_articles(nh, tickers: Sequence[str]) -> int:
+    """Articles per run: every general + per-ticker feed at ITEMS_PER_FEED."""
+    return len(nh.feed_urls(list(tickers))) * ITEMS_PER_FEED
+
+
+def run_calibration(
+    tickers: Optional[Sequence[str]] = None,
+    n_articles: int = SAMPLE_ARTICLES,
+    latency: float = FETCH_LATENCY,
+    budget: float = SCORE_BUDGET,
+    path: Optional[str] = None,
+    backends: Sequence[str] = QUALITY_ORDER,
+    nh=None,
+) -> dict:
+    """Benchmark all stages, write the profile and return it."""
+    if nh is None:
+        import news_harm as nh
+    tickers = list(tickers or nh.DEFAULT_TICKERS)
+    path = path or profile_path() or PROFILE_PATH
+    aliases = {t: nh.TICKER_ALIASES.get(t, [t]) for t in tickers}
+    sample = synthetic_news(n_articles, aliases)
+    texts = [nh.article_text(t, s) for t, s in zip(sample["title"], sample["summary"])]
+    settings: Dict[str, object] = {}
+    measured: Dict[str, object] = {}
+
+    n_feeds = max(1, min(len(nh.feed_urls(tickers)), 32))
+    fetch = bench_fetch(nh, sample, latency, n_feeds)
+    settings["fetch_workers"] = pick(fetch)
+    measured["fetch_feeds_per_s"] = fetch
+    print(f"[info] fetch: {n_feeds} feeds @ {latency:.2f}s -> "
+          + ", ".join(f"{w}w {r:.1f}/s" for w, r in fetch.items()))
+
+    match_rate = rate(lambda: nh.map_articles_to_tickers(sample, tickers), len(sample))
+    measured["match_articles_per_s"] = match_rate
+    print(f"[info] match: {match_rate:,.0f} articles/s")
+
+    need = expected_articles(nh, tickers) / budget
+    measured["needed_texts_per_s"] = need
+    score_rates: Dict[str, float] = {}
+    for name in backends:
+        try:
+            backend = nh.get_backend(name)
+        except Exception as ex:
+            print(f"[info] score: {name} unavailable ({ex})")
+            continue
+        if name == "finbert":
+            sub = texts[:FINBERT_SAMPLE]
+            grid = bench_finbert(backend, sub)
+            settings["torch_threads"] = pick(grid["threads"])
+            settings["finbert_batch_size"] = pick(grid["batch"], prefer="high")
+            fits = [m for m, r in grid["length"].items() if r >= need]
+            settings["finbert_max_length"] = max(fits) if fits else pick(grid["length"])
+            measured["finbert"] = grid
+            score_rates[name] = grid["length"][settings["finbert_max_length"]]
+        else:
+            score_rates[name] = rate(lambda: nh.score_texts(backend, texts), len(texts))
+        print(f"[info] score: {name} {score_rates[name]:,.0f} texts/s")
+    measured["score_texts_per_s"] = score_rates
+
+    recommended = None
+    if score_rates:
+        fast_enough = [b for b in QUALITY_ORDER if score_rates.get(b, 0.0) >= need]
+        recommended = fast_enough[0] if fast_enough else max(score_rates, key=score_rates.get)
+
+    scored = nh.score_articles(nh.map_articles_to_tickers(sample, tickers), "lexicon")
+    measured["write_rows_per_s"] = bench_write(scored)
+    print("[info] write: " + ", ".join(f"{k} {v:,.0f} rows/s" for k, v in measured["write_rows_per_s"].items()))
+
+    profile = {
+        "machine": _host(),
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "universe": len(tickers),
+        "sample_articles": n_articles,
+        "settings": settings,
+        "recommended_backend": recommended,
+        "measured": measured,
+    }
+    save_profile(profile, path)
+    print(f"[ok] tuning profile -> {path}: {settings}, recommended backend {recommended}")
+    return profile
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the news pipeline on this machine and store the best settings")
+    ap.add_argument("--tickers", nargs="+", default=None, help="Universe to size the run for (default: news_harm defaults)")
+    ap.add_argument("--articles", type=int, default=SAMPLE_ARTICLES, help="Synthetic sample size")
+    ap.add_argument("--latency", type=float, default=FETCH_LATENCY, help="Simulated seconds per feed request")
+    ap.add_argument("--budget", type=float, default=SCORE_BUDGET,
+                    help="Seconds a run may spend scoring (picks the backend)")
+    ap.add_argument("--backends", nargs="+", default=QUALITY_ORDER, choices=QUALITY_ORDER,
+                    help="Backends to benchmark")
+    ap.add_argument("--profile", type=str, default=None, help=f"Output path (default {PROFILE_PATH})")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+    try:
+        run_calibration(args.tickers, args.articles, args.latency, args.budget, args.profile, args.backends)
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
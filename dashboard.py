@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+dashboard.py
+------------
+One self-contained HTML dashboard for every ticker in a daily signals frame
+(news_harm.aggregate_daily / add_returns output), instead of one fig.show()
+per ticker.
+
+  - WebGL traces (Scattergl) so long histories stay responsive
+  - min/max downsampling of dense series (peaks and troughs are kept)
+  - a ticker dropdown toggling trace visibility; one figure, one file
+  - written with write_html (plotly.js embedded), so it runs headless
+
+Usage:
+  python dashboard.py --daily news_bot_output/daily_signals_YYYYmmdd_HHMMSS.csv
+"""
+
+import argparse
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Optional: plots
+try:
+    import plotly.graph_objects as go
+    PLOTLY_AVAILABLE = True
+except Exception:
+    PLOTLY_AVAILABLE = False
+
+
+# points per series before min/max downsampling kicks in
+MAX_POINTS = 2000
+
+# (column, trace name, secondary y axis)
+SERIES = [
+    ("mean_sentiment", "Daily Sentiment", False),
+    ("ewm_sentiment", "EWM Sentiment", False),
+    ("fwd_return", "Fwd Return", True),
+]
+
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, max_points: Optional[int] = MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep at most ~max_points points: the min and the max of each of
+    max_points/2 consecutive buckets, in their original order.
+    y must not contain NaN.
+    """
+    n = len(y)
+    if not max_points or n <= max_points:
+        return x, y
+    size = int(np.ceil(n / max(1, max_points // 2)))
+    buckets = int(np.ceil(n / size))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, size)
+    base = np.arange(buckets) * size
+    idx = np.unique(np.concatenate([base + np.nanargmin(grid, axis=1), base + np.nanargmax(grid, axis=1)]))
+    return x[idx], y[idx]
+
+
+def build_dashboard(
+    daily: pd.DataFrame,
+    tickers: Optional[Sequence[str]] = None,
+    max_points: Optional[int] = MAX_POINTS,
+    title: str = "News sentiment dashboard",
+):
+    """One figure, a dropdown entry per ticker. Returns None if Plotly is missing."""
+    if not PLOTLY_AVAILABLE:
+        print("[info] Plotly not installed; skipping dashboard.")
+        return None
+    d = daily.assign(date=pd.to_datetime(daily["date"])).sort_values(["ticker", "date"])
+    groups = dict(tuple(d.groupby("ticker", sort=False)))
+    order = list(dict.fromkeys(tickers)) if tickers is not None else list(groups)
+
+    fig = go.Figure()
+    trace_tickers: List[str] = []
+    shown: List[str] = []
+    for tkr in order:
+        g = groups.get(tkr)
+        if g is None:
+            continue
+        x_all = g["date"].to_numpy()
+        added = False
+        for col, name, secondary in SERIES:
+            if col not in g.columns:
+                continue
+            y = g[col].to_numpy(dtype=float)
+            ok = np.isfinite(y)
+            if not ok.any():
+                continue
+            x, y = downsample_minmax(x_all[ok], y[ok], max_points)
+            fig.add_trace(go.Scattergl(
+                x=x, y=y, name=name,
+                mode="lines+markers" if len(y) <= 200 else "lines",
+                yaxis="y2" if secondary else "y",
+                visible=not shown,
+            ))
+            trace_tickers.append(tkr)
+            added = True
+        if added:
+            shown.append(tkr)
+
+    if not shown:
+        print("[info] No data for the dashboard")
+        return None
+
+    trace_tickers = np.asarray(trace_tickers, dtype=object)
+    buttons = [
+        dict(label=t, method="update",
+             args=[{"visible": (trace_tickers == t).tolist()}, {"title": f"{title} — {t}"}])
+        for t in shown
+    ]
+    fig.update_layout(
+        title=f"{title} — {shown[0]}",
+        xaxis_title="Date",
+        yaxis=dict(title="Sentiment (avg)"),
+        yaxis2=dict(title="Fwd Return", overlaying="y", side="right", tickformat=".1%"),
+        legend=dict(orientation="h"),
+        updatemenus=[dict(buttons=buttons, active=0, x=0.0, xanchor="left", y=1.15, yanchor="top")],
+    )
+    return fig
+
+
+def write_dashboard(
+    daily: pd.DataFrame,
+    path: str,
+    tickers: Optional[Sequence[str]] = None,
+    max_points: Optional[int] = MAX_POINTS,
+) -> Optional[str]:
+    """Write the dashboard to a standalone HTML file; returns the path or None."""
+    fig = build_dashboard(daily, tickers, max_points)
+    if fig is None:
+        return None
+    fig.write_html(path, include_plotlyjs=True, full_html=True, auto_open=False)
+    return path
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Single-file HTML dashboard from a daily signals CSV")
+    ap.add_argument("--daily", type=str, required=True, help="daily_signals CSV written by news_harm.py")
+    ap.add_argument("--tickers", nargs="*", default=None, help="Subset of tickers (default: all)")
+    ap.add_argument("--max-points", type=int, default=MAX_POINTS, help="Downsample series longer than this")
+    ap.add_argument("--output", type=str, default="dashboard.html")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    daily = pd.read_csv(args.daily, parse_dates=["date"])
+    out = write_dashboard(daily, args.output, args.tickers, args.max_points)
+    if out:
+        print(f"[ok] Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
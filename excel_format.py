@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+excel_format.py
+---------------
+Formatting layer for the workbooks written by portfolio_news_profit.py
+(pandas ExcelWriter, xlsxwriter engine).
+
+A sheet's look is described once as a layout dict (column widths and number
+formats, conditional rules, frozen panes, bold TOTAL row). apply_layout turns
+it into
+  - column-level formats (set_column): xlsxwriter gives every unformatted
+    cell in the column that style, so there is no per-cell loop;
+  - conditional formats over the written rows only (no G2:G1048576);
+  - xlsxwriter Format objects taken from a per-workbook StyleCache, so each
+    distinct style exists once in the file however many sheets use it.
+
+The layout dicts are the workbook's template. There is deliberately no
+pre-styled .xlsx template: xlsxwriter (the fast writer) can only create
+files, and filling a styled template would mean going back to openpyxl
+load + per-cell writes, the slow path this module replaces. What a template
+would cache (one style record per distinct look, column formats, rule
+definitions) is cached here instead: layouts are module constants, and
+Format objects are created once per workbook by StyleCache.
+
+Layout keys (all optional):
+  widths:    {"A": 12, ...}
+  formats:   {"E": USD, ...}           number format per column
+  rules:     [(column, rule), ...]     rule = "sign" | "scale" | {"TEXT": "RRGGBB", ...}
+  freeze:    (row, col)                e.g. (1, 0) freezes the header row
+  total_row: True                      re-write the last row in bold
+"""
+
+import weakref
+from typing import Dict, Optional
+
+import pandas as pd
+
+# same strings openpyxl.styles.numbers uses, so files look as before
+USD = '"$"#,##0.00_-'
+PCT = "0.00%"
+DATE = "yyyy-mm-dd"
+
+GREEN = "C6EFCE"
+RED = "FFC7CE"
+YELLOW = "FFEB84"
+AMBER = "FFEB9C"
+
+# sentiment heatmap in [-1, 1]
+SENTIMENT_SCALE = {
+    "type": "3_color_scale",
+    "min_type": "num", "min_value": -1, "min_color": f"#{RED}",
+    "mid_type": "num", "mid_value": 0, "mid_color": f"#{YELLOW}",
+    "max_type": "num", "max_value": 1, "max_color": f"#{GREEN}",
+}
+
+
+class StyleCache:
+    """One xlsxwriter Format per distinct set of properties, per workbook."""
+
+    def __init__(self, book):
+        self.book = book
+        self._formats: Dict[tuple, object] = {}
+
+    def get(self, **props):
+        props = {k: v for k, v in props.items() if v is not None}
+        if not props:
+            return None
+        key = tuple(sorted(props.items()))
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = self._formats[key] = self.book.add_format(props)
+        return fmt
+
+
+_CACHES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def styles_for(book) -> StyleCache:
+    cache = _CACHES.get(book)
+    if cache is None:
+        cache = _CACHES[book] = StyleCache(book)
+    return cache
+
+
+def _col_index(letter: str) -> int:
+    n = 0
+    for ch in letter.upper():
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _col_letter(idx: int) -> str:
+    s = ""
+    idx += 1
+    while idx:
+        idx, r = divmod(idx - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def apply_layout(xw, sheet: str, layout: dict, df: pd.DataFrame, first_row: int = 1) -> None:
+    """
+    Style an xlsxwriter sheet already holding `df`. first_row is the 0-based
+    sheet row of df's first data row (1 below a header written at row 0).
+    """
+    ws = xw.sheets[sheet]
+    styles = styles_for(xw.book)
+    widths = layout.get("widths", {})
+    formats = layout.get("formats", {})
+
+    for col in sorted(set(widths) | set(formats), key=_col_index):
+        i = _col_index(col)
+        ws.set_column(i, i, widths.get(col), styles.get(num_format=formats.get(col)))
+
+    n = len(df)
+    if n:
+        top, bottom = first_row + 1, first_row + n          # 1-based, inclusive
+        for col, rule in layout.get("rules", []):
+            rng = f"{col}{top}:{col}{bottom}"
+            cell = f"{col}{top}"
+            if rule == "sign":
+                for op, color in ((">", GREEN), ("<", RED)):
+                    ws.conditional_format(rng, {
+                        "type": "formula",
+                        "criteria": f"=AND(ISNUMBER({cell}),{cell}{op}0)",
+                        "format": styles.get(bg_color=f"#{color}"),
+                    })
+            elif rule == "scale":
+                ws.conditional_format(rng, dict(SENTIMENT_SCALE))
+            else:
+                for text, color in rule.items():
+                    ws.conditional_format(rng, {
+                        "type": "cell", "criteria": "==", "value": f'"{text}"',
+                        "format": styles.get(bg_color=f"#{color}"),
+                    })
+
+        if layout.get("total_row"):
+            row = first_row + n - 1
+            for j, value in enumerate(df.iloc[-1].tolist()):
+                fmt = styles.get(bold=True, num_format=formats.get(_col_letter(j)))
+                if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+                    ws.write_blank(row, j, None, fmt)
+                else:
+                    ws.write(row, j, value, fmt)
+
+    if layout.get("freeze"):
+        ws.freeze_panes(*layout["freeze"])
+
+
+def write_frame(xw, df: pd.DataFrame, sheet: str, layout: Optional[dict] = None, startrow: int = 0) -> None:
+    """df.to_excel (header at `startrow`) + apply_layout."""
+    df.to_excel(xw, sheet_name=sheet, index=False, startrow=startrow)
+    if layout:
+        apply_layout(xw, sheet, layout, df, first_row=startrow + 1)
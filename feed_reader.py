@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+feed_reader.py
+--------------
+Streaming RSS 2.0 / RSS 1.0 (RDF) / Atom reader.
+
+The response body is fed to an expat-based pull parser (xml.etree
+XMLPullParser) chunk by chunk as it downloads. Every finished <item> /
+<entry> is reduced to four strings appended to column lists (title,
+summary, link, raw date) and then cleared, so memory stays flat on large
+feeds. Text normalization, date parsing and hashing are left to the caller
+to do in bulk over the columns (see news_harm.fetch_feed_urls).
+
+Feeds that are not well-formed XML (undefined HTML entities, truncated
+bodies, ...) are re-parsed from the same bytes with feedparser, which is
+slower but very lenient.
+"""
+
+import time
+import urllib.request
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import pandas as pd
+
+# Optional: lenient fallback parser
+try:
+    import feedparser
+    FEEDPARSER_AVAILABLE = True
+except Exception:
+    FEEDPARSER_AVAILABLE = False
+
+
+USER_AGENT = "Mozilla/5.0 (compatible; news-market-bot/1.0)"
+TIMEOUT = 20          # seconds per feed
+CHUNK_SIZE = 64 * 1024
+
+ENTRY_TAGS = {"item", "entry"}
+SUMMARY_TAGS = ("description", "summary", "encoded", "content")   # first non-empty wins
+DATE_TAGS = ("pubDate", "published", "updated", "date", "issued", "modified")
+
+FEED_COLUMNS = ["title", "summary", "link", "date_raw"]
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(el) -> str:
+    # itertext covers Atom type="xhtml" bodies with child elements
+    return "".join(el.itertext()).strip()
+
+
+def _entry_fields(entry) -> Tuple[str, str, str, str]:
+    title = summary = link = date = ""
+    summaries = {}
+    for child in entry:
+        name = _local(child.tag)
+        if name == "title" and not title:
+            title = _text(child)
+        elif name in SUMMARY_TAGS and name not in summaries:
+            summaries[name] = _text(child)
+        elif name == "link":
+            href = child.get("href")
+            if href is not None:
+                # Atom: prefer rel="alternate" (or no rel)
+                if child.get("rel", "alternate") == "alternate" and not link:
+                    link = href
+            elif not link:
+                link = (child.text or "").strip()
+        elif name in DATE_TAGS and not date:
+            date = (child.text or "").strip()
+    for name in SUMMARY_TAGS:
+        if summaries.get(name):
+            summary = summaries[name]
+            break
+    return title, summary, link, date
+
+
+def parse_stream(chunks) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Parse an iterable of byte chunks. Returns (feed title, columns).
+    Raises xml.etree.ElementTree.ParseError on malformed XML.
+    """
+    cols: Dict[str, List[str]] = {c: [] for c in FEED_COLUMNS}
+    feed_title = ""
+    depth_in_entry = 0
+    parser = XMLPullParser(events=("start", "end"))
+
+    def drain():
+        nonlocal feed_title, depth_in_entry
+        for event, el in parser.read_events():
+            name = _local(el.tag)
+            if event == "start":
+                if name in ENTRY_TAGS:
+                    depth_in_entry += 1
+                continue
+            if name in ENTRY_TAGS:
+                depth_in_entry -= 1
+                t, s, l, d = _entry_fields(el)
+                cols["title"].append(t)
+                cols["summary"].append(s)
+                cols["link"].append(l)
+                cols["date_raw"].append(d)
+                el.clear()
+            elif name == "title" and not depth_in_entry and not feed_title:
+                feed_title = _text(el)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        drain()
+    parser.close()
+    drain()
+    return feed_title, cols
+
+
+def feedparser_columns(data: bytes) -> Tuple[str, Dict[str, List[str]]]:
+    """Same output as parse_stream, via feedparser (lenient fallback)."""
+    if not FEEDPARSER_AVAILABLE:
+        raise RuntimeError("feedparser not installed")
+    parsed = feedparser.parse(data)
+    cols: Dict[str, List[str]] = {c: [] for c in FEED_COLUMNS}
+    for e in parsed.entries:
+        cols["title"].append(getattr(e, "title", "") or "")
+        cols["summary"].append(getattr(e, "summary", "") or "")
+        cols["link"].append(getattr(e, "link", "") or "")
+        tstruct = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
+        cols["date_raw"].append(time.strftime("%Y-%m-%dT%H:%M:%SZ", tstruct) if tstruct else "")
+    return parsed.feed.get("title", ""), cols
+
+
+def read_feed(url: str, timeout: float = TIMEOUT) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Download `url` and parse it while it streams in; on malformed XML, parse
+    the downloaded bytes again with feedparser.
+    """
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    received: List[bytes] = []
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        def chunks():
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                received.append(chunk)
+                yield chunk
+        try:
+            return parse_stream(chunks())
+        except ParseError:
+            received.append(resp.read())  # rest of the body, if parsing stopped early
+    return feedparser_columns(b"".join(received))
+
+
+# -----------------------------
+# Bulk post-processing helpers
+# -----------------------------
+RFC822_FORMAT = "%a, %d %b %Y %H:%M:%S %z"
+
+
+def _parse_one(value: str) -> Optional[pd.Timestamp]:
+    try:
+        return pd.Timestamp(parsedate_to_datetime(value)).tz_convert("UTC")
+    except Exception:
+        pass
+    try:
+        ts = pd.Timestamp(value)
+        return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    except Exception:
+        return None
+
+
+def parse_dates(raw: pd.Series) -> pd.Series:
+    """
+    Entry dates -> UTC timestamps (tz-naive, time of day kept);
+    missing/unparseable -> now.
+    Vectorized RFC 822 and ISO 8601 passes first, per-value parsing only for
+    what is left (EST-style named zones, odd formats).
+    """
+    raw = raw.fillna("").astype(str).str.strip()
+    # "GMT" / "UT" are the most common RFC 822 zones and %z does not take them
+    out = pd.to_datetime(raw.str.replace(r"\s(?:GMT|UTC?|Z)$", " +0000", regex=True),
+                         format=RFC822_FORMAT, errors="coerce", utc=True)
+    miss = out.isna() & (raw != "")
+    if miss.any():
+        out[miss] = pd.to_datetime(raw[miss], format="ISO8601", errors="coerce", utc=True)
+        miss = out.isna() & (raw != "")
+    if miss.any():
+        out[miss] = pd.to_datetime([_parse_one(v) for v in raw[miss]], utc=True)
+    out = out.dt.tz_convert(None)
+    return out.fillna(pd.Timestamp.now(tz="UTC").tz_convert(None).floor("s"))
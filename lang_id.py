@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+lang_id.py
+----------
+Offline language identification for headlines (Spanish vs English), used
+to route articles to a sentiment backend that can actually read them.
+
+Character trigram model: each language gets smoothed log-probabilities of
+the trigrams of a small built-in seed text (frequent function words plus
+typical market-news vocabulary), padded with spaces so word starts and
+endings count. A text is assigned the language with the highest total
+log-probability of its own trigrams. No downloads, no external packages;
+a few microseconds per headline.
+
+Usage:
+  python lang_id.py "YPF sube tras el acuerdo" "Apple beats estimates"
+"""
+
+import math
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+UNKNOWN = "und"
+MIN_LETTERS = 8      # shorter texts are UNKNOWN (too little evidence)
+
+SEED_TEXT: Dict[str, str] = {
+    "es": (
+        "el la los las de del que y en un una por para con no se su sus al lo como mas pero "
+        "este esta estos estas sobre entre tras desde hasta segun durante ante sin porque "
+        "cuando tambien hay ser fue son han sido tiene tienen hace puede anio anos dia dias "
+        "las acciones de la empresa suben tras el anuncio de resultados del trimestre "
+        "el mercado argentino cerro con una baja en el indice merval mientras los bonos "
+        "en dolares subieron y el riesgo pais cayo por debajo de los puntos "
+        "la compania informo ganancias mejores de lo esperado y aumento el dividendo "
+        "el gobierno anuncio nuevas medidas economicas y el banco central subio la tasa "
+        "los inversores esperan la decision de la reserva federal sobre las tasas de interes "
+        "la petrolera invertira millones de dolares en vaca muerta durante el proximo ano "
+        "el precio del petroleo y de la soja impulsa a las empresas exportadoras "
+        "crece la inflacion y el consumo se desacelera segun datos oficiales publicados hoy "
+        "la justicia investiga una denuncia por fraude contra directivos de la firma "
+        "cotizacion dolar blue bolsa de comercio de buenos aires ventas utilidad deuda "
+        "la automotriz retira millones de autos por una falla y la aerolinea suspende vuelos "
+        "el directorio aprobo la compra de una participacion en la distribuidora electrica "
+        "las exportaciones del campo alcanzan un nuevo maximo y se recuperan las reservas "
+        "los analistas recomiendan comprar papeles bancarios ante la baja de la brecha cambiaria "
+        "ñ á é í ó ú ¿ ¡ ción ciones mente ado ada ido ida ar er ir aron ieron "
+    ),
+    "en": (
+        "the of and to in a is that for on with as by at from it its be was are were has have "
+        "had this these those which who will would but not or an they their after over than "
+        "into about more up out said says new year years week day shares stock "
+        "shares of the company rose after it reported quarterly earnings above estimates "
+        "the stock market closed lower as investors weighed the federal reserve decision "
+        "on interest rates while treasury yields climbed and the dollar strengthened "
+        "the bank raised its price target and upgraded the stock to buy from hold "
+        "revenue fell short of expectations and the firm cut its full year guidance "
+        "oil prices jumped on supply concerns boosting energy stocks across the board "
+        "regulators opened an investigation into the deal and the company faces a lawsuit "
+        "analysts expect growth to slow in the second half of the year according to data "
+        "tech giants led the rally with strong results from apple microsoft and nvidia "
+        "inflation cooled more than expected in the latest report released on thursday "
+        "the automaker recalls million cars over a safety issue and the airline cancels flights "
+        "the board approved the acquisition of a stake in the power utility for billion "
+        "shares slid as the chipmaker warned of weaker demand and higher costs next quarter "
+        "stocks to watch why investors are buying what to know before the market opens "
+        "ing tion ment ness ed ly th wh sh ough ight ers ies "
+    ),
+}
+
+
+def _normalize(text: str) -> str:
+    # keep letters (incl. accents / ñ) and inverted marks, collapse the rest to spaces
+    t = re.sub(r"[^a-záéíóúüñ¿¡]+", " ", (text or "").lower())
+    return " " + " ".join(t.split()) + " "
+
+
+def _trigrams(text: str) -> List[str]:
+    t = _normalize(text)
+    return [t[i:i + 3] for i in range(len(t) - 2)]
+
+
+class LanguageIdentifier:
+    """Trigram naive-Bayes language classifier over SEED_TEXT (or custom seeds)."""
+
+    def __init__(self, seeds: Optional[Dict[str, str]] = None):
+        seeds = seeds or SEED_TEXT
+        counts = {lang: Counter(_trigrams(text)) for lang, text in seeds.items()}
+        vocab = set().union(*counts.values())
+        self.languages = list(counts)
+        self.logp: Dict[str, Dict[str, float]] = {}
+        self.floor: Dict[str, float] = {}
+        for lang, c in counts.items():
+            total = sum(c.values()) + len(vocab) + 1
+            self.logp[lang] = {g: math.log((n + 1) / total) for g, n in c.items()}
+            self.floor[lang] = math.log(1 / total)
+
+    def detect(self, text: str) -> str:
+        grams = _trigrams(text)
+        if sum(ch.isalpha() for ch in _normalize(text)) < MIN_LETTERS:
+            return UNKNOWN
+        best, best_score = UNKNOWN, -math.inf
+        for lang in self.languages:
+            logp, floor = self.logp[lang], self.floor[lang]
+            score = sum(logp.get(g, floor) for g in grams)
+            if score > best_score:
+                best, best_score = lang, score
+        return best
+
+    def detect_batch(self, texts: Iterable[str]) -> List[str]:
+        return [self.detect(t) for t in texts]
+
+
+_DEFAULT: Optional[LanguageIdentifier] = None
+
+
+def detect_languages(texts: Iterable[str]) -> List[str]:
+    """Language code per text ('es', 'en' or 'und'), with the built-in model."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = LanguageIdentifier()
+    return _DEFAULT.detect_batch(texts)
+
+
+if __name__ == "__main__":
+    for text, lang in zip(sys.argv[1:], detect_languages(sys.argv[1:])):
+        print(f"{lang}\t{text}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+lexicon_sentiment.py
+--------------------
+Bilingual (Spanish / English) weighted finance lexicon, for headlines that
+VADER (English-only) cannot read and where loading FinBERT is overkill.
+
+The whole lexicon is compiled once into a single regex with one capture
+group per (phrase/word, weight) class. A batch of texts is accent-folded and
+lower-cased as a pandas Series, matched with one str.extractall call, and
+the per-text weight sums are reduced with np.bincount, so there is no
+Python loop per keyword or per text. Raw sums are squashed into [-1, 1]
+like VADER's compound score: x / sqrt(x^2 + alpha).
+
+Terms are written folded (no accents, lower case). A trailing "*" matches
+any word starting with the term; multi-word phrases are matched before
+single words, so "toma de ganancias" is not also counted as "ganancias".
+"""
+
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+NORMALIZE_ALPHA = 6.0
+
+LEXICON: Dict[str, float] = {
+    # --- strongly negative ---
+    "fraude*": -3, "fraud*": -3, "quiebra*": -3, "bancarrota*": -3, "bankrupt*": -3,
+    "insolvencia*": -3, "insolven*": -3, "default*": -3, "concurso preventivo": -3,
+    "desplom*": -3, "colaps*": -3, "collaps*": -3, "plunge*": -3, "crash*": -3,
+    "escandalo*": -3, "scandal*": -3, "profit warning": -3,
+    # --- negative ---
+    "denuncia*": -2, "demanda judicial": -2, "lawsuit*": -2, "sued": -2, "hackeo*": -2, "hack*": -2,
+    "ataque*": -2, "brecha*": -2, "breach*": -2, "sancion*": -2, "sanction*": -2, "multa*": -2,
+    "fined": -2, "accidente*": -2, "accident*": -2, "explosion*": -2, "derrame*": -2, "spill*": -2,
+    "despido*": -2, "layoff*": -2, "downgrade*": -2, "rebaja de calificacion": -2,
+    "investigacion*": -2, "investigat*": -2, "probe*": -2, "recall*": -2, "perdida*": -2,
+    "loss": -2, "losses": -2, "caida*": -2, "cae": -2, "caen": -2, "cayo": -2, "cayeron": -2,
+    "tumble*": -2, "slump*": -2, "recesion*": -2, "recession*": -2,
+    "peor de lo esperado": -2, "worse than expected": -2,
+    # --- mildly negative ---
+    "baja": -1, "bajas": -1, "bajan": -1, "bajo un": -1, "recorte*": -1, "cut": -1, "cuts": -1,
+    "decline*": -1, "declining": -1, "drop*": -1, "fall": -1, "falls": -1, "fell": -1, "falling": -1,
+    "weak*": -1, "debil*": -1, "missed": -1, "misses": -1, "retroced*": -1, "retroceso*": -1,
+    "riesgo*": -1, "risk*": -1, "incertidumbre*": -1, "uncertain*": -1, "huelga*": -1,
+    "strike*": -1, "paro": -1, "inflacion": -1, "toma de ganancias": -1, "deficit*": -1,
+    "warn*": -1,
+    # --- mildly positive ---
+    "sube": 1, "suben": 1, "subio": 1, "subieron": 1, "subida*": 1, "alza*": 1, "mejor*": 1,
+    "improv*": 1, "aument*": 1, "rise": 1, "rises": 1, "rising": 1, "rose": 1, "gain*": 1,
+    "gana": 1, "ganan": 1, "gano": 1, "ganancia*": 1, "crec*": 1, "grow*": 1, "expan*": 1,
+    "acuerdo*": 1, "deal": 1, "deals": 1, "agreement*": 1, "aprobacion*": 1, "aprueba*": 1,
+    "approv*": 1, "adquisicion*": 1, "acquisition*": 1, "acquire*": 1, "fusion*": 1,
+    "merger*": 1, "inversion*": 1, "investment*": 1, "dividend*": 1, "dividendo*": 1,
+    "recompra*": 1, "buyback*": 1,
+    # --- positive ---
+    "record*": 2, "upgrade*": 2, "beat": 2, "beats": 2, "supera*": 2, "surge*": 2, "soar*": 2,
+    "rally*": 2, "repunt*": 2, "dispara*": 2, "outperform*": 2, "strong*": 2, "solido*": 2,
+    "mejor de lo esperado": 2, "better than expected": 2,
+}
+
+
+def fold_series(texts: pd.Series) -> pd.Series:
+    """Accent-fold (NFKD, drop non-ASCII) and lower-case a whole Series."""
+    return (
+        texts.fillna("").astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.lower()
+    )
+
+
+def _term_regex(term: str) -> str:
+    words = term.rstrip("*").split()
+    body = r"\s+".join(re.escape(w) for w in words)
+    return body + (r"\w*" if term.endswith("*") else "")
+
+
+class LexiconBackend:
+    """
+    Weighted lexicon sentiment in [-1, 1]. score_batch() scores a whole
+    sequence of texts at once; score() is the single-text convenience.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, alpha: float = NORMALIZE_ALPHA):
+        lexicon = LEXICON if lexicon is None else lexicon
+        classes: Dict[tuple, list] = {}
+        for term, weight in lexicon.items():
+            is_word = len(term.rstrip("*").split()) == 1
+            classes.setdefault((is_word, float(weight)), []).append(term)
+        # phrases first: alternation is tried in order at each position
+        keys = sorted(classes)
+        groups = []
+        for key in keys:
+            terms = sorted(classes[key], key=lambda t: len(t.rstrip("*")), reverse=True)
+            groups.append("(" + "|".join(_term_regex(t) for t in terms) + ")")
+        self.pattern = re.compile(r"\b(?:" + "|".join(groups) + r")\b")
+        self.weights = np.array([w for _, w in keys], dtype=float)
+        self.alpha = alpha
+
+    def raw_scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Sum of matched weights per text."""
+        s = fold_series(pd.Series(list(texts), dtype=object))
+        raw = np.zeros(len(s))
+        if s.empty:
+            return raw
+        hits = s.str.extractall(self.pattern)
+        if not hits.empty:
+            per_match = hits.notna().to_numpy() @ self.weights
+            raw = np.bincount(hits.index.get_level_values(0), weights=per_match, minlength=len(s))
+        return raw
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        raw = self.raw_scores(texts)
+        return raw / np.sqrt(raw * raw + self.alpha)
+
+    def score(self, text: str) -> float:
+        if not text:
+            return 0.0
+        return float(self.score_batch([text])[0])
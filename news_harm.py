@@ -6,18 +6,23 @@ News Market Bot (Excel-enabled)
       - RawNews
       - MappedScored
       - DailySignals
+      - Backtest (with --backtest)
 """
 
 import json
 import argparse
 import datetime as dt
+import glob
 import hashlib
+import itertools
 import os
 import re
 import sys
-from typing import Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import feedparser
+import numpy as np
 import pandas as pd
 
 # --- Sentiment backends ---
@@ -39,19 +44,30 @@ try:
 except Exception:
     YF_AVAILABLE = False
 
-# Optional: plots
-try:
-    import plotly.graph_objects as go
-    PLOTLY_AVAILABLE = True
-except Exception:
-    PLOTLY_AVAILABLE = False
-
 
 # -----------------------------
 # Configuration
 # -----------------------------
 
-from ticker_aliases import DEFAULT_TICKERS, build_aliases
+from ticker_aliases import (
+    DEFAULT_TICKERS, AliasIndex, alias_index_path, build_aliases, fold_with_offsets, load_alias_index,
+)
+from backtest import run_backtest
+from calibrate import PROFILE_PATH, load_profile, pick_backend, run_calibration
+from bar_align import align_next_bar, forward_returns, session_dates
+from dashboard import write_dashboard
+from feed_reader import FEED_COLUMNS, read_feed
+from lang_id import detect_languages
+from lexicon_sentiment import LexiconBackend
+from relevance import DROP_BELOW, RELEVANCE_MODEL_PATH, filter_market
+from relevance import load_model as load_relevance_model
+from feed_reader import parse_dates as parse_feed_dates
+from signal_events import EVENTS_PATH, crossing_levels, daily_snapshot
+from signal_events import publish as publish_events
+from signal_panel import (
+    EWM_HALFLIFE, PANEL_PATH, ROLL_WINDOW,
+    attach_features, load_panel, save_panel, update_panel,
+)
 
 if os.path.exists("aliases.json"):
     with open("aliases.json", "r", encoding="utf-8") as f:
@@ -61,6 +77,9 @@ else:
     with open("aliases.json", "w", encoding="utf-8") as f:
         json.dump(TICKER_ALIASES, f, ensure_ascii=False, indent=2)
 
+# accent/case-folded alias index, cached next to aliases.json
+TICKER_INDEX = load_alias_index(TICKER_ALIASES, alias_index_path("aliases.json"))
+
 # Argentina-focused economic / markets feeds
 AR_FEEDS = [
     # Ámbito Financiero (Economía / Finanzas / Negocios)
@@ -92,6 +111,25 @@ YF_TICKER_FEED = (
 )
 
 
+# |mean_sentiment| needed for a BUY / SELL signal (see backtest.py to tune)
+SIGNAL_THRESHOLD = 0.15
+
+# article sentiment below this counts as a negative article (n_negative)
+NEGATIVE_THRESHOLD = -0.05
+
+BACKEND_NAMES = ["vader", "finbert", "lexicon"]
+
+# machine-specific settings measured by --calibrate (calibrate.py); {} if none
+TUNING = load_profile()
+
+FINBERT_BATCH_SIZE = TUNING.get("finbert_batch_size", 32)    # texts per FinBERT forward pass in score_batch
+FINBERT_MAX_LENGTH = TUNING.get("finbert_max_length", 256)   # tokens kept per text
+FETCH_WORKERS = TUNING.get("fetch_workers", 8)               # feeds downloaded concurrently
+
+# price bars for forward returns: "1d" = daily rows vs close-to-close returns,
+# finer intervals also add per-article returns (yfinance keeps ~60 days of those)
+BAR_INTERVALS = ["1d", "1h", "30m", "15m", "5m"]
+
 DATA_DIR = "news_bot_output"
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -103,74 +141,111 @@ def md5(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
 
-def normalize_text(text: str) -> str:
-    if not text:
-        return ""
-    # Remove excessive whitespace and urls
-    text = re.sub(r"http\S+", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+def normalize_series(texts: pd.Series) -> pd.Series:
+    """Strip URLs and collapse whitespace across a whole text column."""
+    return (
+        texts.fillna("").astype(str)
+        .str.replace(r"http\S+", "", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
 
 
-def parse_date(entry) -> dt.date:
-    # Attempt multiple fields, fallback to today
-    for key in ("published_parsed", "updated_parsed"):
-        if getattr(entry, key, None):
-            tstruct = getattr(entry, key)
-            try:
-                return dt.date(*tstruct[:3])
-            except Exception:
-                pass
-    return dt.date.today()
+# sentence ends at terminal punctuation followed by whitespace
+_SENTENCE_END = ".!?…"
+_SENTENCE_BOUNDARY = re.compile(rf"(?<=[{_SENTENCE_END}])\s+")
 
 
-def build_ticker_regexes(tickers: List[str], aliases_map: Dict[str, List[str]]) -> Dict[str, re.Pattern]:
-    patterns = {}
-    for t in tickers:
-        words = [re.escape(t)]
-        for alias in aliases_map.get(t, []):
-            words.append(re.escape(alias))
-        # word boundary for names; ticker can appear in parentheses, etc.
-        pat = r"(?i)\b(" + r"|".join(words) + r")\b"
-        patterns[t] = re.compile(pat, flags=re.IGNORECASE)
-    return patterns
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    spans = []
+    start = 0
+    for m in _SENTENCE_BOUNDARY.finditer(text):
+        spans.append((start, m.start()))
+        start = m.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def mention_window(text: str, match_spans: List[Tuple[int, int]], radius: int = 0) -> str:
+    """
+    Keep only the sentences that overlap a ticker mention, plus `radius`
+    sentences on each side. Falls back to the full text when there are no spans.
+    """
+    if not text or not match_spans:
+        return text
+    sents = sentence_spans(text)
+    keep = set()
+    for ms, me in match_spans:
+        for i, (ss, se) in enumerate(sents):
+            if ss < me and ms < se:
+                keep.update(range(max(0, i - radius), min(len(sents), i + radius + 1)))
+    if not keep:
+        return text
+    return " ".join(text[ss:se] for i, (ss, se) in enumerate(sents) if i in keep)
+
+
+def article_text(title: str, summary: str) -> str:
+    """Title and summary as one text, the title closing its own sentence (no "..")."""
+    title, summary = (title or "").strip(), (summary or "").strip()
+    if not title or not summary:
+        return title or summary
+    return title + (" " if title[-1] in _SENTENCE_END else ". ") + summary
 
 
 # -----------------------------
 # Fetch news
 # -----------------------------
-def fetch_feeds(tickers: List[str]) -> pd.DataFrame:
+def feed_urls(tickers: List[str]) -> List[str]:
     feeds = list(GENERAL_FEEDS)
     # add per-ticker yahoo feeds (tend to be very relevant)
     feeds += [YF_TICKER_FEED.format(ticker=t) for t in tickers]
+    return feeds
 
-    rows = []
-    for url in feeds:
+
+def fetch_feeds(tickers: List[str]) -> pd.DataFrame:
+    return fetch_feed_urls(feed_urls(tickers))
+
+
+def fetch_feed_urls(feeds: List[str], max_workers: int = FETCH_WORKERS) -> pd.DataFrame:
+    """
+    Fetch and normalize a list of RSS/Atom URLs (work_queue.py hands out subsets),
+    up to max_workers downloads at a time.
+    Entries are parsed straight into column lists (feed_reader.read_feed);
+    text cleanup, dates and uids are then computed once over the columns.
+    `published` is the full UTC publication time; `date` is the trading
+    session it can still move (bar_align.session_dates: after-close and
+    weekend news counts for the next session).
+    """
+    def get(url):
         try:
-            parsed = feedparser.parse(url)
-            for e in parsed.entries:
-                title = normalize_text(getattr(e, "title", ""))
-                summary = normalize_text(getattr(e, "summary", ""))
-                link = getattr(e, "link", "")
-                date = parse_date(e)
-                uid = md5((title or "") + (summary or "") + (link or ""))
-                rows.append(
-                    {
-                        "uid": uid,
-                        "date": pd.to_datetime(date),
-                        "title": title,
-                        "summary": summary,
-                        "link": link,
-                        "source": parsed.feed.get("title", url),
-                    }
-                )
+            return read_feed(url)
         except Exception as ex:
             print(f"[warn] failed feed: {url} -> {ex}", file=sys.stderr)
-
-    df = pd.DataFrame(rows).drop_duplicates(subset=["uid"])
+            return None
+
+    cols: Dict[str, list] = {c: [] for c in FEED_COLUMNS + ["source"]}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feeds)))) as ex:
+        results = list(ex.map(get, feeds))
+    for url, res in zip(feeds, results):
+        if res is None:
+            continue
+        feed_title, entries = res
+        for c in FEED_COLUMNS:
+            cols[c].extend(entries[c])
+        cols["source"].extend([feed_title or url] * len(entries["title"]))
+
+    if not cols["title"]:
+        return pd.DataFrame(columns=["uid", "date", "published", "title", "summary", "link", "source"])
+    df = pd.DataFrame(cols)
+    df["title"] = normalize_series(df["title"])
+    df["summary"] = normalize_series(df["summary"])
+    df["published"] = parse_feed_dates(df.pop("date_raw"))
+    df["date"] = session_dates(df["published"])
+    df["uid"] = [md5(t + s + l) for t, s, l in zip(df["title"], df["summary"], df["link"])]
+    df = df[["uid", "date", "published", "title", "summary", "link", "source"]].drop_duplicates(subset=["uid"])
     # Basic filter for empty rows
     df = df[(df["title"].str.len() > 0) | (df["summary"].str.len() > 0)]
-    return df.sort_values("date")
+    return df.sort_values("published", kind="stable")
 
 
 # -----------------------------
@@ -202,18 +277,36 @@ class FinBERTBackend:
         self.tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
         self.model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
         self.model.eval()
+        if TUNING.get("torch_threads"):
+            torch.set_num_threads(TUNING["torch_threads"])
 
     @torch.no_grad()
-    def score(self, text: str) -> float:
+    def score(self, text: str, max_length: int = FINBERT_MAX_LENGTH) -> float:
         if not text:
             return 0.0
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=256)
+        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=max_length)
         outputs = self.model(**inputs)
         probs = torch.nn.functional.softmax(outputs.logits, dim=-1).flatten()
         # order: negative, neutral, positive
         neg, neu, pos = probs.tolist()
         return float(pos - neg)  # roughly in [-1, 1]
 
+    @torch.no_grad()
+    def score_batch(
+        self, texts: List[str], batch_size: int = FINBERT_BATCH_SIZE, max_length: int = FINBERT_MAX_LENGTH,
+    ) -> List[float]:
+        """Padded mini-batches: one forward pass per batch_size texts."""
+        out = [0.0] * len(texts)
+        idx = [i for i, t in enumerate(texts) if t]
+        for start in range(0, len(idx), batch_size):
+            chunk = idx[start:start + batch_size]
+            inputs = self.tokenizer([texts[i] for i in chunk], return_tensors="pt",
+                                    truncation=True, max_length=max_length, padding=True)
+            probs = torch.nn.functional.softmax(self.model(**inputs).logits, dim=-1)
+            for i, s in zip(chunk, (probs[:, 2] - probs[:, 0]).tolist()):
+                out[i] = float(s)
+        return out
+
 
 def get_backend(name: str):
     name = name.lower()
@@ -221,197 +314,542 @@ def get_backend(name: str):
         return VaderBackend()
     if name in ("finbert", "bert", "prosusai/finbert"):
         return FinBERTBackend()
-    raise ValueError("Unknown sentiment backend. Use 'vader' or 'finbert'.")
+    if name in ("lexicon", "keywords"):
+        return LexiconBackend()
+    raise ValueError("Unknown sentiment backend. Use 'vader', 'finbert' or 'lexicon'.")
+
+
+def parse_lang_backends(spec: str) -> Dict[str, str]:
+    """'es=lexicon,en=vader' -> {'es': 'lexicon', 'en': 'vader'} (argparse type)."""
+    routes: Dict[str, str] = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        lang, sep, name = part.partition("=")
+        if not sep or not lang.strip() or name.strip().lower() not in BACKEND_NAMES:
+            raise argparse.ArgumentTypeError(
+                f"bad language route {part!r}: expected LANG=BACKEND with BACKEND in {BACKEND_NAMES}")
+        routes[lang.strip().lower()] = name.strip().lower()
+    return routes
+
+
+def score_texts(backend, texts: List[str]) -> List[float]:
+    """One call per batch for backends with score_batch, else per text."""
+    if hasattr(backend, "score_batch"):
+        return [float(s) for s in backend.score_batch(texts)]
+    return [backend.score(t) for t in texts]
 
 
 # -----------------------------
 # Mapping headlines to tickers
 # -----------------------------
-def map_articles_to_tickers(df_news: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
-    regs = build_ticker_regexes(tickers, TICKER_ALIASES)
+def map_articles_to_tickers(
+    df_news: pd.DataFrame,
+    tickers: List[str],
+    mention_radius: Optional[int] = None,
+    alias_index: Optional[AliasIndex] = None,
+) -> pd.DataFrame:
+    """
+    Matching runs on the accent/case-folded article text (folded once per
+    article) against alias_index (default: the index of aliases.json).
+
+    mention_radius: when set, each (article, ticker) row also gets a `context`
+    column holding only the sentences around that ticker's mentions
+    (+/- mention_radius sentences), which score_articles scores instead of
+    the whole title + summary.
+    """
+    index = alias_index or TICKER_INDEX
+    regs = {t: index.pattern(t) for t in tickers}
     rows = []
     for _, r in df_news.iterrows():
-        text = f"{r['title']} {r['summary']}".strip()
+        full_text = article_text(r["title"], r["summary"])
+        folded, offsets = fold_with_offsets(full_text)
         matched = []
         for t in tickers:
-            if regs[t].search(text):
+            if regs[t].search(folded):
                 matched.append(t)
         if not matched:
             # keep general market articles under 'MARKET'
             matched = ["MARKET"]
         for t in matched:
-            rows.append(
-                {
-                    "date": r["date"].date(),
-                    "ticker": t,
-                    "title": r["title"],
-                    "summary": r["summary"],
-                    "link": r["link"],
-                    "source": r["source"],
-                    "uid": r["uid"],
-                }
-            )
+            row = {
+                "date": r["date"].date(),
+                "published": r.get("published", r["date"]),
+                "ticker": t,
+                "title": r["title"],
+                "summary": r["summary"],
+                "link": r["link"],
+                "source": r["source"],
+                "uid": r["uid"],
+            }
+            if mention_radius is not None:
+                spans = [m.span() for m in regs[t].finditer(folded)] if t in regs else []
+                if offsets is not None:
+                    spans = [(offsets[s], offsets[e]) for s, e in spans]
+                row["context"] = mention_window(full_text, spans, mention_radius)
+            rows.append(row)
     mapped = pd.DataFrame(rows).drop_duplicates(subset=["uid", "ticker"])
     return mapped
 
 
-def score_articles(df_mapped: pd.DataFrame, backend_name: str) -> pd.DataFrame:
-    backend = get_backend(backend_name)
-    scores = []
-    for _, r in df_mapped.iterrows():
-        text = (r["title"] or "") + ". " + (r["summary"] or "")
-        s = backend.score(text)
-        scores.append(s)
+def score_articles(
+    df_mapped: pd.DataFrame,
+    backend_name: str,
+    lang_backends: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Scores `context` (mention windows from map_articles_to_tickers) when
+    present, otherwise title + summary.
+
+    lang_backends: {language: backend name}, e.g. {"es": "lexicon"}. When
+    given, each article's language is detected (lang_id) and stored in a
+    `lang` column, and every language partition is scored in one batch by
+    its backend; unlisted languages use `backend_name`.
+    """
+    texts = [article_text(t, s) for t, s in zip(df_mapped["title"], df_mapped["summary"])]
+    if "context" in df_mapped.columns:
+        texts = [c if isinstance(c, str) and c else t for c, t in zip(df_mapped["context"], texts)]
     df_mapped = df_mapped.copy()
+    if not lang_backends:
+        df_mapped["sentiment"] = score_texts(get_backend(backend_name), texts)
+        return df_mapped
+
+    langs = detect_languages(texts)
+    routes = pd.Series([lang_backends.get(l, backend_name) for l in langs])
+    scores = np.zeros(len(texts))
+    for name, pos in routes.groupby(routes).indices.items():
+        scores[pos] = score_texts(get_backend(name), [texts[i] for i in pos])
+        print(f"[info] scored {len(pos)} article(s) with {name}")
+    df_mapped["lang"] = langs
     df_mapped["sentiment"] = scores
     return df_mapped
 
 
-def aggregate_daily(df_scored: pd.DataFrame) -> pd.DataFrame:
+def map_and_score(
+    news: pd.DataFrame,
+    tickers: List[str],
+    backend_name: str,
+    mention_radius: Optional[int] = None,
+    lang_backends: Optional[Dict[str, str]] = None,
+    relevance=None,
+    relevance_threshold: float = DROP_BELOW,
+) -> pd.DataFrame:
+    """map_articles_to_tickers -> relevance filter (when a model is given) -> score_articles."""
+    mapped = map_articles_to_tickers(news, tickers, mention_radius=mention_radius)
+    if relevance is not None:
+        mapped, _ = filter_market(mapped, relevance, relevance_threshold)
+    return score_articles(mapped, backend_name, lang_backends) if not mapped.empty else mapped
+
+
+def aggregate_daily(df_scored: pd.DataFrame, threshold: float = SIGNAL_THRESHOLD) -> pd.DataFrame:
     agg = (
-        df_scored.groupby(["date", "ticker"])
+        df_scored.assign(_neg=df_scored["sentiment"] < NEGATIVE_THRESHOLD)
+        .groupby(["date", "ticker"])
         .agg(
             mean_sentiment=("sentiment", "mean"),
             n_articles=("uid", "nunique"),
+            n_negative=("_neg", "sum"),
         )
         .reset_index()
         .sort_values(["ticker", "date"])
     )
+    return add_signal(agg, threshold)
+
+
+def add_signal(agg: pd.DataFrame, threshold: float = SIGNAL_THRESHOLD) -> pd.DataFrame:
     # simple signal: thresholds can be tuned
-    def signal(x: float) -> str:
-        if x >= 0.15:
-            return "BUY"
-        if x <= -0.15:
-            return "SELL"
-        return "HOLD"
-
-    agg["signal"] = agg["mean_sentiment"].apply(signal)
+    x = agg["mean_sentiment"]
+    agg["signal"] = np.select([x >= threshold, x <= -threshold], ["BUY", "SELL"], default="HOLD")
     return agg
 
 
 # -----------------------------
 # Prices & Plotting
 # -----------------------------
+def price_symbol(ticker: str) -> str:
+    # use ^GSPC as proxy for market
+    return "^GSPC" if ticker == "MARKET" else ticker
+
+
+def download_bars(symbol: str, start, end, interval: str = "1d") -> pd.DataFrame:
+    """yfinance OHLC bars, index as tz-naive UTC bar start (daily: the session date)."""
+    raw = yf.download(symbol, start=str(start), end=str(end), interval=interval,
+                      progress=False, auto_adjust=False)
+    if isinstance(raw.columns, pd.MultiIndex):
+        raw.columns = raw.columns.get_level_values(0)
+    idx = pd.to_datetime(raw.index)
+    raw.index = idx.tz_convert("UTC").tz_localize(None) if idx.tz is not None else idx
+    return raw
+
+
 def add_returns(daily: pd.DataFrame, lookahead_days: int = 1) -> pd.DataFrame:
+    """
+    price / fwd_return (close-to-close over `lookahead_days` trading bars)
+    for each daily row. Rows are as-of joined to the first bar on or after
+    their session date, so a date without a bar (holiday) takes the next
+    session that traded; returns only span real bars.
+    """
     if not YF_AVAILABLE:
         return daily
-    out = []
+    bars = []
     for tkr, d in daily.groupby("ticker"):
-        if tkr == "MARKET":
-            # use ^GSPC as proxy for market
-            y_ticker = "^GSPC"
-        else:
-            y_ticker = tkr
+        y_ticker = price_symbol(tkr)
         try:
             start = (pd.to_datetime(d["date"].min()) - pd.Timedelta(days=7)).date()
             end = (pd.to_datetime(d["date"].max()) + pd.Timedelta(days=7)).date()
-            px = yf.download(y_ticker, start=str(start), end=str(end), progress=False)["Adj Close"].dropna()
-            df = d.copy()
-            df = df.sort_values("date")
-            # align with prices (business days)
-            df["date"] = pd.to_datetime(df["date"])
-            # forward returns (next-day close to close)
-            px = px.asfreq("B").ffill()
-            # return over lookahead_days
-            next_px = px.shift(-lookahead_days)
-            ret = (next_px / px - 1.0).rename("fwd_return")
-            # join on same day
-            joined = df.set_index("date").join(px.rename("price")).join(ret)
-            joined["ticker"] = tkr
-            out.append(joined.reset_index())
+            px = download_bars(y_ticker, start, end)["Adj Close"].dropna()
+            bars.append(pd.DataFrame({
+                "ticker": tkr,
+                "bar_date": px.index.normalize(),
+                "price": px.to_numpy(),
+                "fwd_return": forward_returns(px, lookahead_days).to_numpy(),
+            }))
         except Exception as ex:
             print(f"[warn] price fetch failed for {y_ticker}: {ex}", file=sys.stderr)
-    if out:
-        res = pd.concat(out, ignore_index=True)
-        # keep the columns if present
-        keep = [c for c in ["date", "ticker", "mean_sentiment", "n_articles", "signal", "price", "fwd_return"] if c in res.columns]
-        return res[keep]
+    if bars:
+        base = daily.drop(columns=["price", "fwd_return"], errors="ignore")
+        res = align_next_bar(base, pd.concat(bars, ignore_index=True), on="date", bar_on="bar_date", by="ticker")
+        res = res[res["ticker"].isin([b["ticker"].iat[0] for b in bars if len(b)])]
+        # every aggregate column (n_negative feeds the panel / Weekly) + the price columns
+        return res[list(base.columns) + ["price", "fwd_return"]]
     return daily
 
 
-def plot_ticker(daily_with_ret: pd.DataFrame, ticker: str):
-    if not PLOTLY_AVAILABLE:
-        print("[info] Plotly not installed; skipping plot.")
-        return
-    d = daily_with_ret[daily_with_ret["ticker"] == ticker].dropna(subset=["mean_sentiment"])
-    if d.empty:
-        print(f"[info] No data to plot for {ticker}")
-        return
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=d["date"],
-        y=d["mean_sentiment"],
-        name="Daily Sentiment"
-    ))
-    if "fwd_return" in d.columns and d["fwd_return"].notna().any():
-        fig.add_trace(go.Scatter(
-            x=d["date"],
-            y=d["fwd_return"],
-            name="Next-Day Return",
-            mode="lines+markers",
-            yaxis="y2"
-        ))
-        fig.update_layout(
-            title=f"{ticker} — Sentiment vs. Next-Day Returns",
-            xaxis_title="Date",
-            yaxis_title="Sentiment (avg)",
-            yaxis2=dict(title="Fwd Return", overlaying="y", side="right"),
-            legend=dict(orientation="h")
-        )
-    else:
-        fig.update_layout(
-            title=f"{ticker} — Daily Sentiment",
-            xaxis_title="Date",
-            yaxis_title="Sentiment (avg)",
-            legend=dict(orientation="h")
-        )
-    fig.show()
+def add_article_returns(scored: pd.DataFrame, interval: str = "1h", lookahead_bars: int = 1) -> pd.DataFrame:
+    """
+    Per-article intraday returns. Each article is as-of joined to the first
+    `interval` bar that opens strictly after its `published` time, so news
+    outside market hours or on a weekend lands on the next session's first
+    bar. Adds bar_time (UTC bar start), bar_price (its open) and bar_return
+    (that open to the close `lookahead_bars` bars later).
+    """
+    if not YF_AVAILABLE or scored.empty or "published" not in scored.columns:
+        return scored
+    published = pd.to_datetime(scored["published"])
+    start = (published.min() - pd.Timedelta(days=1)).date()
+    end = (published.max() + pd.Timedelta(days=5)).date()
+    bars = []
+    for tkr in scored["ticker"].unique():
+        y_ticker = price_symbol(tkr)
+        try:
+            raw = download_bars(y_ticker, start, end, interval).dropna(subset=["Open", "Close"])
+            bars.append(pd.DataFrame({
+                "ticker": tkr,
+                "bar_time": raw.index,
+                "bar_price": raw["Open"].to_numpy(),
+                "bar_return": forward_returns(raw["Open"], lookahead_bars, exit=raw["Close"]).to_numpy(),
+            }))
+        except Exception as ex:
+            print(f"[warn] {interval} price fetch failed for {y_ticker}: {ex}", file=sys.stderr)
+    if not bars:
+        return scored
+    return align_next_bar(scored.assign(published=published), pd.concat(bars, ignore_index=True),
+                          on="published", bar_on="bar_time", by="ticker", strict=True)
 
 
 # -----------------------------
 # Excel writer
 # -----------------------------
-def save_to_excel(news: pd.DataFrame, scored: pd.DataFrame, daily: pd.DataFrame) -> str:
+def save_to_excel(
+    news: Optional[pd.DataFrame],
+    scored: Optional[pd.DataFrame],
+    daily: pd.DataFrame,
+    backtest: Optional[pd.DataFrame] = None,
+) -> str:
+    """news / scored may be None (streaming mode keeps them in the CSVs only)."""
     xlsx_path = os.path.join(DATA_DIR, "news_outputs.xlsx")  # always overwrite same file
     with pd.ExcelWriter(xlsx_path, engine="xlsxwriter") as writer:
-        news.to_excel(writer, sheet_name="RawNews", index=False)
-        scored.to_excel(writer, sheet_name="MappedScored", index=False)
+        if news is not None:
+            news.to_excel(writer, sheet_name="RawNews", index=False)
+        if scored is not None:
+            scored.to_excel(writer, sheet_name="MappedScored", index=False)
         daily.to_excel(writer, sheet_name="DailySignals", index=False)
+        if backtest is not None and not backtest.empty:
+            backtest.to_excel(writer, sheet_name="Backtest", index=False)
     print(f"[info] Excel overwritten: {xlsx_path}")
     return xlsx_path
 
+def save_csv_artifacts(news: pd.DataFrame, scored: pd.DataFrame, daily: pd.DataFrame, ts: str) -> Tuple[str, str, str]:
+    news_file = os.path.join(DATA_DIR, f"raw_news_{ts}.csv")
+    mapped_file = os.path.join(DATA_DIR, f"mapped_scored_{ts}.csv")
+    daily_file = os.path.join(DATA_DIR, f"daily_signals_{ts}.csv")
+
+    news.to_csv(news_file, index=False)
+    scored.to_csv(mapped_file, index=False)
+    daily.to_csv(daily_file, index=False)
+    return news_file, mapped_file, daily_file
+
+
 # -----------------------------
-# Main
+# Streaming (bounded memory)
 # -----------------------------
-def run(tickers: List[str], backend: str, days: int, plot: bool, lookahead: int):
-    print(f"[info] tickers={tickers} backend={backend} days={days}")
+STREAM_CHUNK_SIZE = 2000      # articles per chunk
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 1_000_000
+# working copies of a chunk alive at once during map/score (rough estimate)
+STREAM_COPY_FACTOR = 4.0
 
-    news = fetch_feeds(tickers)
-    if news.empty:
-        print("[warn] no news found")
-        return
 
-    # filter by recency
+class DailyAccumulator:
+    """
+    Running per-(date, ticker) sentiment sum, row count and negative count.
+    finalize() gives what aggregate_daily returns for all rows added, while
+    only one row per (date, ticker) stays in memory. Rows must be unique per
+    (uid, ticker), as map_articles_to_tickers emits them for deduplicated
+    news, so the row count equals aggregate_daily's nunique(uid).
+    """
+
+    def __init__(self):
+        self.totals: Optional[pd.DataFrame] = None
+
+    def add(self, scored: pd.DataFrame) -> None:
+        if scored.empty:
+            return
+        s = scored["sentiment"].astype(float)
+        part = (
+            pd.DataFrame({"date": scored["date"], "ticker": scored["ticker"],
+                          "sum": s, "n": 1, "neg": (s < NEGATIVE_THRESHOLD).astype(int)})
+            .groupby(["date", "ticker"])
+            .sum()
+        )
+        self.totals = part if self.totals is None else self.totals.add(part, fill_value=0)
+
+    def finalize(self, threshold: float = SIGNAL_THRESHOLD) -> pd.DataFrame:
+        cols = ["date", "ticker", "mean_sentiment", "n_articles", "n_negative", "signal"]
+        if self.totals is None:
+            return pd.DataFrame(columns=cols)
+        t = self.totals.reset_index()
+        agg = pd.DataFrame({
+            "date": t["date"],
+            "ticker": t["ticker"],
+            "mean_sentiment": t["sum"] / t["n"],
+            "n_articles": t["n"].astype(int),
+            "n_negative": t["neg"].astype(int),
+        }).sort_values(["ticker", "date"])
+        return add_signal(agg, threshold)
+
+
+def stream_news(tickers: List[str], from_csv: Optional[List[str]] = None, read_size: int = STREAM_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    News in pieces: one fetched feed at a time, or `read_size` rows at a time
+    from raw_news CSVs (globs allowed) for backfills. Feeds are downloaded
+    FETCH_WORKERS at a time and yielded as each one completes; at most twice
+    that many are in flight or waiting, so a slow consumer does not pull every
+    feed into memory.
+    """
+    if from_csv:
+        paths = [p for pat in from_csv for p in sorted(glob.glob(pat))]
+        for path in paths:
+            for chunk in pd.read_csv(path, chunksize=read_size, parse_dates=["date"]):
+                chunk[["title", "summary"]] = chunk[["title", "summary"]].fillna("")
+                if "published" in chunk.columns:
+                    chunk["published"] = pd.to_datetime(chunk["published"])
+                yield chunk
+        return
+    urls = iter(feed_urls(tickers))
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        pending = {ex.submit(fetch_feed_urls, [u], 1) for u in itertools.islice(urls, 2 * FETCH_WORKERS)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.update(ex.submit(fetch_feed_urls, [u], 1) for u in itertools.islice(urls, 1))
+                yield fut.result()
+
+
+def rechunk(frames: Iterator[pd.DataFrame], size: Callable[[], int]) -> Iterator[pd.DataFrame]:
+    """Regroup a stream of frames into chunks of size() rows (re-read per chunk)."""
+    buf: List[pd.DataFrame] = []
+    n = 0
+    for f in frames:
+        while len(f):
+            take = size() - n
+            buf.append(f.iloc[:take])
+            n += len(buf[-1])
+            f = f.iloc[take:]
+            if n >= size():
+                yield pd.concat(buf, ignore_index=True)
+                buf, n = [], 0
+    if buf:
+        yield pd.concat(buf, ignore_index=True)
+
+
+def append_csv(df: pd.DataFrame, path: str) -> None:
+    """Append rows under the file's existing header (empty frames write nothing)."""
+    if df.empty:
+        return
+    if os.path.exists(path):
+        df = df.reindex(columns=pd.read_csv(path, nrows=0).columns)
+    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def run_streaming(
+    tickers: List[str],
+    backend: str,
+    days: int,
+    ts: str,
+    chunk_size: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+    mention_radius: Optional[int] = None,
+    lang_backends: Optional[Dict[str, str]] = None,
+    relevance=None,
+    relevance_threshold: float = DROP_BELOW,
+    from_csv: Optional[List[str]] = None,
+) -> Tuple[pd.DataFrame, str, str]:
+    """
+    Map and score news chunk by chunk. Raw and scored rows are appended to
+    the raw_news / mapped_scored CSVs as each chunk finishes; only the
+    per-(date, ticker) running aggregates and the set of seen uids stay in
+    memory. With max_memory_mb, the chunk size is re-derived after every
+    chunk from its measured bytes per article (capped by chunk_size).
+    Returns (aggregate_daily-style frame, news CSV, mapped CSV).
+    """
+    news_file = os.path.join(DATA_DIR, f"raw_news_{ts}.csv")
+    mapped_file = os.path.join(DATA_DIR, f"mapped_scored_{ts}.csv")
+    for path in (news_file, mapped_file):   # chunks are appended
+        if os.path.exists(path):
+            os.remove(path)
     cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
-    news = news[news["date"] >= cutoff]
+    cap = chunk_size or (MAX_CHUNK_SIZE if max_memory_mb else STREAM_CHUNK_SIZE)
+    size = [min(cap, STREAM_CHUNK_SIZE) if max_memory_mb else cap]
+
+    acc = DailyAccumulator()
+    seen = set()
+    n_news = n_rows = n_chunks = 0
+    for chunk in rechunk(stream_news(tickers, from_csv, read_size=min(cap, STREAM_CHUNK_SIZE)), lambda: size[0]):
+        chunk = chunk[(chunk["date"] >= cutoff) & ~chunk["uid"].isin(seen)].drop_duplicates(subset=["uid"])
+        seen.update(chunk["uid"])
+        if chunk.empty:
+            continue
+        scored = map_and_score(chunk, tickers, backend, mention_radius, lang_backends,
+                               relevance, relevance_threshold)
+        acc.add(scored)
+        append_csv(chunk, news_file)
+        append_csv(scored, mapped_file)
+        n_news += len(chunk)
+        n_rows += len(scored)
+        n_chunks += 1
+        if max_memory_mb:
+            per_article = (chunk.memory_usage(deep=True).sum() + scored.memory_usage(deep=True).sum()) / len(chunk)
+            size[0] = int(np.clip(max_memory_mb * 2**20 / (per_article * STREAM_COPY_FACTOR), MIN_CHUNK_SIZE, cap))
+        del scored
+
+    print(f"[info] streamed {n_news} article(s) in {n_chunks} chunk(s) -> {n_rows} scored row(s); "
+          f"chunk size {size[0]}")
+    return acc.finalize(), news_file, mapped_file
+
 
-    mapped = map_articles_to_tickers(news, tickers)
-    scored = score_articles(mapped, backend)
-    daily = aggregate_daily(scored)
+# -----------------------------
+# Main
+# -----------------------------
+def build_daily(
+    scored: pd.DataFrame,
+    lookahead: int = 1,
+    roll_window: int = ROLL_WINDOW,
+    ewm_halflife: float = EWM_HALFLIFE,
+) -> pd.DataFrame:
+    """aggregate_daily + forward returns + rolling/EWM features from the persisted panel."""
+    return enrich_daily(aggregate_daily(scored), lookahead, roll_window, ewm_halflife)
+
+
+def enrich_daily(
+    daily: pd.DataFrame,
+    lookahead: int = 1,
+    roll_window: int = ROLL_WINDOW,
+    ewm_halflife: float = EWM_HALFLIFE,
+) -> pd.DataFrame:
+    """Forward returns + rolling/EWM features for already aggregated daily rows."""
     daily = add_returns(daily, lookahead_days=lookahead)
 
-    # Save artifacts
+    # rolling / EWM features, updated incrementally over the persisted panel
+    panel = update_panel(load_panel(PANEL_PATH), daily, window=roll_window, halflife=ewm_halflife)
+    save_panel(panel, PANEL_PATH)
+    return attach_features(daily, panel)
+
+
+def publish_signals(daily: pd.DataFrame, events_path: Optional[str] = EVENTS_PATH, webhook: Optional[str] = None) -> None:
+    """Signal changes since the last run -> events JSONL / webhook ('' / None disables each)."""
+    if events_path or webhook:
+        publish_events(daily_snapshot(daily), "news", events_path, webhook,
+                       levels=crossing_levels(SIGNAL_THRESHOLD))
+
+
+def run(
+    tickers: List[str],
+    backend: str,
+    days: int,
+    plot: bool,
+    lookahead: int,
+    mention_radius: Optional[int] = None,
+    backtest: bool = False,
+    roll_window: int = ROLL_WINDOW,
+    ewm_halflife: float = EWM_HALFLIFE,
+    lang_backends: Optional[Dict[str, str]] = None,
+    relevance_model: Optional[str] = None,
+    relevance_threshold: float = DROP_BELOW,
+    chunk_size: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+    from_csv: Optional[List[str]] = None,
+    events_path: Optional[str] = EVENTS_PATH,
+    webhook: Optional[str] = None,
+    bar_interval: str = "1d",
+):
+    """
+    chunk_size / max_memory_mb / from_csv switch to streaming mode
+    (run_streaming): bounded memory, detail rows only in the CSVs.
+    events_path / webhook: where signal changes since the last run go
+    (signal_events.py); '' / None disables.
+    bar_interval: intraday interval (e.g. "1h") to also align each scored
+    article to its next bar and add per-article returns (add_article_returns).
+    """
+    print(f"[info] tickers={tickers} backend={backend} days={days}")
+    if TUNING:
+        print(f"[info] tuning profile: {TUNING}")
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    news_file = os.path.join(DATA_DIR, f"raw_news_{ts}.csv")
-    mapped_file = os.path.join(DATA_DIR, f"mapped_scored_{ts}.csv")
-    daily_file = os.path.join(DATA_DIR, f"daily_signals_{ts}.csv")
-
-    news.to_csv(news_file, index=False)
-    scored.to_csv(mapped_file, index=False)
-    daily.to_csv(daily_file, index=False)
+    relevance = load_relevance_model(relevance_model) if relevance_model else None
+
+    if chunk_size or max_memory_mb or from_csv:
+        daily, news_file, mapped_file = run_streaming(
+            tickers, backend, days, ts, chunk_size, max_memory_mb, mention_radius,
+            lang_backends, relevance, relevance_threshold, from_csv)
+        if daily.empty:
+            print("[warn] no news found")
+            return
+        daily = enrich_daily(daily, lookahead, roll_window, ewm_halflife)
+        if bar_interval != "1d":
+            print("[info] per-article intraday returns need the scored rows in memory; skipped in streaming mode")
+        daily_file = os.path.join(DATA_DIR, f"daily_signals_{ts}.csv")
+        daily.to_csv(daily_file, index=False)
+        news = scored = None
+    else:
+        news = fetch_feeds(tickers)
+        if news.empty:
+            print("[warn] no news found")
+            return
+
+        # filter by recency
+        cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
+        news = news[news["date"] >= cutoff]
+
+        scored = map_and_score(news, tickers, backend, mention_radius, lang_backends,
+                               relevance, relevance_threshold)
+        daily = build_daily(scored, lookahead, roll_window, ewm_halflife)
+        if bar_interval != "1d":
+            scored = add_article_returns(scored, bar_interval, lookahead)
+
+        # Save artifacts
+        news_file, mapped_file, daily_file = save_csv_artifacts(news, scored, daily, ts)
+
+    bt = None
+    if backtest:
+        bt = run_backtest(daily)
+        if not bt.empty:
+            best = bt.iloc[0]
+            print(f"[info] backtest best: threshold={best['threshold']:.2f} "
+                  f"lookahead={int(best['lookahead'])} min_articles={int(best['min_articles'])} "
+                  f"hit_rate={best['hit_rate']:.2%} sharpe={best['sharpe']:.2f}")
+
+    publish_signals(daily, events_path, webhook)
 
     # NEW: save to Excel (multi-sheet)
-    xlsx_path = save_to_excel(news, scored, daily)
+    xlsx_path = save_to_excel(news, scored, daily, backtest=bt)
 
     # Print summary signals
     print("\n=== Signals (last {} days) ===".format(days))
@@ -422,16 +860,18 @@ def run(tickers: List[str], backend: str, days: int, plot: bool, lookahead: int)
         sent = float(r["mean_sentiment"])
         n = int(r["n_articles"])
         sig = r["signal"]
-        print(f"{r['ticker']:<6}  signal={sig:<4}  sentiment={sent:+.3f}  n={n}")
+        ewm = float(r.get("ewm_sentiment", float("nan")))
+        print(f"{r['ticker']:<6}  signal={sig:<4}  sentiment={sent:+.3f}  ewm={ewm:+.3f}  n={n}")
 
     print(f"\nSaved:\n- {news_file}\n- {mapped_file}\n- {daily_file}\n- {xlsx_path}")
 
     plot = plot or (os.getenv("PLOTLY_ENABLED", "0") == "1")
 
     if plot :
-        print("\n[info] Generating plots...")
-        for t in tickers:
-            plot_ticker(daily, t)
+        # one self-contained HTML file for every ticker (headless-safe)
+        dash_file = write_dashboard(daily, os.path.join(DATA_DIR, f"dashboard_{ts}.html"), tickers)
+        if dash_file:
+            print(f"[ok] Dashboard: {dash_file}")
     else:
         print("[info] Plotting skipped (use --plot to enable)")
 
@@ -439,10 +879,47 @@ def run(tickers: List[str], backend: str, days: int, plot: bool, lookahead: int)
 def parse_args():
     p = argparse.ArgumentParser(description="News Market Bot (Excel-enabled)")
     p.add_argument("--tickers", nargs="+", default=DEFAULT_TICKERS, help="List of tickers")
-    p.add_argument("--backend", default="vader", choices=["vader", "finbert"], help="Sentiment backend")
+    p.add_argument("--backend", default="vader", choices=BACKEND_NAMES, help="Sentiment backend")
+    p.add_argument("--profile-backend", action="store_true",
+                   help="Use the backend recommended by --calibrate instead of --backend")
+    p.add_argument("--lang-backends", type=parse_lang_backends, default=None, metavar="LANG=BACKEND,...",
+                   help="Detect each article's language and score it with that language's backend, "
+                        "e.g. es=lexicon,en=vader (other languages use --backend)")
+    p.add_argument("--relevance-model", nargs="?", const=RELEVANCE_MODEL_PATH, default=None, metavar="PATH",
+                   help="Drop off-topic MARKET articles before scoring (relevance.py model trained on "
+                        f"your feeds; default path {RELEVANCE_MODEL_PATH})")
+    p.add_argument("--relevance-threshold", type=float, default=DROP_BELOW,
+                   help="Drop MARKET articles whose P(relevant) is below this")
     p.add_argument("--days", type=int, default=7, help="Lookback window for news")
-    p.add_argument("--plot", action="store_true", help="Plot sentiment vs returns")
-    p.add_argument("--lookahead", type=int, default=1, help="Days ahead to compute forward return")
+    p.add_argument("--chunk-size", type=int, default=None,
+                   help="Streaming mode: map/score this many articles at a time, keep only daily "
+                        "aggregates in memory and append detail rows to the CSVs")
+    p.add_argument("--max-memory", type=float, default=None, metavar="MB",
+                   help="Streaming mode: size chunks to stay near this working-set budget")
+    p.add_argument("--from-csv", nargs="+", default=None, metavar="PATH",
+                   help="Streaming backfill from raw_news CSVs (globs ok) instead of fetching feeds")
+    p.add_argument("--plot", action="store_true",
+                   help="Write an HTML dashboard of sentiment vs returns (all tickers, one file)")
+    p.add_argument("--lookahead", type=int, default=1, help="Bars (trading days) ahead to compute forward return")
+    p.add_argument("--bar-interval", default="1d", choices=BAR_INTERVALS,
+                   help="Also align each article to the next bar of this intraday interval and add "
+                        "per-article returns to MappedScored (--lookahead bars ahead)")
+    p.add_argument("--mention-window", type=int, default=None,
+                   help="Score only the sentences around each ticker mention (+/- N sentences)")
+    p.add_argument("--roll-window", type=int, default=ROLL_WINDOW,
+                   help="Days in the rolling sentiment / article-count window")
+    p.add_argument("--ewm-halflife", type=float, default=EWM_HALFLIFE,
+                   help="Half-life (days) of the exponentially weighted features")
+    p.add_argument("--events", type=str, default=EVENTS_PATH, metavar="PATH",
+                   help="Append signal flips / sentiment crossings since the last run as JSON lines ('' to disable)")
+    p.add_argument("--webhook", type=str, default=None, metavar="URL",
+                   help="Also POST those events as a JSON array to this URL")
+    p.add_argument("--backtest", action="store_true",
+                   help="Evaluate signal thresholds/lookaheads/min articles; adds a Backtest sheet")
+    p.add_argument("--calibrate", action="store_true",
+                   help=f"Benchmark fetch/match/score/write on this machine for --tickers and store the "
+                        f"best worker count, FinBERT batch/truncation and recommended backend in {PROFILE_PATH}, "
+                        "then exit")
     # parse_known_args to be notebook-friendly (ignores -f from Jupyter)
     args, _ = p.parse_known_args()
     return args
@@ -451,7 +928,17 @@ def parse_args():
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.calibrate:
+        run_calibration(args.tickers, nh=sys.modules[__name__])
+        sys.exit(0)
+    args.backend = pick_backend(args.backend, args.profile_backend)
     try:
-        run(args.tickers, args.backend, args.days, args.plot, args.lookahead)
+        run(args.tickers, args.backend, args.days, args.plot, args.lookahead,
+            mention_radius=args.mention_window, backtest=args.backtest,
+            roll_window=args.roll_window, ewm_halflife=args.ewm_halflife,
+            lang_backends=args.lang_backends, relevance_model=args.relevance_model,
+            relevance_threshold=args.relevance_threshold, chunk_size=args.chunk_size,
+            max_memory_mb=args.max_memory, from_csv=args.from_csv,
+            events_path=args.events, webhook=args.webhook, bar_interval=args.bar_interval)
     except KeyboardInterrupt:
         print("\nInterrupted by user")
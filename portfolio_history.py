@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+portfolio_history.py
+--------------------
+Daily portfolio value, cost basis, P/L and drawdown over a date range,
+computed from the lots in the Portfolio sheet (Ticker, Buy Date, Shares,
+Buy Price) and a local price panel (see price_cache.py).
+
+Everything is one (dates x lots) matrix operation: a lot counts from its
+Buy Date onwards, valued at that day's close.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+HISTORY_COLUMNS = ["Date", "Value", "Cost Basis", "P/L Abs", "P/L %", "Drawdown"]
+
+
+def compute_history(
+    lots: pd.DataFrame,
+    prices: pd.DataFrame,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    """
+    lots:   one row per lot (Ticker, Buy Date, Shares, Buy Price)
+    prices: index=date, columns=ticker, forward-filled closes
+
+    Drawdown is measured on a contribution-neutral index: a lot entering the
+    portfolio adds its market value that day to the base instead of counting
+    as a gain, so only price moves create drawdowns. A lot only counts (in
+    value and cost basis alike) on days its ticker has a close; lots with no
+    price yet are left out and reported instead of being valued at 0.
+    """
+    if lots.empty or prices.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    px = prices.sort_index()
+    if start is not None:
+        px = px.loc[pd.Timestamp(start):]
+    if end is not None:
+        px = px.loc[:pd.Timestamp(end)]
+    if px.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    dates = px.index.to_numpy(dtype="datetime64[ns]")
+    col = px.columns.get_indexer(lots["Ticker"])
+    buy = pd.to_datetime(lots["Buy Date"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    # unknown buy date: assume held for the whole range
+    buy = np.where(np.isnat(buy), dates[0], buy)
+    shares = pd.to_numeric(lots["Shares"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    shares = np.where(col >= 0, shares, 0.0)
+    cost = shares * pd.to_numeric(lots["Buy Price"], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    P = px.to_numpy(dtype=float)
+    lot_px = np.where(col >= 0, P[:, np.clip(col, 0, None)], np.nan)   # (D, lots)
+    held = dates[:, None] >= buy[None, :]                                # (D, lots)
+    unpriced = held & np.isnan(lot_px) & (col >= 0)[None, :]
+    if unpriced.any():
+        missing = sorted(set(lots["Ticker"].to_numpy()[unpriced.any(axis=0)]))
+        print(f"[warn] no close for {missing} on some held days; those lots are left out until priced")
+    held &= ~np.isnan(lot_px)
+
+    lot_val = np.nan_to_num(lot_px) * shares[None, :]                    # (D, lots)
+    entered = held & ~np.vstack([np.zeros((1, held.shape[1]), dtype=bool), held[:-1]])
+
+    value = (lot_val * held).sum(axis=1)
+    basis = held.astype(float) @ cost
+    pl = value - basis
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pl_pct = np.where(basis > 0, pl / basis, np.nan)
+        flows = (lot_val * entered).sum(axis=1)
+        prev = np.concatenate([[0.0], value[:-1]])
+        ret = np.where(prev > 0, (value - flows) / prev - 1.0, 0.0)
+    index = np.cumprod(1.0 + ret)
+    drawdown = index / np.maximum.accumulate(index) - 1.0
+
+    return pd.DataFrame({
+        "Date": px.index,
+        "Value": value,
+        "Cost Basis": basis,
+        "P/L Abs": pl,
+        "P/L %": pl_pct,
+        "Drawdown": drawdown,
+    })
+
+
+def history_start(lots: pd.DataFrame, default_days: int = 365) -> pd.Timestamp:
+    """Earliest Buy Date, or `default_days` ago when none parse."""
+    first = pd.to_datetime(lots["Buy Date"], errors="coerce").min()
+    if pd.isna(first):
+        return pd.Timestamp.today().normalize() - pd.Timedelta(days=default_days)
+    return pd.Timestamp(first).normalize()
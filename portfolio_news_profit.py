@@ -4,8 +4,10 @@ Portfolio -> Prices, P/L%, Avg Sentiment, and per-ticker News sheets
 with dynamic ticker aliases and a TOTAL row.
 
 Key features:
-- Reads first sheet of --input Excel:
+- Reads first sheet of --input Excel (or a CSV / Parquet file):
     Ticker | Buy Price | Buy Date | Shares
+- Optionally aggregates lots per ticker (--aggregate-lots): weighted-average
+  cost basis and total shares in Summary, per-lot detail kept in Portfolio.
 - Gets live price (yfinance), computes:
     * Current Price
     * P/L Abs  (dollars)
@@ -19,6 +21,15 @@ Key features:
         - P/L Abs    -> total $
         - P/L %      -> total % return of the full portfolio
 - Builds one "NEWS - {TICKER}" sheet per ticker.
+- Optional History sheet (--history): daily portfolio value, P/L and
+  drawdown from the lots and a locally cached price history.
+- Optional Valuation sheet (--valuation): DCF fair value per ticker over a
+  discount-rate x growth grid (valuation.py).
+- Optional Weekly sheet (--weekly): week-over-week sentiment, articles, price
+  move and harm label from the persisted daily panel + price cache (weekly.py).
+- Optional watch mode (--watch SECONDS): polls prices only and rewrites the
+  Summary price / P/L / TOTAL cells in place; news reruns every
+  --news-interval seconds.
 - News comes from your news_harm.py. If a ticker has no coverage,
   we can still fall back to AR-local news if enabled.
 - Dynamic aliases:
@@ -28,13 +39,26 @@ Key features:
 """
 
 import argparse
+import glob
 import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import json
 import urllib.parse as urlparse
 
 import pandas as pd
 
+from bar_align import session_dates
+from calibrate import load_profile, pick_backend
+from feed_reader import parse_dates as parse_feed_dates
+from lexicon_sentiment import LexiconBackend
+from relevance import DROP_BELOW, RELEVANCE_MODEL_PATH, filter_market, load_model as load_relevance_model
+from excel_format import AMBER, DATE, GREEN, PCT, RED, USD, write_frame
+from signal_events import EVENTS_PATH, crossing_levels, publish as publish_events
+from task_graph import run_tasks
+
 # ----------------------------
 # Optional imports
 # ----------------------------
@@ -48,29 +72,100 @@ try:
 except Exception:
     feedparser = None
 
+# Rust-based Excel reader; much faster than openpyxl on large inputs
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except Exception:
+    EXCEL_ENGINE = None
+
 try:
-    from news_harm import fetch_feeds, map_articles_to_tickers, score_articles
+    from news_harm import fetch_feeds, map_articles_to_tickers, score_articles, aggregate_daily
+    from news_harm import SIGNAL_THRESHOLD, parse_lang_backends
     NEWS_MODULE_OK = True
 except Exception:
     NEWS_MODULE_OK = False
+    SIGNAL_THRESHOLD = None   # no scoring, so no sentiment to cross levels
+
+try:
+    from signal_panel import (
+        EWM_HALFLIFE, PORTFOLIO_PANEL_PATH, ROLL_WINDOW,
+        latest_features, load_panel, save_panel, update_panel,
+    )
+    PANEL_OK = True
+except Exception:
+    PANEL_OK = False
+    PORTFOLIO_PANEL_PATH, ROLL_WINDOW, EWM_HALFLIFE = "news_bot_output/daily_panel_portfolio.csv", 7, 3.0
+
+try:
+    from price_cache import PRICE_CACHE_PATH, update_price_history
+    from portfolio_history import compute_history, history_start
+    HISTORY_OK = True
+except Exception:
+    HISTORY_OK = False
+    PRICE_CACHE_PATH = "news_bot_output/price_history.csv"
+
+try:
+    from weekly import weekly_rollup
+    WEEKLY_OK = True
+except Exception:
+    WEEKLY_OK = False
+
+try:
+    from valuation import fetch_fundamentals, run_valuation
+    VALUATION_OK = True
+except (Exception, SystemExit):
+    VALUATION_OK = False
 
 try:
     from ticker_aliases import build_aliases as build_dynamic_aliases
+    from ticker_aliases import alias_key, alias_index_path, fold_text, load_alias_index
     ALIAS_BUILDER_OK = True
-except Exception:
+except (Exception, SystemExit):
     ALIAS_BUILDER_OK = False
+    alias_key = lambda s: str(s).lower().strip()
 
 # ----------------------------
 # Constants / defaults
 # ----------------------------
 DEFAULT_HEADERS = ["Ticker", "Buy Price", "Buy Date", "Shares"]
 
+# lower-cased input header -> canonical column
+HEADER_ALIASES = {
+    "ticker": "Ticker", "symbol": "Ticker",
+    "buy price": "Buy Price", "buyprice": "Buy Price", "price": "Buy Price", "entry price": "Buy Price",
+    "buy date": "Buy Date", "date": "Buy Date", "entry date": "Buy Date",
+    "shares": "Shares", "qty": "Shares", "amounts of share": "Shares",
+    "amounts of shares": "Shares", "quantity": "Shares",
+}
+
+# Summary column -> signal_panel feature
+PANEL_SUMMARY_COLS = {
+    "Rolling Sentiment": "roll_sentiment",
+    "Rolling Articles": "roll_articles",
+    "EWM Sentiment": "ewm_sentiment",
+    "EWM Articles": "ewm_articles",
+}
+
 DEFAULT_AR_ALIASES = {
     "YPF": ["YPF", "Yacimientos Petrolíferos Fiscales"],
     "PAM": ["Pampa Energía", "Pampa Energia", "Pampa Holding"],
 }
 
+# machine-specific settings measured by `news_harm.py --calibrate`; {} if none
+TUNING = load_profile()
+
+PRICE_WORKERS = TUNING.get("fetch_workers", 8)
+
 GNEWS_BASE = "https://news.google.com/rss/search"
+GNEWS_PARAMS = {"hl": "es-419", "gl": "AR", "ceid": "AR:es-419"}
+GNEWS_AR_FILTER = " AND (Argentina OR .ar)"
+
+# Batched fallback: several tickers' aliases per query, within URL limits
+GNEWS_MAX_URL_LEN = 2000
+GNEWS_MAX_TERMS = 32
+GNEWS_WORKERS = TUNING.get("fetch_workers", 8)
+GNEWS_BATCH_MAX_ITEMS = 100
 
 
 # ----------------------------
@@ -79,7 +174,10 @@ GNEWS_BASE = "https://news.google.com/rss/search"
 def ensure_template(path: Path) -> None:
     if path.exists():
         return
-    pd.DataFrame(columns=DEFAULT_HEADERS).to_excel(path, sheet_name="Portfolio", index=False)
+    if path.suffix.lower() == ".csv":
+        pd.DataFrame(columns=DEFAULT_HEADERS).to_csv(path, index=False)
+    else:
+        pd.DataFrame(columns=DEFAULT_HEADERS).to_excel(path, sheet_name="Portfolio", index=False)
     print(f"[ok] Created template: {path.name}")
 
 def load_aliases(path: Path) -> dict:
@@ -95,7 +193,7 @@ def dedupe_keep_order(items):
     for it in items:
         if not it:
             continue
-        low = str(it).lower().strip()
+        low = alias_key(it)
         if low and low not in seen:
             seen.add(low)
             out.append(str(it).strip())
@@ -158,198 +256,455 @@ def build_terms_for_ticker(ticker: str, aliases_map: dict) -> list[str]:
                 terms.add(a)
     return [t for t in terms if t]
 
-def fetch_google_news_ar_for_ticker(
-    ticker: str,
+def _gnews_url(terms: list[str]) -> str:
+    query = "(" + " OR ".join(f'"{t}"' for t in terms) + ")" + GNEWS_AR_FILTER
+    return GNEWS_BASE + "?" + urlparse.urlencode({"q": query, **GNEWS_PARAMS}, doseq=True)
+
+def _batch_terms_for_ticker(ticker: str, aliases_map: dict) -> list[str]:
+    # "Argentina" is already in the AND clause; no need to spend URL length on it
+    terms = [t for t in build_terms_for_ticker(ticker, aliases_map) if t != "Argentina"]
+    return dedupe_keep_order(sorted(terms, key=lambda t: (t != ticker, t)))
+
+def pack_gnews_batches(
+    tickers,
+    aliases_map: dict,
+    max_url_len: int = GNEWS_MAX_URL_LEN,
+    max_terms: int = GNEWS_MAX_TERMS,
+) -> list[tuple[list[str], list[str]]]:
+    """
+    Greedily pack tickers into (tickers, terms) batches whose query URL stays
+    under max_url_len and max_terms. A ticker whose own terms don't fit is
+    trimmed to what fits (ticker symbol first).
+    """
+    batches = []
+    cur_tickers, cur_terms = [], []
+    for t in tickers:
+        terms = _batch_terms_for_ticker(t, aliases_map)
+        merged = dedupe_keep_order(cur_terms + terms)
+        if cur_tickers and (len(merged) > max_terms or len(_gnews_url(merged)) > max_url_len):
+            batches.append((cur_tickers, cur_terms))
+            cur_tickers, cur_terms = [], []
+            merged = terms
+        while len(merged) > 1 and (len(merged) > max_terms or len(_gnews_url(merged)) > max_url_len):
+            merged = merged[:-1]
+        cur_tickers.append(t)
+        cur_terms = merged
+    if cur_tickers:
+        batches.append((cur_tickers, cur_terms))
+    return batches
+
+def _fetch_gnews_batch(terms: list[str], max_items: int) -> pd.DataFrame:
+    feed = feedparser.parse(_gnews_url(terms))
+    rows = []
+    for e in feed.entries[:max_items]:
+        src = getattr(e, "source", None)
+        source = (getattr(src, "title", "") or "") if src is not None else ""
+        rows.append({
+            "published": getattr(e, "published", "") or getattr(e, "updated", ""),
+            "title": getattr(e, "title", ""),
+            "summary": "",
+            "link": getattr(e, "link", ""),
+            "source": source or "Google News AR",
+        })
+    df = pd.DataFrame(rows, columns=["published","title","summary","link","source"])
+    # same meaning as news_harm rows: UTC publication time + trading session it counts for
+    df["published"] = parse_feed_dates(df["published"])
+    df.insert(0, "date", session_dates(df["published"]))
+    return df
+
+def _assign_batch_rows(df: pd.DataFrame, batch_tickers: list[str], alias_index) -> pd.DataFrame:
+    """Tag each headline with the batch tickers whose aliases it mentions."""
+    if len(batch_tickers) == 1:
+        return df.assign(ticker=batch_tickers[0])
+    if alias_index is None:
+        return df.iloc[0:0].assign(ticker=pd.Series(dtype="object"))
+    folded = [fold_text(t or "") for t in df["title"]]
+    parts = []
+    for t in batch_tickers:
+        pat = alias_index.pattern(t)
+        hit = [bool(pat.search(f)) for f in folded]
+        if any(hit):
+            parts.append(df[hit].assign(ticker=t))
+    if not parts:
+        return df.iloc[0:0].assign(ticker=pd.Series(dtype="object"))
+    return pd.concat(parts, ignore_index=True)
+
+def fetch_google_news_ar_batched(
+    tickers,
     aliases_map: dict,
     days: int = 7,
-    max_items: int = 50
+    alias_index=None,
+    max_workers: int = GNEWS_WORKERS,
+    max_items: int = GNEWS_BATCH_MAX_ITEMS,
 ) -> pd.DataFrame:
-    if feedparser is None:
-        return pd.DataFrame(columns=["date","ticker","title","summary","link","source"])
-
-    terms = build_terms_for_ticker(ticker, aliases_map)
-    query = "(" + " OR ".join(f'"{t}"' for t in terms) + ") AND (Argentina OR .ar)"
-    params = {
-        "q": query,
-        "hl": "es-419",
-        "gl": "AR",
-        "ceid": "AR:es-419",
-    }
-    url = GNEWS_BASE + "?" + urlparse.urlencode(params, doseq=True)
+    """
+    Google News AR fallback for many tickers: alias terms are packed into a
+    few combined queries, fetched concurrently, and each headline is assigned
+    back to the tickers whose aliases it mentions.
+    """
+    cols = ["date","published","ticker","title","summary","link","source"]
+    tickers = list(tickers)
+    if feedparser is None or not tickers:
+        return pd.DataFrame(columns=cols)
+    if alias_index is None and ALIAS_BUILDER_OK:
+        alias_index = load_alias_index({t: aliases_map.get(t, [t]) for t in tickers})
+
+    batches = pack_gnews_batches(tickers, aliases_map)
+
+    def run(batch):
+        batch_tickers, terms = batch
+        try:
+            return _assign_batch_rows(_fetch_gnews_batch(terms, max_items), batch_tickers, alias_index)
+        except Exception as ex:
+            print(f"[warn] AR news batch failed for {batch_tickers}: {ex}")
+            return None
 
-    try:
-        feed = feedparser.parse(url)
-        rows = []
-        for e in feed.entries[:max_items]:
-            title = getattr(e, "title", "")
-            link  = getattr(e, "link", "")
-            published = getattr(e, "published", "") or getattr(e, "updated", "")
-            source = ""
-            src = getattr(e, "source", None)
-            if src is not None:
-                source = getattr(src, "title", "") or ""
-            rows.append({
-                "date": pd.to_datetime(published, errors="coerce"),
-                "ticker": ticker,
-                "title": title,
-                "summary": "",
-                "link": link,
-                "source": source or "Google News AR",
-            })
-        df = pd.DataFrame(rows)
-        if not df.empty:
-            cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
-            df = df[df["date"] >= cutoff]
-        return df
-    except Exception:
-        return pd.DataFrame(columns=["date","ticker","title","summary","link","source"])
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as ex:
+        frames = [f for f in ex.map(run, batches) if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=cols)
+    df = pd.concat(frames, ignore_index=True)[cols]
+    cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
+    return df[df["date"] >= cutoff]
+
+_LEXICON = None
+
+def keyword_sentiment_batch(titles) -> list:
+    """Bilingual lexicon scores for a batch of titles (compiled once, see lexicon_sentiment)."""
+    global _LEXICON
+    if _LEXICON is None:
+        _LEXICON = LexiconBackend()
+    return [float(s) for s in _LEXICON.score_batch(list(titles))]
 
 def simple_keyword_sentiment(title: str) -> float:
-    t = (title or "").lower()
-    neg = [
-        "denuncia","demanda","fraude","bancarrota","insolvencia","hackeo","ataque","brecha",
-        "cae","baja","recorte","sanción","multa","accidente","explosión","derrame",
-        "despidos","downgrade","investigación",
-    ]
-    pos = [
-        "sube","alza","récord","record","mejora","aumenta","aprobación","adquisición",
-        "fusión","upgrade",
-    ]
-    score = 0
-    for w in neg:
-        if w in t:
-            score -= 2
-    for w in pos:
-        if w in t:
-            score += 1
-    score = max(-1.0, min(1.0, score/5.0))
-    return score
+    return keyword_sentiment_batch([title or ""])[0]
 
-def compute_news_for_tickers(
-    tickers,
-    backend="vader",
-    days=7,
-    aliases_map: dict | None = None,
-    enable_ar=True
-):
-    aliases_map = aliases_map or {}
-    scored_all = pd.DataFrame(columns=["date","ticker","title","summary","link","source","sentiment"])
+NEWS_COLUMNS = ["date","published","ticker","title","summary","link","source","sentiment"]
 
-    # 1. Try news_harm sources
-    if NEWS_MODULE_OK:
+# Stages of compute_news_for_tickers, separate so main can overlap them with
+# the price and alias lookups (see news_task_graph).
+def fetch_news_stage(tickers) -> pd.DataFrame | None:
+    """RSS fetch (network only, needs no aliases)."""
+    if not NEWS_MODULE_OK:
+        return None
+    try:
+        return fetch_feeds(tickers)
+    except Exception:
+        return None
+
+def map_news_stage(news, tickers, mention_radius: int | None = None, alias_index=None,
+                   relevance=None, relevance_threshold: float = DROP_BELOW) -> pd.DataFrame | None:
+    """relevance: loaded relevance.py model; MARKET rows below relevance_threshold are dropped."""
+    if news is None or news.empty:
+        return None
+    try:
+        mapped = map_articles_to_tickers(news, tickers, mention_radius=mention_radius, alias_index=alias_index)
+    except Exception:
+        return None
+    if relevance is not None:
+        mapped, _ = filter_market(mapped, relevance, relevance_threshold)
+    return mapped
+
+def score_news_stage(mapped, backend="vader", lang_backends: dict | None = None) -> pd.DataFrame:
+    scored_all = pd.DataFrame(columns=NEWS_COLUMNS)
+    if mapped is not None and not mapped.empty:
         try:
-            news = fetch_feeds(tickers)
-            if news is not None and not news.empty:
-                mapped = map_articles_to_tickers(news, tickers)
-                if mapped is not None and not mapped.empty:
-                    scored = score_articles(mapped, backend)
-                    if scored is not None and not scored.empty:
-                        scored_all = scored.copy()
+            scored = score_articles(mapped, backend, lang_backends)
+            if scored is not None and not scored.empty:
+                scored_all = scored.copy()
         except Exception:
             pass
 
     # Ensure cols exist
-    for col in ["date","ticker","title","summary","link","source","sentiment"]:
+    for col in NEWS_COLUMNS:
         if col not in scored_all.columns:
             scored_all[col] = pd.Series(dtype="object")
+    return scored_all
 
-    # 2. Argentina fallback for tickers that still have 0 articles
-    if enable_ar:
-        if not scored_all.empty:
-            counts = scored_all.groupby("ticker").size()
-        else:
-            import pandas as _pd
-            counts = _pd.Series(dtype=int)
-
-        need_fallback = [t for t in tickers if counts.get(t, 0) == 0]
-        ar_rows = []
-        for t in need_fallback:
-            df_ar = fetch_google_news_ar_for_ticker(t, aliases_map, days=days)
-            if df_ar is None or df_ar.empty:
-                continue
-
-            if NEWS_MODULE_OK:
-                try:
-                    base_cols = ["date","ticker","title","summary","link","source"]
-                    base = df_ar[base_cols].copy()
-                    base["summary"] = base.get("summary","")
-                    scored_df = score_articles(base, backend)
-                    if "sentiment" not in scored_df.columns:
-                        scored_df["sentiment"] = [
-                            simple_keyword_sentiment(x) for x in scored_df.get("title","")
-                        ]
-                except Exception:
-                    scored_df = df_ar.copy()
-                    scored_df["sentiment"] = [
-                        simple_keyword_sentiment(x) for x in df_ar["title"]
-                    ]
-            else:
-                scored_df = df_ar.copy()
-                scored_df["sentiment"] = [
-                    simple_keyword_sentiment(x) for x in df_ar["title"]
-                ]
+def fetch_ar_stage(tickers, mapped, aliases_map: dict | None = None, days=7, alias_index=None) -> pd.DataFrame | None:
+    """Argentina fallback for tickers the global feeds did not mention."""
+    if mapped is not None and not mapped.empty:
+        counts = mapped.groupby("ticker").size()
+    else:
+        counts = pd.Series(dtype=int)
+    need_fallback = [t for t in tickers if counts.get(t, 0) == 0]
+    return fetch_google_news_ar_batched(need_fallback, aliases_map or {}, days=days, alias_index=alias_index)
 
-            ar_rows.append(scored_df)
+def score_ar_stage(df_ar, backend="vader", lang_backends: dict | None = None) -> pd.DataFrame | None:
+    if df_ar is None or df_ar.empty:
+        return None
+    if NEWS_MODULE_OK:
+        try:
+            base_cols = ["date","published","ticker","title","summary","link","source"]
+            base = df_ar[base_cols].copy()
+            base["summary"] = base.get("summary","")
+            scored_df = score_articles(base, backend, lang_backends)
+            if "sentiment" not in scored_df.columns:
+                scored_df["sentiment"] = keyword_sentiment_batch(scored_df["title"])
+            return scored_df
+        except Exception:
+            pass
+    scored_df = df_ar.copy()
+    scored_df["sentiment"] = keyword_sentiment_batch(df_ar["title"])
+    return scored_df
 
-        if ar_rows:
-            ar_all = pd.concat(ar_rows, ignore_index=True)
-            scored_all = pd.concat([scored_all, ar_all], ignore_index=True)
+def finalize_news(scored_all: pd.DataFrame, ar_scored: pd.DataFrame | None = None, days=7) -> pd.DataFrame:
+    """Append AR rows, keep the last `days` days and the output columns."""
+    if ar_scored is not None and not ar_scored.empty:
+        scored_all = pd.concat([scored_all, ar_scored], ignore_index=True)
 
-    # 3. Filter by time window
+    # Filter by time window
     if not scored_all.empty:
         cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=days)
         scored_all["date"] = pd.to_datetime(scored_all["date"], errors="coerce")
         scored_all = scored_all[scored_all["date"] >= cutoff]
 
-    keep = [c for c in ["date","ticker","title","summary","link","source","sentiment"]
-            if c in scored_all.columns]
-    return scored_all[keep].copy() if keep else pd.DataFrame(
-        columns=["date","ticker","title","summary","link","source","sentiment"]
-    )
+    keep = [c for c in NEWS_COLUMNS + ["uid"] if c in scored_all.columns]
+    return scored_all[keep].copy() if keep else pd.DataFrame(columns=NEWS_COLUMNS)
+
+def compute_news_for_tickers(
+    tickers,
+    backend="vader",
+    days=7,
+    aliases_map: dict | None = None,
+    enable_ar=True,
+    mention_radius: int | None = None,
+    alias_index=None,
+    lang_backends: dict | None = None,
+    relevance=None,
+    relevance_threshold: float = DROP_BELOW
+):
+    # 1. news_harm sources
+    news = fetch_news_stage(tickers)
+    mapped = map_news_stage(news, tickers, mention_radius, alias_index, relevance, relevance_threshold)
+    scored_all = score_news_stage(mapped, backend, lang_backends)
 
-def write_news_sheet(wb, df_scored: pd.DataFrame, ticker: str):
-    from openpyxl.formatting.rule import ColorScaleRule
+    # 2. Argentina fallback for tickers that still have 0 articles
+    ar_scored = None
+    if enable_ar:
+        ar_scored = score_ar_stage(fetch_ar_stage(tickers, mapped, aliases_map, days, alias_index),
+                                   backend, lang_backends)
 
+    # 3. Filter by time window
+    return finalize_news(scored_all, ar_scored, days)
+
+def news_task_graph(tickers, backend="vader", days=7, enable_ar=True, mention_radius: int | None = None,
+                    lang_backends: dict | None = None, relevance=None,
+                    relevance_threshold: float = DROP_BELOW) -> dict:
+    """
+    compute_news_for_tickers as task_graph tasks, ending in "news".
+    Expects an "aliases" task returning (aliases_map, alias_index): the RSS
+    fetch runs alongside it, mapping waits for both, and scoring of the
+    global articles overlaps the AR fallback fetch.
+    """
+    graph = {
+        "feeds":     (lambda: fetch_news_stage(tickers), []),
+        "mapped":    (lambda news, al: map_news_stage(news, tickers, mention_radius, al[1],
+                                                      relevance, relevance_threshold),
+                      ["feeds", "aliases"]),
+        "scored":    (lambda mapped: score_news_stage(mapped, backend, lang_backends), ["mapped"]),
+    }
+    if enable_ar:
+        graph["ar_fetch"] = (lambda mapped, al: fetch_ar_stage(tickers, mapped, al[0], days, al[1]), ["mapped", "aliases"])
+        graph["ar_scored"] = (lambda df_ar: score_ar_stage(df_ar, backend, lang_backends), ["ar_fetch"])
+        graph["news"] = (lambda scored, ar: finalize_news(scored, ar, days), ["scored", "ar_scored"])
+    else:
+        graph["news"] = (lambda scored: finalize_news(scored, None, days), ["scored"])
+    return graph
+
+NEWS_LAYOUT = {
+    "widths": {"A": 18, "B": 12, "C": 22, "D": 80, "E": 45, "F": 12},
+    "rules": [("F", "scale")],
+}
+
+def write_news_sheet(xw, df_scored: pd.DataFrame, ticker: str):
     sheet_name = f"NEWS - {ticker}"
-    if sheet_name in wb.sheetnames:
-        wb.remove(wb[sheet_name])
-    ws = wb.create_sheet(title=sheet_name)
-
-    ws.append([f"News for {ticker}",
-               "(sentiment in [-1,1]; dynamic aliases + AR fallback)"])
-    ws.append([])
-    ws.append(["Date", "Source", "Title", "Link", "Sentiment"])
-
-    df_t = df_scored[df_scored["ticker"] == ticker].copy()
-    if not df_t.empty:
-        df_t = df_t.sort_values("date", ascending=False)
-        for _, r in df_t.iterrows():
-            ws.append([
-                pd.to_datetime(r.get("date","")).strftime("%Y-%m-%d")
-                if pd.notna(r.get("date","")) else "",
-                r.get("source",""),
-                r.get("title",""),
-                r.get("link",""),
-                float(r.get("sentiment", 0.0))
-                if pd.notna(r.get("sentiment", None)) else 0.0
-            ])
+    df_t = df_scored[df_scored["ticker"] == ticker]
+    df_t = df_t.assign(
+        date=pd.to_datetime(df_t["date"], errors="coerce"),
+        published=pd.to_datetime(df_t.get("published"), errors="coerce"),
+    ).sort_values(["date", "published"], ascending=False)
+    rows = pd.DataFrame({
+        "Published (UTC)": df_t["published"].dt.strftime("%Y-%m-%d %H:%M").fillna(""),
+        "Session": df_t["date"].dt.strftime("%Y-%m-%d").fillna(""),
+        "Source": df_t["source"].fillna(""),
+        "Title": df_t["title"].fillna(""),
+        "Link": df_t["link"].fillna(""),
+        "Sentiment": pd.to_numeric(df_t["sentiment"], errors="coerce").fillna(0.0),
+    })
+    write_frame(xw, rows, sheet_name, NEWS_LAYOUT, startrow=2)
+    xw.sheets[sheet_name].write_row(0, 0, [f"News for {ticker}",
+                                           "(sentiment in [-1,1]; Session = trading day the headline counts for; "
+                                           "dynamic aliases + AR fallback)"])
+
+def compute_portfolio_history(
+    df_portfolio: pd.DataFrame,
+    start=None,
+    price_cache: str | None = PRICE_CACHE_PATH,
+    prices: pd.DataFrame | None = None
+) -> pd.DataFrame | None:
+    """
+    Daily Value / Cost Basis / P/L / Drawdown for the lots in df_portfolio.
+    Prices come from the local cache, refreshed in one batched call if stale.
+    """
+    if not HISTORY_OK or df_portfolio.empty:
+        return None
+    start = pd.Timestamp(start) if start else history_start(df_portfolio)
+    if prices is None:
+        tickers = list(dict.fromkeys(df_portfolio["Ticker"].tolist()))
+        prices = update_price_history(tickers, start, path=price_cache)
+    return compute_history(df_portfolio, prices, start=start)
+
+HISTORY_LAYOUT = {
+    "widths": {"A": 12, "B": 14, "C": 14, "D": 14, "E": 10, "F": 10},
+    "formats": {"A": DATE, "B": USD, "C": USD, "D": USD, "E": PCT, "F": PCT},
+    "freeze": (1, 0),
+}
+
+def write_history_sheet(xw, history: pd.DataFrame) -> None:
+    write_frame(xw, history, "History", HISTORY_LAYOUT)
+
+VALUATION_LAYOUT = {
+    "widths": dict(zip("ABCDEFGHIJ", [10, 14, 16, 16, 16, 16, 10, 16, 16, 44])),
+    "formats": {"B": USD, "C": "#,##0", "D": "#,##0", "E": "#,##0", "F": USD, "G": PCT, "H": USD, "I": USD},
+    "rules": [("G", "sign")],
+    "freeze": (1, 0),
+}
+VALUATION_GRID_LAYOUT = {
+    "formats": {"B": PCT, "C": PCT, "D": USD, "E": USD, "F": PCT},
+    "freeze": (1, 0),
+}
+
+def write_valuation_sheets(xw, table: pd.DataFrame, grid: pd.DataFrame) -> None:
+    """'Valuation' (one row per ticker) + 'Valuation Grid'; build_workbook writes them right after Summary."""
+    write_frame(xw, table, "Valuation", VALUATION_LAYOUT)
+    write_frame(xw, grid, "Valuation Grid", VALUATION_GRID_LAYOUT)
+
+def daily_from_scored(df_scored: pd.DataFrame) -> pd.DataFrame:
+    """aggregate_daily over scored news; articles without a uid count by link."""
+    uid = df_scored["uid"] if "uid" in df_scored.columns else pd.Series(pd.NA, index=df_scored.index)
+    return aggregate_daily(df_scored.assign(uid=uid.fillna(df_scored["link"])))
+
+def weekly_price_start() -> pd.Timestamp:
+    # two weeks of closes plus slack for holidays
+    return pd.Timestamp.today().normalize() - pd.Timedelta(days=21)
+
+def compute_weekly(
+    df_scored: pd.DataFrame,
+    tickers,
+    panel_path: str | None,
+    price_cache: str | None = PRICE_CACHE_PATH,
+    prices: pd.DataFrame | None = None
+) -> pd.DataFrame | None:
+    """
+    Weekly rollup from the persisted panel (already updated with today's news
+    by compute_panel_features) and the local price cache; only today's news
+    is used when the panel is disabled.
+    """
+    if not WEEKLY_OK:
+        print("[warn] weekly.py not available; Weekly sheet skipped")
+        return None
+    try:
+        if PANEL_OK and panel_path:
+            panel = load_panel(panel_path)
+        elif NEWS_MODULE_OK and not df_scored.empty:
+            panel = daily_from_scored(df_scored)
+        else:
+            panel = pd.DataFrame(columns=["date", "ticker", "mean_sentiment", "n_articles"])
+        if prices is None and HISTORY_OK:
+            prices = update_price_history(tickers, weekly_price_start(), path=price_cache)
+        return weekly_rollup(panel, prices, tickers)
+    except Exception as ex:
+        print(f"[warn] weekly rollup skipped: {ex}")
+        return None
+
+WEEKLY_LAYOUT = {
+    "widths": dict(zip("ABCDEFGHIJK", [10, 14, 18, 16, 10, 16, 18, 12, 14, 11, 9])),
+    "formats": {"B": "0.000", "C": "0.000", "D": "0.000", "H": USD, "I": PCT},
+    "rules": [("K", {"HIGH": RED, "MEDIUM": AMBER, "LOW": GREEN})],
+    "freeze": (1, 0),
+}
+
+def write_weekly_sheet(xw, weekly: pd.DataFrame) -> None:
+    write_frame(xw, weekly, "Weekly", WEEKLY_LAYOUT)
 
+def compute_panel_features(
+    df_scored: pd.DataFrame,
+    panel_path: str | None,
+    roll_window: int = ROLL_WINDOW,
+    ewm_halflife: float = EWM_HALFLIFE
+) -> pd.DataFrame:
+    """
+    Fold today's scored news into the persisted daily panel and return the
+    latest rolling / EWM values per ticker, named as Summary columns.
+    """
+    features = pd.DataFrame(columns=list(PANEL_SUMMARY_COLS))
+    if not (PANEL_OK and NEWS_MODULE_OK and panel_path):
+        return features
     try:
-        ws.column_dimensions["A"].width = 14
-        ws.column_dimensions["B"].width = 22
-        ws.column_dimensions["C"].width = 80
-        ws.column_dimensions["D"].width = 45
-        ws.column_dimensions["E"].width = 12
-
-        heat = ColorScaleRule(
-            start_type='num', start_value=-1,
-            mid_type='num', mid_value=0,
-            end_type='num', end_value=1,
-            start_color='FFC7CE', mid_color='FFEB84', end_color='C6EFCE'
+        panel = load_panel(panel_path)
+        if not df_scored.empty:
+            panel = update_panel(panel, daily_from_scored(df_scored), window=roll_window, halflife=ewm_halflife)
+            save_panel(panel, panel_path)
+        features = (
+            latest_features(panel, window=roll_window, halflife=ewm_halflife)
+            .rename(columns={v: k for k, v in PANEL_SUMMARY_COLS.items()})
         )
-        ws.conditional_formatting.add("E4:E1048576", heat)
-    except Exception:
-        pass
+    except Exception as ex:
+        print(f"[warn] rolling features skipped: {ex}")
+    return features
+
+def summary_pl(df_portfolio: pd.DataFrame, aggregate: bool = False) -> pd.DataFrame:
+    """Summary rows (lots, or one per ticker) with P/L Abs and P/L % added."""
+    df_sum = aggregate_lots(df_portfolio) if aggregate else df_portfolio.copy()
+
+    # Per-row dollar P/L and % P/L
+    df_sum["P/L Abs"] = (
+        (df_sum["Current Price"] - df_sum["Buy Price"]) * df_sum["Shares"]
+    )
+    df_sum["P/L %"] = (
+        (df_sum["Current Price"] - df_sum["Buy Price"]) / df_sum["Buy Price"]
+    )  # fraction; Excel shows as %
+    return df_sum
+
+def portfolio_totals(df_portfolio: pd.DataFrame, df_sum: pd.DataFrame) -> dict:
+    """Values of the Summary TOTAL row (Ticker .. P/L %)."""
+    total_cost_basis = (df_portfolio["Buy Price"] * df_portfolio["Shares"]).sum(skipna=True)
+    total_current_value = (df_portfolio["Current Price"] * df_portfolio["Shares"]).sum(skipna=True)
+    total_pl_abs = df_sum["P/L Abs"].sum(skipna=True)
+
+    if total_cost_basis and total_cost_basis != 0:
+        total_pl_pct = (total_current_value - total_cost_basis) / total_cost_basis
+    else:
+        total_pl_pct = 0.0
+
+    return {
+        "Ticker": "TOTAL",
+        "Buy Price": total_cost_basis,
+        "Shares": df_portfolio["Shares"].sum(skipna=True),
+        "Current Price": total_current_value,
+        "P/L Abs": total_pl_abs,
+        "P/L %": total_pl_pct,
+    }
+
+SUMMARY_LAYOUT = {
+    "widths": dict(zip("ABCDEFGHIJKL", [12, 12, 14, 10, 14, 12, 10, 14, 17, 15, 14, 13])),
+    "formats": {
+        "B": USD,       # Buy Price (TOTAL: cost basis)
+        "E": USD,       # Current Price / total current value
+        "F": USD,       # P/L Abs / total P/L Abs
+        "G": PCT,       # P/L %
+        "H": "0.00",    # Avg Sentiment
+        "I": "0.00",    # Rolling Sentiment
+        "J": "0",       # Rolling Articles
+        "K": "0.00",    # EWM Sentiment
+        "L": "0.00",    # EWM Articles
+    },
+    "rules": [("G", "sign"), ("H", "scale"), ("I", "scale"), ("K", "scale")],
+    "freeze": (1, 0),
+    "total_row": True,
+}
+PORTFOLIO_LAYOUT = {"freeze": (1, 0)}
 
 def build_workbook(
     df_portfolio: pd.DataFrame,
@@ -357,21 +712,53 @@ def build_workbook(
     tickers,
     news_backend="vader",
     news_days=7,
+    news_lang_backends: dict | None = None,
+    news_relevance=None,
+    news_relevance_threshold: float = DROP_BELOW,
     aliases_map: dict | None = None,
-    enable_ar=True
+    enable_ar=True,
+    mention_radius: int | None = None,
+    alias_index=None,
+    panel_path: str | None = PORTFOLIO_PANEL_PATH,
+    roll_window: int = ROLL_WINDOW,
+    ewm_halflife: float = EWM_HALFLIFE,
+    df_scored: pd.DataFrame | None = None,
+    features: pd.DataFrame | None = None,
+    aggregate: bool = False,
+    history: pd.DataFrame | None = None,
+    valuation: tuple[pd.DataFrame, pd.DataFrame] | None = None,
+    weekly: pd.DataFrame | None = None
 ):
+    """
+    df_scored / features: pass precomputed news and panel features to skip
+    fetching (batch mode computes them once for every portfolio).
+    aggregate: one Summary row per ticker (see aggregate_lots); the Portfolio
+    sheet keeps every lot.
+    history: output of compute_portfolio_history, written to a History sheet.
+    valuation: (per-ticker table, scenario grid) from valuation.run_valuation.
+    weekly: output of compute_weekly, written to a Weekly sheet.
+    news_lang_backends: {language: backend} routing for score_articles.
+    news_relevance: loaded relevance.py model; MARKET rows scoring below
+    news_relevance_threshold are dropped.
+    """
     aliases_map = aliases_map or {}
 
     # ---------------------------------
     # 1) Compute news & avg sentiment
     # ---------------------------------
-    df_scored = compute_news_for_tickers(
-        tickers,
-        backend=news_backend,
-        days=news_days,
-        aliases_map=aliases_map,
-        enable_ar=enable_ar,
-    )
+    if df_scored is None:
+        df_scored = compute_news_for_tickers(
+            tickers,
+            backend=news_backend,
+            days=news_days,
+            aliases_map=aliases_map,
+            enable_ar=enable_ar,
+            mention_radius=mention_radius,
+            alias_index=alias_index,
+            lang_backends=news_lang_backends,
+            relevance=news_relevance,
+            relevance_threshold=news_relevance_threshold,
+        )
 
     # Per-ticker avg sentiment
     if not df_scored.empty and "sentiment" in df_scored.columns:
@@ -384,18 +771,14 @@ def build_workbook(
     else:
         avg_sent = pd.DataFrame(columns=["Avg Sentiment"])
 
+    # Rolling / EWM features from the persisted daily panel
+    if features is None:
+        features = compute_panel_features(df_scored, panel_path, roll_window, ewm_halflife)
+
     # ---------------------------------
     # 2) Build Summary dataframe
     # ---------------------------------
-    df_sum = df_portfolio.copy()
-
-    # Per-row dollar P/L and % P/L
-    df_sum["P/L Abs"] = (
-        (df_sum["Current Price"] - df_sum["Buy Price"]) * df_sum["Shares"]
-    )
-    df_sum["P/L %"] = (
-        (df_sum["Current Price"] - df_sum["Buy Price"]) / df_sum["Buy Price"]
-    )  # fraction; Excel shows as %
+    df_sum = summary_pl(df_portfolio, aggregate)
 
     # Merge avg sentiment
     df_sum = df_sum.merge(
@@ -406,18 +789,10 @@ def build_workbook(
     )
     if "Avg Sentiment" not in df_sum.columns:
         df_sum["Avg Sentiment"] = pd.NA
-
-    # ---- Compute portfolio totals for the TOTAL row ----
-    total_cost_basis = (df_portfolio["Buy Price"] * df_portfolio["Shares"]).sum(skipna=True)
-    total_current_value = (df_portfolio["Current Price"] * df_portfolio["Shares"]).sum(skipna=True)
-    total_pl_abs = df_sum["P/L Abs"].sum(skipna=True)
-
-    if total_cost_basis and total_cost_basis != 0:
-        total_pl_pct = (total_current_value - total_cost_basis) / total_cost_basis
-    else:
-        total_pl_pct = 0.0
-
-    total_shares = df_portfolio["Shares"].sum(skipna=True)
+    df_sum = df_sum.merge(features, left_on="Ticker", right_index=True, how="left")
+    for col in PANEL_SUMMARY_COLS:
+        if col not in df_sum.columns:
+            df_sum[col] = pd.NA
 
     # Arrange columns
     ordered_cols = [
@@ -429,19 +804,16 @@ def build_workbook(
         "P/L Abs",
         "P/L %",
         "Avg Sentiment",
+        *PANEL_SUMMARY_COLS,
     ]
     df_sum = df_sum[ordered_cols]
 
     # Append TOTAL row
     total_row = {
-        "Ticker": "TOTAL",
-        "Buy Price": total_cost_basis,
+        **portfolio_totals(df_portfolio, df_sum),
         "Buy Date": "",
-        "Shares": total_shares,
-        "Current Price": total_current_value,
-        "P/L Abs": total_pl_abs,
-        "P/L %": total_pl_pct,
         "Avg Sentiment": "",
+        **{col: "" for col in PANEL_SUMMARY_COLS},
     }
     df_sum_with_total = pd.concat(
         [df_sum, pd.DataFrame([total_row])],
@@ -451,121 +823,63 @@ def build_workbook(
     # ---------------------------------
     # 3) Write Excel
     # ---------------------------------
-    with pd.ExcelWriter(out_path, engine="openpyxl") as xw:
-        # Original input goes to 'Portfolio'
-        df_in = df_portfolio[["Ticker","Buy Price","Buy Date","Shares"]].copy()
-        df_in.to_excel(xw, sheet_name="Portfolio", index=False)
-
+    # xlsxwriter keeps sheets in creation order: Summary, Valuation, Portfolio, ...
+    with pd.ExcelWriter(out_path, engine="xlsxwriter",
+                        date_format=DATE, datetime_format=DATE) as xw:
         # Summary (incl TOTAL row)
-        df_sum_with_total.to_excel(xw, sheet_name="Summary", index=False)
+        write_frame(xw, df_sum_with_total, "Summary", SUMMARY_LAYOUT)
 
-        wb = xw.book
-        ws = wb["Summary"]
+        if valuation is not None:
+            write_valuation_sheets(xw, *valuation)
 
-        # Get the last row (TOTAL row in the sheet)
-        last_row = ws.max_row
+        # Original input goes to 'Portfolio'
+        df_in = df_portfolio[["Ticker","Buy Price","Buy Date","Shares"]]
+        write_frame(xw, df_in, "Portfolio", PORTFOLIO_LAYOUT)
 
-        # Style columns, conditional formatting, bold TOTAL row
-        try:
-            from openpyxl.styles import numbers, PatternFill, Font
-            from openpyxl.formatting.rule import FormulaRule, ColorScaleRule
-
-            # set column widths
-            widths = [12,12,14,10,14,12,10,14]
-            for i, w in enumerate(widths, start=1):
-                ws.column_dimensions[chr(64+i)].width = w
-
-            # number formats for each row including TOTAL
-            for row in range(2, ws.max_row + 1):
-                ws[f"E{row}"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE  # Current Price / total current value
-                ws[f"F{row}"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE  # P/L Abs / total P/L Abs
-                ws[f"G{row}"].number_format = numbers.FORMAT_PERCENTAGE_00        # P/L %
-                ws[f"H{row}"].number_format = "0.00"                              # Avg Sentiment
-
-            # Make TOTAL row bold
-            for col_letter in "ABCDEFGH":
-                ws[f"{col_letter}{last_row}"].font = Font(bold=True)
-
-            # Also make Buy Price total (column B TOTAL row) show as currency
-            ws[f"B{last_row}"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
-
-            # Conditional formatting for P/L % column (G)
-            green = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-            red   = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-            ws.conditional_formatting.add(
-                "G2:G1048576",
-                FormulaRule(formula=["G2>0"], fill=green)
-            )
-            ws.conditional_formatting.add(
-                "G2:G1048576",
-                FormulaRule(formula=["G2<0"], fill=red)
-            )
-
-            # Heatmap for Avg Sentiment (H)
-            cscale = ColorScaleRule(
-                start_type='num', start_value=-1,
-                mid_type='num', mid_value=0,
-                end_type='num', end_value=1,
-                start_color='FFC7CE', mid_color='FFEB84', end_color='C6EFCE'
-            )
-            ws.conditional_formatting.add("H2:H1048576", cscale)
-
-            # Move Summary first and freeze panes
-            wb.move_sheet(wb["Summary"], offset=-wb.index(wb["Summary"]))
-            wb["Portfolio"].freeze_panes = "A2"
-            wb["Summary"].freeze_panes   = "A2"
-        except Exception:
-            pass
+        if weekly is not None:
+            write_weekly_sheet(xw, weekly)
+
+        if history is not None and not history.empty:
+            write_history_sheet(xw, history)
 
         # Per-ticker news sheets
         for t in tickers:
-            write_news_sheet(wb, df_scored, t)
-
-        xw._save()
+            write_news_sheet(xw, df_scored, t)
 
 # ----------------------------
-# Main CLI
+# Pipeline stages (shared by single and batch mode)
 # ----------------------------
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--input", type=str, default="portfolio_input.xlsx", help="Path to input Excel")
-    ap.add_argument("--output", type=str, default="portfolio_output.xlsx", help="Path to save output Excel")
-    ap.add_argument("--news-backend", type=str, default="vader", choices=["vader","finbert"],
-                    help="Sentiment backend used by news_harm.py")
-    ap.add_argument("--news-days", type=int, default=7, help="Lookback window for news")
-    ap.add_argument("--aliases", type=str, default="aliases.json",
-                    help="Optional ticker/company aliases JSON for custom terms")
-    ap.add_argument("--ar-news", type=int, default=1,
-                    help="Enable AR fallback via Google News (1=yes, 0=no)")
-    args = ap.parse_args()
-
-    in_path  = Path(args.input).expanduser().resolve()
-    out_path = Path(args.output).expanduser().resolve()
-    aliases_path = Path(args.aliases).expanduser().resolve()
-    enable_ar = bool(int(args.ar_news))
-
-    ensure_template(in_path)
+# what _read_table (and so read_portfolio) accepts; batch dirs collect the same
+PORTFOLIO_SUFFIXES = (".xlsx", ".xls", ".csv", ".parquet", ".pq")
+
+def _read_table(in_path: Path) -> pd.DataFrame:
+    suffix = in_path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(in_path)
+    if suffix in (".parquet", ".pq"):
+        return pd.read_parquet(in_path)
+    if EXCEL_ENGINE:
+        try:
+            return pd.read_excel(in_path, sheet_name=0, engine=EXCEL_ENGINE)
+        except Exception:
+            pass
+    return pd.read_excel(in_path, sheet_name=0)
 
-    df = pd.read_excel(in_path, sheet_name=0)
+def read_portfolio(in_path: Path) -> pd.DataFrame:
+    df = _read_table(in_path)
 
     # Normalize headers
     rename = {}
     for c in df.columns:
-        cl = str(c).strip().lower()
-        if cl in ["ticker", "symbol"]:
-            rename[c] = "Ticker"
-        elif cl in ["buy price","buyprice","price","entry price"]:
-            rename[c] = "Buy Price"
-        elif cl in ["buy date","date","entry date"]:
-            rename[c] = "Buy Date"
-        elif cl in ["shares","qty","amounts of share","amounts of shares","quantity"]:
-            rename[c] = "Shares"
+        canon = HEADER_ALIASES.get(str(c).strip().lower())
+        if canon and canon not in rename.values():
+            rename[c] = canon
     df = df.rename(columns=rename)
 
     # Required cols
     for col in ["Ticker","Buy Price","Buy Date","Shares"]:
         if col not in df.columns:
-            raise SystemExit(f"Missing required column: {col}")
+            raise SystemExit(f"Missing required column: {col} ({in_path.name})")
 
     # Clean data
     df = df[
@@ -575,21 +889,46 @@ def main():
     df["Ticker"] = df["Ticker"].astype(str).str.upper().str.strip()
     df["Buy Price"] = pd.to_numeric(df["Buy Price"], errors="coerce")
     df["Shares"]    = pd.to_numeric(df["Shares"], errors="coerce").fillna(0).astype(int)
+    return df
+
+def aggregate_lots(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per ticker: total shares, share-weighted average Buy Price,
+    earliest Buy Date. Current Price is carried over when present.
+    """
+    if df.empty:
+        return df.copy()
+    work = pd.DataFrame({
+        "Ticker": df["Ticker"],
+        "Shares": df["Shares"],
+        "_cost": df["Buy Price"] * df["Shares"],
+        "Buy Date": pd.to_datetime(df["Buy Date"], errors="coerce"),
+    })
+    g = work.groupby("Ticker", sort=False)
+    out = g.agg(Shares=("Shares", "sum"), _cost=("_cost", "sum"), **{"Buy Date": ("Buy Date", "min")})
+    out["Buy Price"] = (out["_cost"] / out["Shares"].where(out["Shares"] != 0)).astype(float)
+    out = out.drop(columns="_cost").reset_index()
+    if "Current Price" in df.columns:
+        out["Current Price"] = out["Ticker"].map(df.groupby("Ticker", sort=False)["Current Price"].first())
+    out["Buy Date"] = out["Buy Date"].dt.date
+    return out[[c for c in ["Ticker", "Buy Price", "Buy Date", "Shares", "Current Price"] if c in out.columns]]
+
+def fetch_current_prices(tickers, max_workers: int = PRICE_WORKERS) -> dict:
+    """One lookup per unique ticker, run concurrently."""
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as ex:
+        return dict(zip(tickers, ex.map(get_current_price, tickers)))
 
-    # Current prices
-    prices = []
-    for t in df["Ticker"]:
-        prices.append(get_current_price(t))
-    df["Current Price"] = prices
-
-    # Build alias map
+def build_alias_map(tickers, aliases_path: Path):
+    """Merged alias map (dynamic + aliases.json + AR defaults) and its folded index."""
     user_aliases = load_aliases(aliases_path)
-    unique_tickers = list(dict.fromkeys(df["Ticker"].tolist()))
     if ALIAS_BUILDER_OK:
-        dyn_aliases = build_dynamic_aliases(unique_tickers, extra_aliases=user_aliases)
+        dyn_aliases = build_dynamic_aliases(tickers, extra_aliases=user_aliases)
     else:
         tmp = {}
-        for t in unique_tickers:
+        for t in tickers:
             al = []
             if t in user_aliases:
                 ua = user_aliases[t]
@@ -600,20 +939,377 @@ def main():
             tmp[t] = dedupe_keep_order(al + [t])
         dyn_aliases = tmp
 
-    final_alias_map = merge_alias_sources(unique_tickers, user_aliases, dyn_aliases)
+    final_alias_map = merge_alias_sources(tickers, user_aliases, dyn_aliases)
+    # folded alias index for matching, cached next to the aliases file
+    alias_index = (
+        load_alias_index(final_alias_map, alias_index_path(str(aliases_path)))
+        if ALIAS_BUILDER_OK else None
+    )
+    return final_alias_map, alias_index
+
+def pipeline_graph(tickers, lots: pd.DataFrame, args, aliases_path: Path, enable_ar: bool) -> dict:
+    """
+    Everything main / run_batch fetch or compute before writing, as a
+    task_graph: prices, aliases, RSS, fundamentals and the close cache start
+    together; news mapping waits for aliases; the panel, Weekly rollup and
+    DCF wait only for what they read. Tasks for disabled options return None.
+    """
+    history_start_ts = None
+    if args.history and HISTORY_OK:
+        history_start_ts = pd.Timestamp(args.history_start) if args.history_start else history_start(lots)
+    starts = [s for s in (history_start_ts, weekly_price_start() if args.weekly else None) if s is not None]
+
+    graph = {
+        "prices":  (lambda: fetch_current_prices(tickers), []),
+        "aliases": (lambda: build_alias_map(tickers, aliases_path), []),
+        # one refresh of the local close cache serves History and Weekly
+        "price_history": (
+            lambda: update_price_history(tickers, min(starts), path=args.price_cache)
+            if starts and HISTORY_OK else None,
+            [],
+        ),
+        "features": (
+            lambda news: compute_panel_features(news, args.panel, args.roll_window, args.ewm_halflife),
+            ["news"],
+        ),
+        "weekly": (
+            lambda news, _features, ph: compute_weekly(news, tickers, args.panel, args.price_cache, prices=ph)
+            if args.weekly else None,
+            ["news", "features", "price_history"],
+        ),
+        "fundamentals": (
+            lambda: fetch_fundamentals(tickers) if args.valuation and VALUATION_OK else None,
+            [],
+        ),
+        "valuation": (
+            lambda px, fund: run_valuation(tickers, prices=px, fundamentals=fund) if fund is not None else None,
+            ["prices", "fundamentals"],
+        ),
+    }
+    graph.update(news_task_graph(
+        tickers,
+        backend=args.news_backend,
+        days=args.news_days,
+        enable_ar=enable_ar,
+        mention_radius=args.news_mention_window,
+        lang_backends=args.news_lang_backends,
+        relevance=args.news_relevance,
+        relevance_threshold=args.news_relevance_threshold,
+    ))
+    return graph
+
+def _write_batch_output(job: dict) -> str:
+    # top-level so ProcessPoolExecutor can pickle it
+    build_workbook(**job)
+    return Path(job["out_path"]).name
+
+def find_portfolio_files(spec: str) -> list[Path]:
+    """A directory (every Excel / CSV / Parquet portfolio inside) or a glob pattern."""
+    p = Path(spec).expanduser()
+    if p.is_dir():
+        files = [f for f in p.iterdir() if f.suffix.lower() in PORTFOLIO_SUFFIXES]
+    else:
+        files = [Path(f) for f in glob.glob(str(p))]
+    # skip Excel lock files
+    return sorted(f.resolve() for f in files if not f.name.startswith("~$"))
+
+def run_batch(args, aliases_path: Path, enable_ar: bool) -> None:
+    """
+    Many portfolios, one fetch: prices, aliases, news and sentiment are
+    computed once for the union of tickers, then each workbook is written
+    in its own process.
+    """
+    files = find_portfolio_files(args.batch)
+    if not files:
+        raise SystemExit(f"No portfolio files match: {args.batch}")
+    out_dir = Path(args.output_dir).expanduser().resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    portfolios = {f: read_portfolio(f) for f in files}
+    union = list(dict.fromkeys(t for df in portfolios.values() for t in df["Ticker"]))
+    print(f"[info] batch: {len(files)} portfolios, {len(union)} unique tickers")
+
+    res = run_tasks(pipeline_graph(union, pd.concat(portfolios.values(), ignore_index=True),
+                                   args, aliases_path, enable_ar))
+    prices, df_scored, features = res["prices"], res["news"], res["features"]
+    history_prices, valuation, weekly = res["price_history"], res["valuation"], res["weekly"]
+
+    jobs = []
+    for f, df in portfolios.items():
+        tickers = list(dict.fromkeys(df["Ticker"].tolist()))
+        df = df.copy()
+        df["Current Price"] = df["Ticker"].map(prices)
+        jobs.append(dict(
+            df_portfolio=df,
+            out_path=out_dir / f"{f.stem}_output.xlsx",
+            tickers=tickers,
+            df_scored=df_scored[df_scored["ticker"].isin(tickers)],
+            features=features,
+            panel_path=None,
+            aggregate=args.aggregate_lots,
+            history=(
+                compute_portfolio_history(df, args.history_start, prices=history_prices)
+                if args.history and history_prices is not None else None
+            ),
+            valuation=(
+                tuple(v[v["Ticker"].isin(tickers)].reset_index(drop=True) for v in valuation)
+                if valuation is not None else None
+            ),
+            weekly=(
+                weekly[weekly["Ticker"].isin(tickers)].reset_index(drop=True)
+                if weekly is not None else None
+            ),
+        ))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        for name in ex.map(_write_batch_output, jobs):
+            print(f"[ok] Wrote: {name}")
+
+def build_output(args, df: pd.DataFrame, tickers, out_path: Path, aliases_path: Path, enable_ar: bool) -> dict:
+    """Full run for one portfolio; sets df["Current Price"] and returns the task results."""
+    # Prices, aliases, news fetch/scoring, fundamentals and cached price
+    # history run as one task graph, overlapping wherever they are independent
+    res = run_tasks(pipeline_graph(tickers, df, args, aliases_path, enable_ar))
+    df["Current Price"] = df["Ticker"].map(res["prices"])
 
     # Build workbook (writes Summary, Portfolio, NEWS- sheets)
     build_workbook(
         df_portfolio=df,
         out_path=out_path,
-        tickers=unique_tickers,
-        news_backend=args.news_backend,
-        news_days=args.news_days,
-        aliases_map=final_alias_map,
-        enable_ar=enable_ar,
+        tickers=tickers,
+        df_scored=res["news"],
+        features=res["features"],
+        aggregate=args.aggregate_lots,
+        weekly=res["weekly"],
+        history=(
+            compute_portfolio_history(df, args.history_start, prices=res["price_history"])
+            if args.history and res["price_history"] is not None else None
+        ),
+        valuation=res["valuation"],
     )
+    publish_summary_events(args, df, out_path, res["news"])
+    return res
+
+def summary_snapshot(df_portfolio: pd.DataFrame, df_scored: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Per-ticker P/L % (lots aggregated) + TOTAL, and Avg Sentiment when news is given."""
+    per = summary_pl(df_portfolio, aggregate=True)
+    totals = portfolio_totals(df_portfolio, per)
+    snap = pd.DataFrame({
+        "ticker": per["Ticker"].tolist() + ["TOTAL"],
+        "pl_pct": per["P/L %"].tolist() + [totals["P/L %"]],
+    })
+    if df_scored is not None and not df_scored.empty and "sentiment" in df_scored.columns:
+        snap["sentiment"] = snap["ticker"].map(df_scored.groupby("ticker")["sentiment"].mean())
+    return snap
+
+def publish_summary_events(args, df: pd.DataFrame, out_path: Path, df_scored: pd.DataFrame | None = None) -> None:
+    """P/L moves and sentiment crossings since the last run (see signal_events)."""
+    if not (args.events or args.webhook):
+        return
+    try:
+        levels = crossing_levels(SIGNAL_THRESHOLD) if SIGNAL_THRESHOLD is not None else ()
+        publish_events(summary_snapshot(df, df_scored), f"summary:{out_path.name}", args.events, args.webhook,
+                       levels=levels)
+    except Exception as ex:
+        print(f"[warn] signal events skipped: {ex}")
+
+# ----------------------------
+# Watch mode
+# ----------------------------
+class QuoteCache:
+    """
+    Last good quote per ticker, kept in memory between --watch ticks.
+    A failed poll keeps the previous price instead of blanking the cell.
+    """
+
+    def __init__(self, prices: dict | None = None):
+        self.quotes = {t: p for t, p in (prices or {}).items() if p is not None}
+
+    def update(self, prices: dict) -> bool:
+        """Merge fresh quotes; True if any price changed."""
+        changed = False
+        for t, p in prices.items():
+            if p is not None and self.quotes.get(t) != p:
+                self.quotes[t] = p
+                changed = True
+        return changed
+
+    def refresh(self, tickers) -> bool:
+        return self.update(fetch_current_prices(tickers))
+
+def update_summary_prices(out_path: Path, df_portfolio: pd.DataFrame, aggregate: bool = False) -> bool:
+    """
+    Rewrite only Current Price / P/L Abs / P/L % (columns E:G) of the Summary
+    rows and the TOTAL row in an existing workbook. Returns False (nothing
+    written) if the sheet does not match the portfolio's rows.
+    """
+    from openpyxl import load_workbook
+
+    df_sum = summary_pl(df_portfolio, aggregate)
+    totals = portfolio_totals(df_portfolio, df_sum)
+    wb = load_workbook(out_path)
+    if "Summary" not in wb.sheetnames:
+        return False
+    ws = wb["Summary"]
+    n = len(df_sum)
+    sheet_tickers = [ws.cell(row=r, column=1).value for r in range(2, n + 3)]
+    if sheet_tickers != df_sum["Ticker"].tolist() + ["TOTAL"]:
+        return False
+
+    def cell_value(x):
+        return None if pd.isna(x) else float(x)
+
+    cols = df_sum[["Current Price", "P/L Abs", "P/L %"]].to_numpy(dtype=float)
+    for i, (price, pl_abs, pl_pct) in enumerate(cols, start=2):
+        ws[f"E{i}"] = cell_value(price)
+        ws[f"F{i}"] = cell_value(pl_abs)
+        ws[f"G{i}"] = cell_value(pl_pct)
+    total = n + 2
+    ws[f"E{total}"] = cell_value(totals["Current Price"])
+    ws[f"F{total}"] = cell_value(totals["P/L Abs"])
+    ws[f"G{total}"] = cell_value(totals["P/L %"])
+
+    tmp = out_path.with_name(out_path.stem + ".tmp" + out_path.suffix)
+    wb.save(tmp)
+    os.replace(tmp, out_path)
+    return True
+
+def run_watch(args, df: pd.DataFrame, tickers, out_path: Path, aliases_path: Path,
+              enable_ar: bool, prices: dict, max_ticks: int | None = None) -> None:
+    """
+    Poll prices every args.watch seconds and patch the Summary price / P/L
+    cells; rerun the full pipeline (news included) every args.news_interval.
+    """
+    cache = QuoteCache(prices)
+    next_news = time.monotonic() + args.news_interval
+    print(f"[info] watching {len(tickers)} tickers: prices every {args.watch:g}s, "
+          f"news every {args.news_interval:g}s (Ctrl+C to stop)")
+    ticks = 0
+    try:
+        while max_ticks is None or ticks < max_ticks:
+            time.sleep(args.watch)
+            ticks += 1
+            stamp = pd.Timestamp.now().strftime("%H:%M:%S")
+            if time.monotonic() >= next_news:
+                res = build_output(args, df, tickers, out_path, aliases_path, enable_ar)
+                cache.update(res["prices"])
+                next_news = time.monotonic() + args.news_interval
+                print(f"[ok] {stamp} full refresh (news + prices): {out_path.name}")
+                continue
+            if not cache.refresh(tickers):
+                print(f"[info] {stamp} no price changes")
+                continue
+            df["Current Price"] = df["Ticker"].map(cache.quotes)
+            try:
+                patched = update_summary_prices(out_path, df, args.aggregate_lots)
+            except (PermissionError, OSError) as ex:
+                # e.g. the workbook is open in Excel on Windows; retry next tick
+                print(f"[warn] {stamp} could not update {out_path.name}: {ex}")
+                continue
+            if patched:
+                print(f"[ok] {stamp} prices refreshed: {out_path.name}")
+                publish_summary_events(args, df, out_path)
+            else:
+                print(f"[warn] {stamp} Summary layout changed; rebuilding")
+                build_output(args, df, tickers, out_path, aliases_path, enable_ar)
+    except KeyboardInterrupt:
+        print("[info] watch stopped")
+
+# ----------------------------
+# Main CLI
+# ----------------------------
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", type=str, default="portfolio_input.xlsx", help="Path to input Excel (or .csv / .parquet)")
+    ap.add_argument("--output", type=str, default="portfolio_output.xlsx", help="Path to save output Excel")
+    ap.add_argument("--batch", type=str, default=None,
+                    help="Directory or glob of portfolio workbooks; fetches once and writes one output each")
+    ap.add_argument("--output-dir", type=str, default="portfolio_outputs",
+                    help="Where --batch writes <name>_output.xlsx files")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Processes used to write --batch outputs (default: all cores)")
+    ap.add_argument("--aggregate-lots", action="store_true",
+                    help="One Summary row per ticker (weighted-average cost, total shares)")
+    ap.add_argument("--history", action="store_true",
+                    help="Add a History sheet: daily value, P/L and drawdown from cached prices")
+    ap.add_argument("--history-start", type=str, default=None,
+                    help="First History date (default: earliest Buy Date)")
+    ap.add_argument("--price-cache", type=str, default=PRICE_CACHE_PATH,
+                    help="Local daily close history used by --history")
+    ap.add_argument("--weekly", action="store_true",
+                    help="Add a Weekly sheet from the persisted daily panel and price cache")
+    ap.add_argument("--valuation", action="store_true",
+                    help="Add a Valuation sheet with DCF fair values over a rate x growth grid")
+    ap.add_argument("--news-backend", type=str, default="vader",
+                    choices=["vader","finbert","lexicon"],
+                    help="Sentiment backend used by news_harm.py")
+    ap.add_argument("--news-profile-backend", action="store_true",
+                    help="Use the backend recommended by news_harm.py --calibrate instead of --news-backend")
+    ap.add_argument("--news-lang-backends", type=str, default=None, metavar="LANG=BACKEND,...",
+                    help="Route articles by detected language, e.g. es=lexicon,en=vader "
+                         "(other languages use --news-backend)")
+    ap.add_argument("--news-days", type=int, default=7, help="Lookback window for news")
+    ap.add_argument("--news-relevance-model", nargs="?", const=RELEVANCE_MODEL_PATH, default=None, metavar="PATH",
+                    help="Drop off-topic MARKET articles before scoring (relevance.py model trained on "
+                         f"your feeds; default path {RELEVANCE_MODEL_PATH})")
+    ap.add_argument("--news-relevance-threshold", type=float, default=DROP_BELOW,
+                    help="Drop MARKET articles whose P(relevant) is below this")
+    ap.add_argument("--aliases", type=str, default="aliases.json",
+                    help="Optional ticker/company aliases JSON for custom terms")
+    ap.add_argument("--ar-news", type=int, default=1,
+                    help="Enable AR fallback via Google News (1=yes, 0=no)")
+    ap.add_argument("--news-mention-window", type=int, default=None,
+                    help="Score only the sentences around each ticker mention (+/- N sentences)")
+    ap.add_argument("--panel", type=str, default=PORTFOLIO_PANEL_PATH,
+                    help="Persisted daily sentiment panel for rolling/EWM columns ('' to disable); "
+                         "separate from news_harm.py's panel")
+    ap.add_argument("--roll-window", type=int, default=ROLL_WINDOW,
+                    help="Days in the rolling sentiment / article-count window")
+    ap.add_argument("--ewm-halflife", type=float, default=EWM_HALFLIFE,
+                    help="Half-life (days) of the exponentially weighted columns")
+    ap.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                    help="After the first run, poll prices every SECONDS and refresh the Summary P/L in place")
+    ap.add_argument("--news-interval", type=float, default=900.0,
+                    help="In --watch mode, seconds between full refreshes that also re-fetch news")
+    ap.add_argument("--events", type=str, default=EVENTS_PATH, metavar="PATH",
+                    help="Append P/L moves / sentiment crossings since the last run as JSON lines ('' to disable)")
+    ap.add_argument("--webhook", type=str, default=None, metavar="URL",
+                    help="Also POST those events as a JSON array to this URL")
+    args = ap.parse_args()
+    if args.news_lang_backends:
+        if NEWS_MODULE_OK:
+            try:
+                args.news_lang_backends = parse_lang_backends(args.news_lang_backends)
+            except argparse.ArgumentTypeError as e:
+                ap.error(str(e))
+        else:
+            print("[warn] --news-lang-backends needs news_harm.py; ignoring")
+            args.news_lang_backends = None
+    args.news_backend = pick_backend(args.news_backend, args.news_profile_backend, "--news-profile-backend")
+    # loaded once per run (watch mode reuses it for every news refresh)
+    args.news_relevance = load_relevance_model(args.news_relevance_model) if args.news_relevance_model else None
+
+    in_path  = Path(args.input).expanduser().resolve()
+    out_path = Path(args.output).expanduser().resolve()
+    aliases_path = Path(args.aliases).expanduser().resolve()
+    enable_ar = bool(int(args.ar_news))
 
+    if args.batch:
+        if args.watch:
+            print("[warn] --watch is ignored in --batch mode")
+        run_batch(args, aliases_path, enable_ar)
+        return
+
+    ensure_template(in_path)
+
+    df = read_portfolio(in_path)
+    unique_tickers = list(dict.fromkeys(df["Ticker"].tolist()))
+
+    res = build_output(args, df, unique_tickers, out_path, aliases_path, enable_ar)
     print(f"[ok] Wrote: {out_path.name}")
 
+    if args.watch:
+        run_watch(args, df, unique_tickers, out_path, aliases_path, enable_ar, res["prices"])
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+price_cache.py
+--------------
+Local daily close history, stored as one wide CSV (date x ticker).
+
+update_price_history() only downloads what the cache is missing (new tickers,
+tickers whose cached history starts after `start`, or days after the last
+cached close), in one batched
+yfinance call, so daily consumers never loop over dates against the network.
+"""
+
+import os
+import sys
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+# Optional: prices
+try:
+    import yfinance as yf
+    YF_AVAILABLE = True
+except Exception:
+    YF_AVAILABLE = False
+
+
+PRICE_CACHE_PATH = os.path.join("news_bot_output", "price_history.csv")
+
+
+def load_price_history(path: str = PRICE_CACHE_PATH) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df.index.name = "date"
+    return df
+
+
+def save_price_history(prices: pd.DataFrame, path: str = PRICE_CACHE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    prices.sort_index().to_csv(tmp)
+    os.replace(tmp, path)
+
+
+def _download_closes(symbols: List[str], start, end) -> pd.DataFrame:
+    raw = yf.download(symbols, start=str(start), end=str(end),
+                      progress=False, auto_adjust=False)["Close"]
+    if isinstance(raw, pd.Series):
+        raw = raw.to_frame(symbols[0])
+    raw.index = pd.to_datetime(raw.index).tz_localize(None).normalize()
+    return raw.dropna(how="all")
+
+
+def update_price_history(
+    tickers: Sequence[str],
+    start,
+    end=None,
+    path: Optional[str] = PRICE_CACHE_PATH,
+) -> pd.DataFrame:
+    """
+    Daily closes for `tickers` between start and end (default: today),
+    refreshed from yfinance only where the cache falls short.
+    Returns a business-day, forward-filled panel (index=date, columns=ticker).
+    """
+    tickers = list(dict.fromkeys(tickers))
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+    cache = load_price_history(path) if path else pd.DataFrame()
+
+    # today's close may not be in yet, so "up to date" means the previous business day
+    last_bday = pd.Timestamp(end - pd.offsets.BDay(1))
+    # per ticker: a column cached from a shorter window has NaN before its first close
+    late = start + pd.offsets.BDay(5)
+
+    if cache.empty:
+        fetch, fetch_start = tickers, start
+    else:
+        missing = [t for t in tickers if t not in cache.columns or cache[t].last_valid_index() is None]
+        starts_late = [t for t in tickers if t not in missing and cache[t].first_valid_index() > late]
+        behind = [t for t in tickers if t not in missing and t not in starts_late
+                  and cache[t].last_valid_index() < last_bday]
+        fetch = missing + starts_late + behind
+        fetch_start = (start if missing or starts_late
+                       else min([cache[t].last_valid_index() for t in behind] or [start]))
+    if fetch and YF_AVAILABLE:
+        try:
+            fresh = _download_closes(fetch, fetch_start - pd.Timedelta(days=7), end + pd.Timedelta(days=1))
+            cache = fresh.combine_first(cache) if not cache.empty else fresh
+            cache.index.name = "date"
+            if path:
+                save_price_history(cache, path)
+        except Exception as ex:
+            print(f"[warn] price history fetch failed for {fetch}: {ex}", file=sys.stderr)
+
+    if cache.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="date"), columns=tickers, dtype=float)
+    panel = cache.reindex(columns=tickers).sort_index()
+    panel = panel.reindex(pd.bdate_range(min(start, panel.index.min()), end, name="date")).ffill()
+    return panel.loc[start:end]
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+relevance.py
+------------
+Cheap market-relevance filter for the articles map_articles_to_tickers
+keeps under MARKET (no ticker matched). General feeds (Infobae, CNBC Top
+News, ...) are mostly sports, politics and showbiz; dropping the clearly
+off-topic ones before sentiment scoring saves most of the FinBERT time.
+
+Model: hashed bag of words (accent-folded unigrams + bigrams, crc32 into
+N_BUCKETS, binary features) with a logistic regression trained by batch
+gradient descent in NumPy. The artifact is a small JSON file holding the
+bias and the non-zero bucket weights; crc32 keeps bucket ids stable across
+processes and Python versions (unlike hash()).
+
+No model ships with the repo, so the filter stays off until you train one
+on real feed output: SEED_EXAMPLES alone are too few, and text made only of
+words the model never saw scores sigmoid(bias) (~0.45), far above
+DROP_BELOW, so a seed-only model keeps nearly every off-topic article.
+Weak-label your mapped_scored CSVs (SEED_EXAMPLES are appended) and train:
+
+  python relevance.py seed  --mapped news_bot_output/mapped_scored_*.csv --output relevance_seed.csv
+  python relevance.py train --data relevance_seed.csv --output relevance_model.json
+  python relevance.py score --model relevance_model.json "Boca empató con River" "Fed holds rates"
+"""
+
+import argparse
+import glob
+import json
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+N_BUCKETS = 1 << 18
+RELEVANCE_MODEL_PATH = "relevance_model.json"
+DROP_BELOW = 0.2          # drop MARKET articles with P(relevant) below this
+
+# Weak labels for `seed`: MARKET rows hitting only one of these vocabularies
+FINANCE_TERMS = re.compile(
+    r"\b(?:accion\w*|bolsa|merval|mercado\w*|bono\w*|dolar\w*|tasa\w*|inflacion|riesgo pais|"
+    r"banco\w* central|reserva\w*|deuda|inversor\w*|cotiza\w*|ganancia\w*|balance\w*|fmi|"
+    r"stock\w*|shares|market\w*|earnings|revenue|profit\w*|investor\w*|bond\w*|treasur\w*|"
+    r"yield\w*|fed|rates?|inflation|nasdaq|dow|s&p|wall street|ipo|dividend\w*|oil|crude)\b"
+)
+OFFTOPIC_TERMS = re.compile(
+    r"\b(?:futbol|partido|gol\w*|boca|river|seleccion|mundial|torneo|hincha\w*|tenis|"
+    r"actriz|actor|cantante|novela|serie|pelicula|horoscopo|receta\w*|clima|lluvia\w*|"
+    r"temperatura\w*|famos\w*|boda|romance|policial|asesin\w*|crimen|choque|"
+    r"football|soccer|nba|nfl|game|match|season|coach|celebrity|movie|film|album|singer|"
+    r"recipe\w*|weather|horoscope|wedding|dating|murder|shooting)\b"
+)
+
+# (text, label): 1 = market-relevant, 0 = off-topic
+SEED_EXAMPLES: List[Tuple[str, int]] = [
+    ("El Merval sube y los bonos en dólares extienden la racha positiva", 1),
+    ("El riesgo país cae por debajo de los 700 puntos", 1),
+    ("El Banco Central compró reservas y el dólar blue se mantuvo estable", 1),
+    ("La inflación de septiembre fue menor a la esperada según el INDEC", 1),
+    ("El FMI aprobó el desembolso y los mercados reaccionan con subas", 1),
+    ("Las acciones argentinas en Wall Street cerraron con fuertes ganancias", 1),
+    ("El Tesoro colocó deuda en pesos a tasa fija", 1),
+    ("Vaca Muerta: la producción de petróleo alcanza un nuevo récord", 1),
+    ("Suben las tasas de plazo fijo tras la decisión del Central", 1),
+    ("Los inversores esperan la licitación del Tesoro", 1),
+    ("La empresa presentó su balance trimestral con ganancias récord", 1),
+    ("Exportaciones de soja y trigo impulsan el ingreso de divisas", 1),
+    ("Stocks rally as Treasury yields fall after the Fed decision", 1),
+    ("Wall Street closes higher led by tech shares", 1),
+    ("Oil prices jump as OPEC extends supply cuts", 1),
+    ("Inflation cools more than expected, boosting rate cut bets", 1),
+    ("Nasdaq hits record high on strong earnings", 1),
+    ("The dollar weakens against major currencies", 1),
+    ("Bond markets rattled by surprise jobs report", 1),
+    ("Investors brace for central bank meeting next week", 1),
+    ("IPO market heats up with three listings this week", 1),
+    ("Emerging market debt sees record inflows", 1),
+    ("Gold climbs to all-time high as investors seek safety", 1),
+    ("Recession fears weigh on consumer stocks", 1),
+    ("Boca empató con River en un partido caliente en la Bombonera", 0),
+    ("La Selección ganó por tres goles y sigue puntera en las Eliminatorias", 0),
+    ("Pronóstico del clima: lluvias y tormentas para el fin de semana", 0),
+    ("La actriz confirmó su romance con un famoso cantante", 0),
+    ("Horóscopo de hoy: qué le depara el día a cada signo", 0),
+    ("Receta fácil de empanadas caseras para el domingo", 0),
+    ("Detuvieron a un sospechoso por el crimen en el conurbano", 0),
+    ("Choque múltiple en la autopista: hay varios heridos", 0),
+    ("Se estrena la nueva temporada de la serie más vista", 0),
+    ("El tenista argentino avanzó a cuartos de final del torneo", 0),
+    ("Murió un reconocido actor a los 80 años", 0),
+    ("Festival de música: la grilla completa y cómo llegar", 0),
+    ("Lakers beat Celtics in overtime thriller", 0),
+    ("Taylor Swift announces new album and world tour", 0),
+    ("Weather forecast: heat wave expected across the region", 0),
+    ("Police investigate shooting downtown", 0),
+    ("The best recipes for a quick weeknight dinner", 0),
+    ("Celebrity couple confirms wedding plans", 0),
+    ("Movie review: the summer blockbuster falls flat", 0),
+    ("NFL playoffs: everything you need to know about the matchup", 0),
+    ("Soccer star signs with new club after transfer saga", 0),
+    ("Horoscope for today: what the stars have in store", 0),
+    ("Storm knocks out power in coastal towns", 0),
+    ("Singer cancels concert citing health issues", 0),
+]
+
+
+# -----------------------------
+# Features
+# -----------------------------
+def tokens(text: str) -> List[str]:
+    t = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    return re.findall(r"[a-z0-9&]+", t)
+
+
+def feature_ids(text: str, n_buckets: int = N_BUCKETS) -> np.ndarray:
+    """Unique hashed bucket ids of the text's unigrams and bigrams."""
+    words = tokens(text)
+    grams = words + [a + " " + b for a, b in zip(words, words[1:])]
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) % n_buckets for g in grams), dtype=np.int64, count=len(grams)))
+
+
+def featurize(texts: Iterable[str], n_buckets: int = N_BUCKETS) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse binary design matrix as (bucket ids, row index per id)."""
+    ids = [feature_ids(t, n_buckets) for t in texts]
+    rows = np.repeat(np.arange(len(ids)), [len(i) for i in ids])
+    cols = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    return cols, rows
+
+
+# -----------------------------
+# Model
+# -----------------------------
+class RelevanceModel:
+    def __init__(self, weights: np.ndarray, bias: float):
+        self.weights = weights
+        self.bias = float(bias)
+
+    @property
+    def n_buckets(self) -> int:
+        return len(self.weights)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """P(market-relevant) per text."""
+        texts = list(texts)
+        cols, rows = featurize(texts, self.n_buckets)
+        z = self.bias + np.bincount(rows, weights=self.weights[cols], minlength=len(texts))
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def save(self, path: str = RELEVANCE_MODEL_PATH) -> str:
+        nz = np.flatnonzero(self.weights)
+        payload = {
+            "n_buckets": self.n_buckets,
+            "bias": round(self.bias, 6),
+            "weights": {str(int(i)): round(float(self.weights[i]), 6) for i in nz},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        return path
+
+    @classmethod
+    def load(cls, path: str = RELEVANCE_MODEL_PATH) -> "RelevanceModel":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        weights = np.zeros(int(payload["n_buckets"]))
+        for i, w in payload["weights"].items():
+            weights[int(i)] = w
+        return cls(weights, payload["bias"])
+
+
+def train(
+    texts: Sequence[str],
+    labels: Sequence[int],
+    n_buckets: int = N_BUCKETS,
+    epochs: int = 1000,
+    lr: float = 0.5,
+    l2: float = 1e-3,
+) -> RelevanceModel:
+    """Full-batch gradient descent on the L2-regularized logistic loss."""
+    y = np.asarray(labels, dtype=float)
+    cols, rows = featurize(texts, n_buckets)
+    n = len(y)
+    w = np.zeros(n_buckets)
+    b = 0.0
+    for _ in range(epochs):
+        z = b + np.bincount(rows, weights=w[cols], minlength=n)
+        err = 1.0 / (1.0 + np.exp(-z)) - y
+        grad = np.bincount(cols, weights=err[rows], minlength=n_buckets) / n
+        w -= lr * (grad + l2 * w)   # unseen buckets stay exactly 0 (sparse artifact)
+        b -= lr * err.mean()
+    return RelevanceModel(w, b)
+
+
+def seed_examples(mapped: pd.DataFrame) -> pd.DataFrame:
+    """
+    Weak labels from mapped_scored rows: articles matched to a ticker and
+    MARKET articles with finance vocabulary only are relevant (1); MARKET
+    articles with off-topic vocabulary only are not (0). The rest is left
+    out. SEED_EXAMPLES are appended.
+    """
+    d = mapped.drop_duplicates(subset=["uid"] if "uid" in mapped.columns else ["title", "summary"])
+    text = (d["title"].fillna("") + ". " + d["summary"].fillna("")).astype(str)
+    folded = pd.Series([" ".join(tokens(t)) for t in text], index=d.index)
+    fin = folded.str.contains(FINANCE_TERMS)
+    off = folded.str.contains(OFFTOPIC_TERMS)
+    market = d["ticker"].eq("MARKET")
+    label = pd.Series(np.nan, index=d.index)
+    label[~market | (fin & ~off)] = 1
+    label[market & off & ~fin] = 0
+    out = pd.DataFrame({"text": text, "label": label}).dropna()
+    seed = pd.DataFrame(SEED_EXAMPLES, columns=["text", "label"])
+    return pd.concat([out, seed], ignore_index=True).astype({"label": int})
+
+
+# -----------------------------
+# Filter
+# -----------------------------
+def load_model(path: Optional[str] = RELEVANCE_MODEL_PATH) -> Optional[RelevanceModel]:
+    try:
+        return RelevanceModel.load(path)
+    except Exception as e:
+        print(f"[warn] relevance model not loaded ({path}): {e}; filter off "
+              "(train one with `relevance.py seed` + `relevance.py train`)")
+        return None
+
+
+def filter_market(
+    df_mapped: pd.DataFrame,
+    model: RelevanceModel,
+    threshold: float = DROP_BELOW,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Drop MARKET rows whose P(relevant) is below `threshold`. Rows matched
+    to a ticker are never dropped. Returns (kept rows, number dropped).
+    """
+    market = df_mapped["ticker"].eq("MARKET").to_numpy()
+    if not market.any():
+        return df_mapped, 0
+    sub = df_mapped[market]
+    p = model.predict_proba((sub["title"].fillna("") + ". " + sub["summary"].fillna("")).tolist())
+    keep = np.ones(len(df_mapped), dtype=bool)
+    keep[np.flatnonzero(market)[p < threshold]] = False
+    n_dropped = int((~keep).sum())
+    print(f"[info] relevance filter: dropped {n_dropped} of {int(market.sum())} MARKET article(s)")
+    return df_mapped[keep], n_dropped
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Hashed bag-of-words relevance filter for MARKET news")
+    ap.add_argument("command", choices=["seed", "train", "score"])
+    ap.add_argument("texts", nargs="*", help="score: texts to score")
+    ap.add_argument("--mapped", nargs="+", default=None, help="seed: mapped_scored CSVs (globs ok)")
+    ap.add_argument("--data", type=str, default=None, help="train: CSV with text,label (output of `seed`)")
+    ap.add_argument("--model", type=str, default=RELEVANCE_MODEL_PATH, help="score: model JSON")
+    ap.add_argument("--output", type=str, default=None)
+    ap.add_argument("--epochs", type=int, default=1000)
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    if args.command == "seed":
+        paths = [p for pat in (args.mapped or []) for p in sorted(glob.glob(pat))]
+        if not paths:
+            ap.error("seed needs --mapped CSV files")
+        mapped = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        data = seed_examples(mapped)
+        out = args.output or "relevance_seed.csv"
+        data.to_csv(out, index=False)
+        print(f"[ok] {len(data)} labeled rows ({int(data['label'].sum())} relevant) -> {out}")
+    elif args.command == "train":
+        if not args.data:
+            ap.error("train needs --data: labelled feed output from `seed` (the built-in seed alone is too small)")
+        data = pd.read_csv(args.data)
+        model = train(data["text"].fillna("").tolist(), data["label"].tolist(), epochs=args.epochs)
+        p = model.predict_proba(data["text"].fillna("").tolist())
+        acc = float(((p >= 0.5) == data["label"].astype(bool)).mean())
+        out = model.save(args.output or RELEVANCE_MODEL_PATH)
+        print(f"[ok] trained on {len(data)} rows (train accuracy {acc:.1%}) -> {out}")
+    else:
+        model = RelevanceModel.load(args.model)
+        for text, p in zip(args.texts, model.predict_proba(args.texts)):
+            print(f"{p:.3f}\t{text}")
+
+
+if __name__ == "__main__":
+    main()
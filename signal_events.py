@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+signal_events.py
+----------------
+Delta-only alert stream. Each run's per-ticker snapshot (latest daily signal
+and sentiment from news_harm.py, Summary P/L from portfolio_news_profit.py)
+is compared with the state persisted by the previous run, and only the
+changes are appended as JSON lines to an event file (and optionally POSTed
+to a local webhook):
+
+  signal_flip      signal changed (e.g. HOLD -> SELL)
+  sentiment_cross  sentiment moved across one of the crossing levels
+                   (callers pass them, e.g. crossing_levels(threshold) of
+                   the producer's own signal threshold)
+  pl_move          P/L % moved by at least pl_move since the last pl_move
+                   event (or the first observation), so slow drift adds up
+
+Consumers tail the JSONL file instead of diffing workbooks; the cost per run
+is one small JSON state file, whatever the size of the outputs.
+
+Event line:
+  {"ts": "...", "source": "news", "type": "signal_flip", "ticker": "YPF",
+   "date": "2024-05-02", "from": "HOLD", "to": "SELL", "value": -0.21}
+"""
+
+import json
+import os
+import urllib.request
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+EVENTS_PATH = "news_bot_output/signal_events.jsonl"
+PL_MOVE = 0.05                         # 5 percentage points of P/L %
+WEBHOOK_TIMEOUT = 2.0                  # seconds
+
+SNAPSHOT_COLUMNS = ["ticker", "date", "signal", "sentiment", "pl_pct"]
+
+
+def state_path(events_path: str) -> str:
+    """signal_events.jsonl -> signal_events.state.json"""
+    return os.path.splitext(events_path)[0] + ".state.json"
+
+
+def load_state(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path: str, state: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _clean(v):
+    if v is None:
+        return None
+    if isinstance(v, (float, np.floating)):
+        return None if np.isnan(v) else round(float(v), 6)
+    if isinstance(v, np.integer):
+        return int(v)
+    if isinstance(v, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(v).date())
+    return v if isinstance(v, str) else str(v)
+
+
+def crossing_levels(threshold: float) -> Tuple[float, float, float]:
+    """Sentiment levels of a +/- threshold BUY/SELL signal: both thresholds and zero."""
+    return (-threshold, 0.0, threshold)
+
+
+def diff_snapshot(
+    prev: Dict[str, dict],
+    snap: pd.DataFrame,
+    levels: Sequence[float],
+    pl_move: float = PL_MOVE,
+) -> List[dict]:
+    """
+    Events between the previous per-ticker state and a snapshot frame with
+    any of SNAPSHOT_COLUMNS (ticker required). Tickers without a previous
+    value for a field produce no event for that field.
+    """
+    if snap.empty or not prev:
+        return []
+    snap = snap.reindex(columns=SNAPSHOT_COLUMNS)
+    old = pd.DataFrame.from_dict(prev, orient="index").reindex(columns=SNAPSHOT_COLUMNS[1:])
+    m = snap.join(old, on="ticker", rsuffix="_prev")
+    events: List[dict] = []
+
+    def add(mask, kind, extra):
+        for _, r in m[mask].iterrows():
+            events.append({"type": kind, "ticker": r["ticker"], "date": _clean(r["date"]), **extra(r)})
+
+    flip = m["signal"].notna() & m["signal_prev"].notna() & (m["signal"] != m["signal_prev"])
+    add(flip, "signal_flip",
+        lambda r: {"from": r["signal_prev"], "to": r["signal"], "value": _clean(r["sentiment"])})
+
+    lv = np.asarray(sorted(levels), dtype=float)
+    cur = pd.to_numeric(m["sentiment"], errors="coerce").to_numpy(dtype=float)
+    was = pd.to_numeric(m["sentiment_prev"], errors="coerce").to_numpy(dtype=float)
+    cross = ~np.isnan(cur) & ~np.isnan(was) & (np.searchsorted(lv, cur) != np.searchsorted(lv, was))
+    add(cross, "sentiment_cross", lambda r: {
+        "from": _clean(r["sentiment_prev"]),
+        "to": _clean(r["sentiment"]),
+        "levels": [float(x) for x in lv[(lv >= min(r["sentiment"], r["sentiment_prev"]))
+                                         & (lv < max(r["sentiment"], r["sentiment_prev"]))]],
+        "direction": "up" if r["sentiment"] > r["sentiment_prev"] else "down",
+    })
+
+    pl = pd.to_numeric(m["pl_pct"], errors="coerce")
+    pl_prev = pd.to_numeric(m["pl_pct_prev"], errors="coerce")
+    move = ((pl - pl_prev).abs() >= pl_move).to_numpy()
+    add(move, "pl_move", lambda r: {"from": _clean(r["pl_pct_prev"]), "to": _clean(r["pl_pct"])})
+    return events
+
+
+def next_state(prev: Dict[str, dict], snap: pd.DataFrame, events: List[dict]) -> Dict[str, dict]:
+    """
+    Snapshot values overwrite the state where present; P/L % only moves its
+    baseline on the first observation or when a pl_move event fired.
+    """
+    moved = {e["ticker"] for e in events if e["type"] == "pl_move"}
+    state = {t: dict(v) for t, v in prev.items()}
+    snap = snap.reindex(columns=SNAPSHOT_COLUMNS)
+    for rec in snap.to_dict("records"):
+        t = rec["ticker"]
+        cur = state.setdefault(t, {})
+        for col in SNAPSHOT_COLUMNS[1:]:
+            v = _clean(rec[col])
+            if v is None:
+                continue
+            if col == "pl_pct" and cur.get(col) is not None and t not in moved:
+                continue
+            cur[col] = v
+    return state
+
+
+def emit(events: List[dict], path: str = EVENTS_PATH, webhook: Optional[str] = None) -> None:
+    """Append events as JSON lines (one write) and POST them to `webhook`, if set."""
+    if not events:
+        return
+    if path:
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+    if webhook:
+        req = urllib.request.Request(
+            webhook, data=json.dumps(events).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            urllib.request.urlopen(req, timeout=WEBHOOK_TIMEOUT).close()
+        except Exception as ex:
+            print(f"[warn] webhook {webhook} failed: {ex}")
+
+
+def publish(
+    snap: pd.DataFrame,
+    source: str,
+    path: str = EVENTS_PATH,
+    webhook: Optional[str] = None,
+    *,
+    levels: Sequence[float],
+    pl_move: float = PL_MOVE,
+) -> List[dict]:
+    """
+    Diff `snap` against the state stored for `source`, emit the changes and
+    persist the new state. path '' sends to the webhook only (state is then
+    kept next to EVENTS_PATH).
+    """
+    spath = state_path(path or EVENTS_PATH)
+    state = load_state(spath)
+    prev = state.get(source, {})
+    events = diff_snapshot(prev, snap, levels, pl_move)
+    ts = pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds")
+    events = [{"ts": ts, "source": source, **e} for e in events]
+    emit(events, path, webhook)
+    state[source] = next_state(prev, snap, events)
+    d = os.path.dirname(spath)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    save_state(spath, state)
+    if events:
+        print(f"[info] {len(events)} signal event(s) -> {path or webhook}")
+    return events
+
+
+def daily_snapshot(daily: pd.DataFrame) -> pd.DataFrame:
+    """Latest row per ticker of a news_harm daily frame, in snapshot columns."""
+    if daily.empty:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    last = daily.assign(date=pd.to_datetime(daily["date"])).sort_values("date").groupby("ticker").tail(1)
+    return pd.DataFrame({
+        "ticker": last["ticker"],
+        "date": last["date"],
+        "signal": last["signal"],
+        "sentiment": last["mean_sentiment"],
+    })
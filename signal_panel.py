@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+signal_panel.py
+---------------
+Persisted per-ticker daily panel (date, ticker, mean_sentiment, n_articles,
+n_negative) with rolling-window and exponentially weighted features:
+
+  - roll_sentiment : article-weighted mean sentiment over the last `window` calendar days
+  - roll_articles  : number of articles over the last `window` calendar days
+  - ewm_sentiment  : time-decayed sentiment (half-life in days, gaps decay too)
+  - ewm_articles   : time-decayed articles per day (days without news count as 0)
+
+The panel is updated incrementally: rows from a new batch extend the stored
+ones (or replace them when they count at least as many articles), and features are recomputed only from the earliest new date of
+each ticker onwards, seeded from the last stored row before it.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+# one panel per producer: news_harm and the portfolio report map and score
+# differently, so their rows for the same (date, ticker) must not overwrite each other
+PANEL_PATH = os.path.join("news_bot_output", "daily_panel.csv")
+PORTFOLIO_PANEL_PATH = os.path.join("news_bot_output", "daily_panel_portfolio.csv")
+ROLL_WINDOW = 7        # days
+EWM_HALFLIFE = 3.0     # days
+
+BASE_COLUMNS = ["date", "ticker", "mean_sentiment", "n_articles", "n_negative"]
+FEATURE_COLUMNS = ["roll_sentiment", "roll_articles", "ewm_sentiment", "ewm_articles"]
+
+
+# -----------------------------
+# Persistence
+# -----------------------------
+def load_panel(path: str = PANEL_PATH) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=BASE_COLUMNS + FEATURE_COLUMNS)
+    panel = pd.read_csv(path, parse_dates=["date"])
+    for col in BASE_COLUMNS + FEATURE_COLUMNS:
+        if col not in panel.columns:
+            panel[col] = np.nan
+    return panel
+
+
+def save_panel(panel: pd.DataFrame, path: str = PANEL_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    panel.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _normalize_dates(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, utc=True, errors="coerce").dt.tz_localize(None).dt.normalize()
+
+
+# -----------------------------
+# Incremental update
+# -----------------------------
+def _update_ticker(rows: pd.DataFrame, first_new: pd.Timestamp, window: int, halflife: float) -> pd.DataFrame:
+    """
+    rows: every stored + new row of one ticker, sorted by date.
+    Recomputes features for rows dated >= first_new only.
+    """
+    dates = rows["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    n = rows["n_articles"].to_numpy(dtype=float)
+    w = rows["mean_sentiment"].to_numpy(dtype=float) * n
+    cs_n = np.concatenate([[0.0], np.cumsum(n)])
+    cs_w = np.concatenate([[0.0], np.cumsum(w)])
+
+    start = int(np.searchsorted(dates, np.datetime64(first_new, "D").astype(np.int64), side="left"))
+    idx = np.arange(start, len(rows))
+    lo = np.searchsorted(dates, dates[idx] - window, side="right")
+    roll_n = cs_n[idx + 1] - cs_n[lo]
+    roll_w = cs_w[idx + 1] - cs_w[lo]
+
+    # EWM seeded from the last row we are not touching
+    decay_per_day = 0.5 ** (1.0 / halflife)
+    alpha = 1.0 - decay_per_day
+    if start > 0:
+        prev_date = dates[start - 1]
+        ewm_s = rows["ewm_sentiment"].iat[start - 1]
+        ewm_n = rows["ewm_articles"].iat[start - 1]
+    else:
+        prev_date, ewm_s, ewm_n = None, np.nan, 0.0
+    ewm_s_out, ewm_n_out = [], []
+    for i in idx:
+        x_s = rows["mean_sentiment"].iat[i]
+        gap = 1 if prev_date is None else max(int(dates[i] - prev_date), 1)
+        d = decay_per_day ** gap
+        if pd.isna(ewm_s):
+            ewm_s = x_s
+        elif pd.notna(x_s):
+            ewm_s = d * ewm_s + (1.0 - d) * x_s
+        ewm_n = d * (0.0 if pd.isna(ewm_n) else ewm_n) + alpha * n[i]
+        ewm_s_out.append(ewm_s)
+        ewm_n_out.append(ewm_n)
+        prev_date = dates[i]
+
+    rows = rows.copy()
+    pos = rows.columns.get_indexer(FEATURE_COLUMNS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rows.iloc[start:, pos[0]] = np.where(roll_n > 0, roll_w / roll_n, np.nan)
+    rows.iloc[start:, pos[1]] = roll_n
+    rows.iloc[start:, pos[2]] = ewm_s_out
+    rows.iloc[start:, pos[3]] = ewm_n_out
+    return rows
+
+
+def update_panel(
+    panel: pd.DataFrame,
+    daily: pd.DataFrame,
+    window: int = ROLL_WINDOW,
+    halflife: float = EWM_HALFLIFE,
+) -> pd.DataFrame:
+    """
+    Merge a batch of daily aggregates (aggregate_daily output) into the panel.
+    For days present in both, the row with more articles wins (ties go to the
+    new batch): rolling feeds drop old items, so re-fetching an older day
+    usually sees only part of what an earlier run already counted.
+    """
+    if daily is None or daily.empty:
+        return panel
+    new = daily[[c for c in BASE_COLUMNS if c in daily.columns]].copy()
+    new["date"] = _normalize_dates(new["date"])
+    new = new.dropna(subset=["date"]).drop_duplicates(subset=["date", "ticker"], keep="last")
+    for col in FEATURE_COLUMNS:
+        new[col] = np.nan
+
+    panel = panel.copy()
+    if not panel.empty:
+        panel["date"] = _normalize_dates(panel["date"])
+        old_n = panel.set_index(["date", "ticker"])["n_articles"]
+        key_new = pd.MultiIndex.from_frame(new[["date", "ticker"]])
+        thinner = new["n_articles"].to_numpy() < old_n.reindex(key_new).to_numpy()
+        new = new[~thinner]
+        if new.empty:
+            return panel
+        key_old = pd.MultiIndex.from_frame(panel[["date", "ticker"]])
+        key_new = pd.MultiIndex.from_frame(new[["date", "ticker"]])
+        panel = panel[~key_old.isin(key_new)]
+    merged = pd.concat([panel, new], ignore_index=True) if not panel.empty else new
+    merged = merged.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    first_new = new.groupby("ticker")["date"].min()
+    parts = []
+    for tkr, rows in merged.groupby("ticker", sort=False):
+        if tkr in first_new.index:
+            rows = _update_ticker(rows.reset_index(drop=True), first_new[tkr], window, halflife)
+        parts.append(rows)
+    return pd.concat(parts, ignore_index=True)
+
+
+def attach_features(daily: pd.DataFrame, panel: pd.DataFrame) -> pd.DataFrame:
+    """Add FEATURE_COLUMNS from the panel to rows of `daily` (same date/ticker)."""
+    if daily is None or daily.empty or panel.empty:
+        return daily
+    key = _normalize_dates(daily["date"])
+    feats = panel[["date", "ticker"] + FEATURE_COLUMNS].rename(columns={"date": "_key"})
+    out = daily.assign(_key=key.values).merge(feats, on=["_key", "ticker"], how="left")
+    return out.drop(columns="_key")
+
+
+def latest_features(
+    panel: pd.DataFrame,
+    as_of: Optional[pd.Timestamp] = None,
+    window: int = ROLL_WINDOW,
+    halflife: float = EWM_HALFLIFE,
+) -> pd.DataFrame:
+    """
+    Feature values per ticker (index=ticker) as of `as_of` (default: today):
+    the last stored row, with the article EWM decayed over the quiet days
+    since and the rolling window emptied once it has slid past that row.
+    """
+    if panel.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS)
+    as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+    last = panel.sort_values("date").groupby("ticker").tail(1).set_index("ticker")
+    gap = (as_of - last["date"]).dt.days.clip(lower=0)
+    out = last[FEATURE_COLUMNS].copy()
+    out["ewm_articles"] = out["ewm_articles"] * (0.5 ** (gap / halflife))
+    stale = gap >= window
+    out.loc[stale, "roll_sentiment"] = np.nan
+    out.loc[stale, "roll_articles"] = 0.0
+    return out
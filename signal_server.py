@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+signal_server.py
+----------------
+Small read-only HTTP/JSON service over the latest results, so dashboards
+and scripts don't have to open the workbooks with pandas on every read.
+
+On start (and whenever a run publishes new files) it loads
+  - the newest news_bot_output/daily_signals_*.csv   (DailySignals)
+  - the newest news_bot_output/mapped_scored_*.csv   (per-ticker news)
+  - the Summary sheet of portfolio_output.xlsx       (if present)
+into per-ticker indexes: rows pre-converted to JSON-ready dicts, sorted by
+date, with a datetime64 array per ticker for np.searchsorted range lookups.
+A background thread polls file mtimes and swaps in a freshly built index;
+requests in flight keep using the old one.
+
+Endpoints (GET only):
+  /health                         sources and load time
+  /tickers                        tickers with signals or news
+  /signals/latest                 latest DailySignals row per ticker
+  /signals/<TICKER>               ?start=YYYY-MM-DD&end=YYYY-MM-DD
+  /signals/<TICKER>/latest
+  /news/<TICKER>                  ?start=&end=&limit=50 (newest first)
+  /summary                        all Summary rows
+  /summary/<TICKER>
+
+Usage:
+  python signal_server.py --port 8765
+  curl localhost:8765/signals/YPF?start=2024-05-01
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+
+DATA_DIR = "news_bot_output"
+PORTFOLIO_OUTPUT = "portfolio_output.xlsx"
+POLL_SECONDS = 2.0
+NEWS_LIMIT = 50
+
+
+def newest(pattern: str) -> Optional[str]:
+    paths = glob.glob(pattern)
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    """JSON-ready rows: dates as YYYY-MM-DD, NaN as null."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d")
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class TickerIndex:
+    """Rows of one table grouped by ticker, sorted by date, with date arrays for range scans."""
+
+    def __init__(self, df: pd.DataFrame, ticker_col: str = "ticker", date_col: str = "date"):
+        self.rows: Dict[str, List[dict]] = {}
+        self.dates: Dict[str, np.ndarray] = {}
+        if df.empty:
+            return
+        df = df.assign(**{date_col: pd.to_datetime(df[date_col], errors="coerce")})
+        df = df.dropna(subset=[date_col]).sort_values([ticker_col, date_col], kind="stable")
+        for tkr, g in df.groupby(ticker_col, sort=False):
+            self.rows[str(tkr)] = _records(g)
+            self.dates[str(tkr)] = g[date_col].to_numpy(dtype="datetime64[ns]")
+
+    def range(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        rows = self.rows.get(ticker)
+        if rows is None:
+            return []
+        d = self.dates[ticker]
+        lo = np.searchsorted(d, np.datetime64(pd.Timestamp(start)), "left") if start else 0
+        hi = np.searchsorted(d, np.datetime64(pd.Timestamp(end)), "right") if end else len(d)
+        return rows[lo:hi]
+
+    def latest(self, ticker: str) -> Optional[dict]:
+        rows = self.rows.get(ticker)
+        return rows[-1] if rows else None
+
+
+class Snapshot:
+    """Everything one request needs; replaced as a whole on reload."""
+
+    def __init__(self, sources: Dict[str, Optional[str]]):
+        self.sources = sources
+        self.loaded_at = pd.Timestamp.now().isoformat(timespec="seconds")
+        daily = pd.read_csv(sources["signals"]) if sources["signals"] else pd.DataFrame()
+        news = pd.read_csv(sources["news"]) if sources["news"] else pd.DataFrame()
+        self.signals = TickerIndex(daily)
+        keep = [c for c in ("date", "ticker", "title", "link", "source", "sentiment", "lang") if c in news.columns]
+        self.news = TickerIndex(news[keep] if keep else news)
+        self.summary: Dict[str, dict] = {}
+        if sources["summary"]:
+            summary = pd.read_excel(sources["summary"], sheet_name="Summary")
+            self.summary = {str(r["Ticker"]): r for r in _records(summary)}
+
+    def tickers(self) -> List[str]:
+        return sorted(set(self.signals.rows) | set(self.news.rows))
+
+
+def current_sources(data_dir: str, portfolio: Optional[str]) -> Dict[str, Optional[str]]:
+    return {
+        "signals": newest(os.path.join(data_dir, "daily_signals_*.csv")),
+        "news": newest(os.path.join(data_dir, "mapped_scored_*.csv")),
+        "summary": portfolio if portfolio and os.path.exists(portfolio) else None,
+    }
+
+
+def _signature(sources: Dict[str, Optional[str]]) -> Tuple:
+    return tuple((k, p, os.path.getmtime(p) if p and os.path.exists(p) else None) for k, p in sorted(sources.items()))
+
+
+class Store:
+    """Holds the current Snapshot; a daemon thread reloads it when the source files change."""
+
+    def __init__(self, data_dir: str = DATA_DIR, portfolio: Optional[str] = PORTFOLIO_OUTPUT,
+                 poll: float = POLL_SECONDS):
+        self.data_dir, self.portfolio, self.poll = data_dir, portfolio, poll
+        sources = current_sources(data_dir, portfolio)
+        self.signature = _signature(sources)
+        self.snapshot = Snapshot(sources)
+
+    def reload_if_changed(self) -> bool:
+        sources = current_sources(self.data_dir, self.portfolio)
+        sig = _signature(sources)
+        if sig == self.signature:
+            return False
+        try:
+            snap = Snapshot(sources)
+        except Exception as ex:
+            # e.g. a CSV still being written; try again next poll
+            print(f"[warn] reload failed: {ex}")
+            return False
+        self.snapshot, self.signature = snap, sig
+        print(f"[info] reloaded: {sources}")
+        return True
+
+    def start(self) -> None:
+        def loop():
+            while True:
+                time.sleep(self.poll)
+                self.reload_if_changed()
+        threading.Thread(target=loop, daemon=True).start()
+
+
+def route(snap: Snapshot, path: str, query: Dict[str, List[str]]):
+    """(status, payload) for a GET path."""
+    q = {k: v[-1] for k, v in query.items()}
+    parts = [p for p in path.split("/") if p]
+    if parts == ["health"]:
+        return 200, {"loaded_at": snap.loaded_at, "sources": snap.sources}
+    if parts == ["tickers"]:
+        return 200, snap.tickers()
+    if parts == ["summary"]:
+        return 200, list(snap.summary.values())
+    if len(parts) == 2 and parts[0] == "summary":
+        row = snap.summary.get(parts[1].upper())
+        return (200, row) if row else (404, {"error": f"no Summary row for {parts[1]}"})
+    if parts == ["signals", "latest"]:
+        return 200, [snap.signals.latest(t) for t in sorted(snap.signals.rows)]
+    if len(parts) in (2, 3) and parts[0] in ("signals", "news"):
+        index = snap.signals if parts[0] == "signals" else snap.news
+        tkr = parts[1].upper()
+        if tkr not in index.rows:
+            return 404, {"error": f"no {parts[0]} for {tkr}"}
+        if len(parts) == 3:
+            if parts[2] != "latest":
+                return 404, {"error": f"unknown path {path}"}
+            return 200, index.latest(tkr)
+        try:
+            rows = index.range(tkr, q.get("start"), q.get("end"))
+            if parts[0] == "news":
+                rows = rows[::-1][: int(q.get("limit", NEWS_LIMIT))]
+        except ValueError as ex:
+            return 400, {"error": str(ex)}
+        return 200, rows
+    return 404, {"error": f"unknown path {path}"}
+
+
+def make_handler(store: Store):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, payload = route(store.snapshot, url.path, parse_qs(url.query))
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_only(self):
+            self.send_error(405, "read-only service")
+
+        do_POST = do_PUT = do_DELETE = do_PATCH = _read_only
+
+        def log_message(self, fmt, *args):  # keep stdout for reload notices
+            pass
+
+    return Handler
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Read-only JSON API over the latest signals, news and Summary")
+    ap.add_argument("--host", type=str, default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--data-dir", type=str, default=DATA_DIR, help="news_harm.py output directory")
+    ap.add_argument("--portfolio", type=str, default=PORTFOLIO_OUTPUT,
+                    help="portfolio_news_profit.py output workbook ('' to skip)")
+    ap.add_argument("--poll", type=float, default=POLL_SECONDS, help="Seconds between checks for new results")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    store = Store(args.data_dir, args.portfolio or None, args.poll)
+    store.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+    print(f"[ok] serving {len(store.snapshot.tickers())} tickers on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[info] stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
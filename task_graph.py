@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+task_graph.py
+-------------
+Minimal dependency-driven task runner.
+
+A graph is {name: (fn, [dependency names])}. Each task starts in a thread
+pool as soon as all of its dependencies have finished, and is called with
+their results as positional arguments (in the order listed). Independent
+I/O stages (price lookups, metadata, RSS) therefore overlap, and the total
+wall time approaches the longest dependency chain instead of the sum of
+all stages.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+TaskGraph = Dict[str, Tuple[Callable[..., Any], Sequence[str]]]
+
+
+def _check(graph: TaskGraph) -> None:
+    for name, (_, deps) in graph.items():
+        missing = [d for d in deps if d not in graph]
+        if missing:
+            raise ValueError(f"task {name!r} depends on unknown task(s): {missing}")
+    # cycle check (Kahn)
+    indeg = {n: len(deps) for n, (_, deps) in graph.items()}
+    ready = [n for n, k in indeg.items() if k == 0]
+    seen = 0
+    while ready:
+        n = ready.pop()
+        seen += 1
+        for m, (_, deps) in graph.items():
+            if n in deps:
+                indeg[m] -= deps.count(n)
+                if indeg[m] == 0:
+                    ready.append(m)
+    if seen != len(graph):
+        raise ValueError("task graph has a cycle")
+
+
+def run_tasks(graph: TaskGraph, max_workers: Optional[int] = None, verbose: bool = True) -> Dict[str, Any]:
+    """
+    Run every task of `graph` and return {name: result}.
+    The first task that raises stops new submissions; its exception is
+    re-raised once running tasks have finished.
+    """
+    _check(graph)
+    results: Dict[str, Any] = {}
+    pending = dict(graph)
+    running = {}
+    t0 = time.perf_counter()
+
+    def timed(name, fn, args):
+        start = time.perf_counter()
+        out = fn(*args)
+        return out, start - t0, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(graph))) as ex:
+        error = None
+        while pending or running:
+            if error is None:
+                for name in [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]:
+                    fn, deps = pending.pop(name)
+                    running[ex.submit(timed, name, fn, [results[d] for d in deps])] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name], started, took = fut.result()
+                    if verbose:
+                        print(f"[info] {name}: {took:.2f}s (started at +{started:.2f}s)")
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+    if verbose:
+        print(f"[info] pipeline wall time: {time.perf_counter() - t0:.2f}s")
+    return results
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from backtest import lookahead_returns
+
+
+def test_lookahead_counts_trading_bars_not_holidays():
+    # 2024-07-04 is a market holiday: no bar for it
+    days = pd.to_datetime(["2024-07-02", "2024-07-03", "2024-07-05", "2024-07-08"])
+    prices = pd.DataFrame({"AAPL": [100.0, 110.0, 121.0, 133.1]}, index=days)
+    daily = pd.DataFrame({
+        "date": pd.to_datetime(["2024-07-03", "2024-07-04", "2024-07-02"]),
+        "ticker": ["AAPL", "AAPL", "MSFT"],
+    })
+    rets = lookahead_returns(daily, prices, [1, 2])
+    # 07-03 -> next bar is 07-05, not the holiday
+    np.testing.assert_allclose(rets[0], [0.10, 0.21])
+    # news on the holiday enters at 07-05
+    np.testing.assert_allclose(rets[1], [0.10, np.nan])
+    assert np.isnan(rets[2]).all()
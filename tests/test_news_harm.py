@@ -0,0 +1,12 @@
+from news_harm import article_text, sentence_spans
+
+
+def test_article_text_does_not_double_title_punctuation():
+    assert article_text("Apple beats estimates.", "Shares rise") == "Apple beats estimates. Shares rise"
+    assert article_text("Apple beats estimates", "Shares rise") == "Apple beats estimates. Shares rise"
+    assert article_text("Apple beats estimates", "") == "Apple beats estimates"
+
+
+def test_title_stays_its_own_sentence():
+    text = article_text("Is YPF cheap?", "Analysts weigh in.")
+    assert [text[a:b] for a, b in sentence_spans(text)] == ["Is YPF cheap?", "Analysts weigh in."]
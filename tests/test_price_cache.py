@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+import price_cache
+from portfolio_history import compute_history
+
+
+def fake_download(calls):
+    def download(symbols, start, end):
+        calls.append((list(symbols), pd.Timestamp(start)))
+        idx = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({s: np.arange(1.0, len(idx) + 1) for s in symbols}, index=idx)
+    return download
+
+
+def test_ticker_cached_from_short_window_is_backfilled(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(price_cache, "YF_AVAILABLE", True)
+    monkeypatch.setattr(price_cache, "_download_closes", fake_download(calls))
+    path = str(tmp_path / "prices.csv")
+    end = pd.Timestamp("2025-01-02")
+
+    price_cache.update_price_history(["A"], "2024-01-02", end, path)
+    price_cache.update_price_history(["B"], end - pd.Timedelta(days=21), end, path)
+    panel = price_cache.update_price_history(["A", "B"], "2024-01-02", end, path)
+
+    assert calls[-1][0] == ["B"]
+    assert panel["B"].notna().all()
+
+
+def test_unpriced_lot_is_not_valued_at_zero():
+    dates = pd.bdate_range("2024-01-01", periods=4)
+    prices = pd.DataFrame({"A": [10.0] * 4, "B": [np.nan, np.nan, 5.0, 5.0]}, index=dates)
+    lots = pd.DataFrame({"Ticker": ["A", "B"], "Buy Date": [dates[0]] * 2,
+                         "Shares": [1, 2], "Buy Price": [10.0, 5.0]})
+    hist = compute_history(lots, prices)
+    assert list(hist["Cost Basis"]) == [10.0, 10.0, 20.0, 20.0]
+    assert list(hist["P/L Abs"]) == [0.0] * 4
+    assert (hist["Drawdown"] == 0).all()
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from relevance import DROP_BELOW, filter_market, seed_examples, train
+
+# MARKET rows as map_articles_to_tickers leaves them for the general feeds
+SAMPLE = os.path.join(os.path.dirname(__file__), "data", "relevance_feed_sample.csv")
+
+OFF_TOPIC = [
+    "Boca y River igualaron sin goles en un partido caliente",
+    "Alerta por tormentas: el pronóstico del clima para mañana",
+    "NBA: Celtics beat Knicks in game 7",
+    "Weather: heavy rain and storms expected this weekend",
+    "Police arrest suspect in downtown shooting",
+]
+MARKET = [
+    "El Merval cayó y los bonos retrocedieron",
+    "Stocks slip as Treasury yields rise",
+    "El dólar oficial subió y el Banco Central vendió reservas",
+]
+
+
+def trained_model():
+    data = seed_examples(pd.read_csv(SAMPLE))
+    return train(data["text"].tolist(), data["label"].tolist())
+
+
+def test_off_topic_headlines_fall_below_threshold():
+    p = trained_model().predict_proba(OFF_TOPIC + MARKET)
+    assert (p[:len(OFF_TOPIC)] < DROP_BELOW).all(), dict(zip(OFF_TOPIC, np.round(p, 3)))
+    assert (p[len(OFF_TOPIC):] > 0.5).all()
+
+
+def test_filter_market_keeps_ticker_rows():
+    mapped = pd.DataFrame({
+        "ticker": ["MARKET", "MARKET", "YPF"],
+        "title": [OFF_TOPIC[0], MARKET[0], OFF_TOPIC[0]],
+        "summary": ["", "", ""],
+    })
+    kept, n_dropped = filter_market(mapped, trained_model())
+    assert n_dropped == 1
+    assert list(kept["ticker"]) == ["MARKET", "YPF"]
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from signal_panel import update_panel
+
+
+def daily(rows):
+    return pd.DataFrame(rows, columns=["date", "ticker", "mean_sentiment", "n_articles", "n_negative"])
+
+
+def test_partial_refetch_of_older_day_keeps_fuller_row():
+    first = update_panel(pd.DataFrame(), daily([
+        ("2024-05-01", "YPF", -0.20, 4, 2),
+        ("2024-05-02", "YPF", 0.10, 3, 0),
+        ("2024-05-03", "YPF", 0.05, 2, 0),
+    ]))
+    # the feed has rolled: the older days come back with one article each
+    second = update_panel(first, daily([
+        ("2024-05-01", "YPF", 0.30, 1, 0),
+        ("2024-05-02", "YPF", 0.30, 1, 0),
+        ("2024-05-03", "YPF", 0.00, 5, 1),
+    ]))
+    by_day = second.set_index(second["date"].dt.strftime("%Y-%m-%d"))
+    assert by_day.loc["2024-05-01", "n_articles"] == 4
+    assert by_day.loc["2024-05-01", "mean_sentiment"] == -0.20
+    assert by_day.loc["2024-05-02", "n_articles"] == 3
+    assert by_day.loc["2024-05-03", "n_articles"] == 5
+    assert by_day.loc["2024-05-02", "roll_articles"] == first.set_index(
+        first["date"].dt.strftime("%Y-%m-%d")).loc["2024-05-02", "roll_articles"]
+    assert by_day.loc["2024-05-03", "roll_articles"] == 12
+
+
+def test_new_days_extend_panel():
+    first = update_panel(pd.DataFrame(), daily([("2024-05-01", "YPF", 0.1, 2, 0)]))
+    second = update_panel(first, daily([("2024-05-02", "YPF", -0.1, 1, 1)]))
+    assert list(second["n_articles"]) == [2, 1]
+    assert second["roll_articles"].iloc[-1] == 3
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from weekly import weekly_rollup
+
+
+def test_news_rolled_to_next_session_counts_this_week():
+    # as_of is a Friday; Friday-evening news is stored under Monday's session
+    panel = pd.DataFrame({
+        "date": pd.to_datetime(["2024-05-01", "2024-05-06", "2024-05-07", "2024-04-24"]),
+        "ticker": "YPF",
+        "mean_sentiment": [0.1, -0.5, 0.9, 0.2],
+        "n_articles": [2, 2, 9, 3],
+        "n_negative": [0, 2, 0, 0],
+    })
+    row = weekly_rollup(panel, as_of="2024-05-03").iloc[0]
+    assert row["Articles"] == 4
+    assert row["Negative Articles"] == 2
+    assert abs(row["Avg Sentiment"] - (-0.2)) < 1e-9
+    assert abs(row["Prev Avg Sentiment"] - 0.2) < 1e-9
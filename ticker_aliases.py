@@ -17,15 +17,29 @@ Usage examples:
   # 4) Add extra manual aliases
   python tickers_config.py --tickers MSFT AAPL --extra-aliases "MSFT:Azure|Windows;AAPL:iPhone|Mac" --output aliases.json
 
+  # 5) Force a metadata refresh (ignore the on-disk cache)
+  python tickers_config.py --refresh --output aliases.json
+
+Yahoo metadata is fetched concurrently and cached in yf_info_cache.json for
+--cache-ttl-days (default 7), so rebuilding the alias map only hits the
+network for new or expired tickers.
+
 You can then load the JSON in your main bot:
   with open("aliases.json", "r", encoding="utf-8") as f:
       TICKER_ALIASES = json.load(f)
 """
 
 import argparse
+import hashlib
 import json
+import os
 import re
-from typing import Dict, List, Iterable, Optional
+import sys
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Iterable, Optional, Tuple
 
 # yfinance for metadata
 try:
@@ -39,6 +53,57 @@ except Exception as ex:
 # -----------------------------
 DEFAULT_TICKERS: List[str] = ["EXC", "XEL", "AEP", "CEG", "MSFT", "GOOG", "AAPL", "AMZN", "NVDA"]
 
+# On-disk cache of the yfinance .info fields we use
+META_CACHE_PATH = "yf_info_cache.json"
+META_CACHE_TTL_DAYS = 7.0
+META_FIELDS = ("longName", "shortName", "displayName")
+MAX_WORKERS = 8
+
+# Bump when the folding rules change so stale *.index.json files are rebuilt
+ALIAS_INDEX_VERSION = 1
+
+# -----------------------------
+# Accent / case folding
+# -----------------------------
+# every combining mark in the BMP, deleted after NFKD decomposition
+_COMBINING_MARKS = dict.fromkeys(
+    c for c in range(0x10000) if unicodedata.combining(chr(c))
+)
+
+def fold_text(text: str) -> str:
+    """
+    Unicode-normalize, strip accents and casefold:
+      "Yacimientos Petrolíferos" -> "yacimientos petroliferos"
+    """
+    if not text:
+        return ""
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFKD", text).translate(_COMBINING_MARKS).casefold()
+
+@lru_cache(maxsize=1024)
+def _fold_char(ch: str) -> str:
+    return fold_text(ch)
+
+def fold_with_offsets(text: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    fold_text plus a map from folded positions back to `text` positions
+    (None when they coincide, which is the case for ASCII and NFC text).
+    """
+    folded = fold_text(text)
+    if len(folded) == len(text) and (text.isascii() or unicodedata.is_normalized("NFC", text)):
+        return folded, None
+    offsets: List[int] = []
+    for i, ch in enumerate(text):
+        offsets.extend([i] * len(_fold_char(ch)))
+    offsets.append(len(text))
+    return folded, offsets
+
+@lru_cache(maxsize=65536)
+def alias_key(alias: str) -> str:
+    """Dedupe / index key of an alias; cached since alias sets repeat across calls."""
+    return fold_text(str(alias).strip())
+
 # -----------------------------
 # Helpers to generate aliases
 # -----------------------------
@@ -74,7 +139,7 @@ def _dedupe_keep_order(items: Iterable[str]) -> List[str]:
     seen = set()
     out = []
     for it in items:
-        key = it.lower()
+        key = alias_key(it)
         if key not in seen and it:
             seen.add(key)
             out.append(it)
@@ -87,15 +152,85 @@ def _safe_add(aliases: List[str], *candidates: Optional[str]) -> None:
             if c:
                 aliases.append(c)
 
-def _yfin_aliases(ticker: str) -> List[str]:
+# -----------------------------
+# Metadata fetch + cache
+# -----------------------------
+def _load_meta_cache(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_meta_cache(cache: Dict[str, dict], path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def _fetch_info(ticker: str, fields: Iterable[str] = META_FIELDS) -> Optional[dict]:
     """
-    Pull reasonable name variants from yfinance .info metadata.
+    Slim copy of yf.Ticker(ticker).info, or None when the call fails
+    (failures are not cached so the next run retries them).
     """
-    aliases: List[str] = []
     try:
-        info = yf.Ticker(ticker).info
+        info = yf.Ticker(ticker).info or {}
     except Exception:
-        info = {}
+        return None
+    return {k: info.get(k) for k in fields}
+
+def fetch_metadata(
+    tickers: List[str],
+    cache_path: Optional[str] = META_CACHE_PATH,
+    ttl_days: float = META_CACHE_TTL_DAYS,
+    max_workers: int = MAX_WORKERS,
+    refresh: bool = False,
+    fields: Iterable[str] = META_FIELDS,
+) -> Dict[str, dict]:
+    """
+    Metadata for every ticker: fresh cache entries are reused, the rest are
+    fetched concurrently and written back to the cache. Use a separate
+    cache_path per `fields` set.
+    """
+    fields = tuple(fields)
+    cache = _load_meta_cache(cache_path) if cache_path else {}
+    now = time.time()
+    ttl = ttl_days * 86400
+
+    result: Dict[str, dict] = {}
+    stale: List[str] = []
+    for t in dict.fromkeys(tickers):
+        entry = cache.get(t)
+        if not refresh and entry and now - entry.get("fetched_at", 0) < ttl:
+            result[t] = entry.get("info", {})
+        else:
+            stale.append(t)
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as ex:
+            fetched = list(ex.map(lambda t: _fetch_info(t, fields), stale))
+        for t, info in zip(stale, fetched):
+            if info is None:
+                result[t] = {}
+                continue
+            result[t] = info
+            cache[t] = {"fetched_at": now, "info": info}
+        if cache_path:
+            try:
+                _save_meta_cache(cache, cache_path)
+            except Exception as ex:
+                print(f"[warn] could not write metadata cache {cache_path}: {ex}")
+    return result
+
+
+def _yfin_aliases(ticker: str, info: Optional[dict] = None) -> List[str]:
+    """
+    Pull reasonable name variants from yfinance .info metadata
+    (fetched here unless `info` is given).
+    """
+    aliases: List[str] = []
+    if info is None:
+        info = _fetch_info(ticker) or {}
 
     # Primary names
     long_name = info.get("longName") or info.get("shortName") or info.get("displayName")
@@ -118,10 +253,19 @@ def _yfin_aliases(ticker: str) -> List[str]:
     return _dedupe_keep_order(aliases)
 
 
-def build_aliases(tickers: List[str], extra_aliases: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+def build_aliases(
+    tickers: List[str],
+    extra_aliases: Optional[Dict[str, List[str]]] = None,
+    cache_path: Optional[str] = META_CACHE_PATH,
+    ttl_days: float = META_CACHE_TTL_DAYS,
+    max_workers: int = MAX_WORKERS,
+    refresh: bool = False,
+) -> Dict[str, List[str]]:
+    meta = fetch_metadata(tickers, cache_path=cache_path, ttl_days=ttl_days,
+                          max_workers=max_workers, refresh=refresh)
     mapping: Dict[str, List[str]] = {}
     for t in tickers:
-        base = _yfin_aliases(t)
+        base = _yfin_aliases(t, meta.get(t, {}))
         # merge extra aliases
         if extra_aliases and t in extra_aliases:
             base.extend(extra_aliases[t])
@@ -129,6 +273,91 @@ def build_aliases(tickers: List[str], extra_aliases: Optional[Dict[str, List[str
     return mapping
 
 
+# -----------------------------
+# Precomputed alias index
+# -----------------------------
+def alias_fingerprint(aliases_map: Dict[str, List[str]]) -> str:
+    payload = json.dumps(aliases_map, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(f"{ALIAS_INDEX_VERSION}:{payload}".encode("utf-8")).hexdigest()
+
+def alias_index_path(aliases_path: str) -> str:
+    """aliases.json -> aliases.index.json"""
+    return os.path.splitext(str(aliases_path))[0] + ".index.json"
+
+
+class AliasIndex:
+    """
+    Folded alias forms per ticker (longest first, so a match spans the full
+    name) and one lazily compiled regex per ticker. Patterns are meant to run
+    on fold_text(article), i.e. the article is folded once, not per alias.
+    """
+    def __init__(self, folded: Dict[str, List[str]], fingerprint: str = ""):
+        self.folded = folded
+        self.fingerprint = fingerprint
+        self._patterns: Dict[str, re.Pattern] = {}
+
+    @classmethod
+    def build(cls, aliases_map: Dict[str, List[str]]) -> "AliasIndex":
+        folded: Dict[str, List[str]] = {}
+        for t, aliases in aliases_map.items():
+            if isinstance(aliases, str):
+                aliases = [aliases]
+            forms = {alias_key(a) for a in [t, *aliases] if a and str(a).strip()}
+            folded[t] = sorted(forms, key=lambda f: (-len(f), f))
+        return cls(folded, alias_fingerprint(aliases_map))
+
+    def pattern(self, ticker: str) -> re.Pattern:
+        pat = self._patterns.get(ticker)
+        if pat is None:
+            forms = self.folded.get(ticker) or [alias_key(ticker)]
+            # word boundary for names; ticker can appear in parentheses, etc.
+            pat = re.compile(r"\b(" + "|".join(re.escape(f) for f in forms) + r")\b")
+            self._patterns[ticker] = pat
+        return pat
+
+
+# alias sets kept per index file (news_harm and the portfolio script use different ones)
+MAX_INDEXES_PER_FILE = 8
+
+_INDEX_MEMO: Dict[str, AliasIndex] = {}
+
+def load_alias_index(aliases_map: Dict[str, List[str]], path: Optional[str] = None) -> AliasIndex:
+    """
+    Index for this exact alias set: reused from memory or from `path` when an
+    entry with the same fingerprint is stored there, otherwise built once and
+    added to `path`.
+    """
+    fp = alias_fingerprint(aliases_map)
+    if fp in _INDEX_MEMO:
+        return _INDEX_MEMO[fp]
+
+    stored: Dict[str, dict] = {}
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("indexes", {})
+        except Exception:
+            stored = {}
+
+    if fp in stored:
+        index = AliasIndex(stored[fp], fp)
+    else:
+        index = AliasIndex.build(aliases_map)
+        if path:
+            stored[fp] = index.folded
+            keep = dict(list(stored.items())[-MAX_INDEXES_PER_FILE:])
+            try:
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": ALIAS_INDEX_VERSION, "indexes": keep},
+                              f, ensure_ascii=False, indent=2)
+                os.replace(tmp, path)
+            except Exception as ex:
+                print(f"[warn] could not write alias index {path}: {ex}", file=sys.stderr)
+    _INDEX_MEMO[fp] = index
+    return index
+
+
 def parse_extra_aliases(expr: str) -> Dict[str, List[str]]:
     """
     Parse a compact string for extra aliases:
@@ -160,6 +389,11 @@ def main():
     ap.add_argument("--extra-aliases", type=str, default=None,
                     help='Extra aliases string, e.g. "MSFT:Azure|Windows;AAPL:iPhone|Mac"')
     ap.add_argument("--output", type=str, default="aliases.json", help="Output JSON path")
+    ap.add_argument("--cache", type=str, default=META_CACHE_PATH, help="Yahoo metadata cache JSON")
+    ap.add_argument("--cache-ttl-days", type=float, default=META_CACHE_TTL_DAYS,
+                    help="Re-fetch cached metadata older than this many days")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent metadata requests")
+    ap.add_argument("--refresh", action="store_true", help="Ignore the cache and re-fetch everything")
     args, _ = ap.parse_known_args()  # notebook-friendly
 
     # Resolve tickers
@@ -176,7 +410,8 @@ def main():
         tickers = DEFAULT_TICKERS[:]  # copy
 
     extras = parse_extra_aliases(args.extra_aliases) if args.extra_aliases else None
-    mapping = build_aliases(tickers, extras)
+    mapping = build_aliases(tickers, extras, cache_path=args.cache, ttl_days=args.cache_ttl_days,
+                            max_workers=args.workers, refresh=args.refresh)
 
     with open(args.output, "w", encoding="utf-8") as f:
         json.dump(mapping, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+valuation.py
+------------
+Discounted free cash flow (DCF) fair value for a whole portfolio, over a grid
+of discount-rate and growth scenarios.
+
+  - Fundamentals (free cash flow, shares, debt, cash, price) are fetched in
+    bulk through the cached, concurrent yfinance metadata provider in
+    ticker_aliases (fundamentals_cache.json, 7-day TTL).
+  - Every ticker x discount rate x growth scenario is evaluated at once as
+    NumPy array operations: FCF grows at g for `years`, then a Gordon
+    terminal value at `terminal_growth`, all discounted at r.
+  - Cash flows are only divided by shares and compared with the price when
+    both are in the same currency: a foreign filer's ADR (e.g. PAM, YPF:
+    ARS financials, USD price, several ordinary shares per ADR) gets NaN
+    and a Note instead of a fair value mixing the two.
+
+Usage:
+  python valuation.py --tickers MSFT AAPL YPF
+"""
+
+import argparse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ticker_aliases import fetch_metadata
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+FUNDAMENTALS_CACHE_PATH = "fundamentals_cache.json"
+FUNDAMENTALS_TTL_DAYS = 7.0
+FUNDAMENTAL_FIELDS = (
+    "freeCashflow", "sharesOutstanding", "totalDebt", "totalCash",
+    "currentPrice", "regularMarketPrice", "currency", "financialCurrency",
+)
+TEXT_FIELDS = ("currency", "financialCurrency")
+
+DISCOUNT_RATES: List[float] = [0.08, 0.09, 0.10, 0.11, 0.12]
+GROWTH_RATES: List[float] = [0.00, 0.03, 0.05, 0.08, 0.10]
+BASE_DISCOUNT_RATE = 0.10
+BASE_GROWTH = 0.05
+TERMINAL_GROWTH = 0.025
+PROJECTION_YEARS = 5
+
+
+# -----------------------------
+# Fundamentals
+# -----------------------------
+def fetch_fundamentals(
+    tickers: Sequence[str],
+    cache_path: Optional[str] = FUNDAMENTALS_CACHE_PATH,
+    ttl_days: float = FUNDAMENTALS_TTL_DAYS,
+    refresh: bool = False,
+) -> pd.DataFrame:
+    """One row per ticker with the FUNDAMENTAL_FIELDS as float columns (NaN if missing)."""
+    meta = fetch_metadata(list(tickers), cache_path=cache_path, ttl_days=ttl_days,
+                          refresh=refresh, fields=FUNDAMENTAL_FIELDS)
+    # entries cached before a field was added lack it; refetch those
+    outdated = [t for t in tickers if meta.get(t) and not set(FUNDAMENTAL_FIELDS) <= set(meta[t])]
+    if outdated:
+        meta.update(fetch_metadata(outdated, cache_path=cache_path, ttl_days=ttl_days,
+                                   refresh=True, fields=FUNDAMENTAL_FIELDS))
+    df = pd.DataFrame.from_dict({t: meta.get(t, {}) for t in tickers}, orient="index")
+    df = df.reindex(columns=list(FUNDAMENTAL_FIELDS))
+    num = [c for c in FUNDAMENTAL_FIELDS if c not in TEXT_FIELDS]
+    df[num] = df[num].apply(pd.to_numeric, errors="coerce")
+    df.index.name = "Ticker"
+    return df
+
+
+# -----------------------------
+# DCF grid
+# -----------------------------
+def dcf_grid(
+    fcf: np.ndarray,
+    shares: np.ndarray,
+    net_debt: np.ndarray,
+    discount_rates: Sequence[float],
+    growth_rates: Sequence[float],
+    terminal_growth: float = TERMINAL_GROWTH,
+    years: int = PROJECTION_YEARS,
+) -> np.ndarray:
+    """
+    Fair value per share, shape (n_tickers, n_discount_rates, n_growth_rates).
+    NaN where FCF or shares are missing/non-positive or r <= terminal growth.
+    """
+    r = np.asarray(discount_rates, dtype=float)[None, :, None, None]   # (1,R,1,1)
+    g = np.asarray(growth_rates, dtype=float)[None, None, :, None]     # (1,1,G,1)
+    t = np.arange(1, years + 1, dtype=float)[None, None, None, :]      # (1,1,1,H)
+    f = np.asarray(fcf, dtype=float)[:, None, None, None]              # (N,1,1,1)
+
+    growth = (1.0 + g) ** t
+    discount = (1.0 + r) ** t
+    pv_fcf = (f * growth / discount).sum(axis=-1)                      # (N,R,G)
+
+    r3, g3 = r[..., 0], g[..., 0]
+    fcf_last = f[..., 0] * (1.0 + g3) ** years
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tv = np.where(r3 > terminal_growth, fcf_last * (1.0 + terminal_growth) / (r3 - terminal_growth), np.nan)
+        pv_tv = tv / (1.0 + r3) ** years
+        equity = pv_fcf + pv_tv - np.asarray(net_debt, dtype=float)[:, None, None]
+        per_share = equity / np.asarray(shares, dtype=float)[:, None, None]
+    valid = (np.asarray(fcf) > 0) & (np.asarray(shares) > 0)
+    return np.where(valid[:, None, None], per_share, np.nan)
+
+
+def run_valuation(
+    tickers: Sequence[str],
+    prices: Optional[Dict[str, float]] = None,
+    discount_rates: Sequence[float] = DISCOUNT_RATES,
+    growth_rates: Sequence[float] = GROWTH_RATES,
+    terminal_growth: float = TERMINAL_GROWTH,
+    years: int = PROJECTION_YEARS,
+    fundamentals: Optional[pd.DataFrame] = None,
+    cache_path: Optional[str] = FUNDAMENTALS_CACHE_PATH,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns (per-ticker table, full grid).
+    prices: current prices to compare against (default: price in fundamentals).
+    Tickers whose financials and price are in different currencies get NaN
+    fair values and a Note.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    fund = fundamentals if fundamentals is not None else fetch_fundamentals(tickers, cache_path=cache_path)
+    fund = fund.reindex(tickers)
+
+    price = fund["currentPrice"].fillna(fund["regularMarketPrice"])
+    if prices:
+        price = pd.Series(prices, dtype=float).reindex(tickers).fillna(price)
+    net_debt = fund["totalDebt"].fillna(0.0) - fund["totalCash"].fillna(0.0)
+
+    fair = dcf_grid(
+        fund["freeCashflow"].to_numpy(dtype=float),
+        fund["sharesOutstanding"].to_numpy(dtype=float),
+        net_debt.to_numpy(dtype=float),
+        discount_rates, growth_rates, terminal_growth, years,
+    )
+    ccy, fin_ccy = fund["currency"], fund["financialCurrency"]
+    mixed = (ccy.notna() & fin_ccy.notna() & (ccy != fin_ccy)).to_numpy()
+    fair[mixed] = np.nan
+    note = np.where(mixed, "financials in " + fin_ccy.astype(str) + ", price in " + ccy.astype(str)
+                    + ": not comparable (ADR?)", "")
+    px = price.to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        upside = fair / px[:, None, None] - 1.0
+
+    N, R, G = fair.shape
+    ii, rr, gg = np.meshgrid(np.arange(N), np.arange(R), np.arange(G), indexing="ij")
+    grid = pd.DataFrame({
+        "Ticker": np.asarray(tickers, dtype=object)[ii.ravel()],
+        "Discount Rate": np.asarray(discount_rates)[rr.ravel()],
+        "Growth": np.asarray(growth_rates)[gg.ravel()],
+        "Fair Value": fair.ravel(),
+        "Current Price": px[ii.ravel()],
+        "Upside": upside.ravel(),
+    })
+
+    rb = int(np.argmin(np.abs(np.asarray(discount_rates) - BASE_DISCOUNT_RATE)))
+    gb = int(np.argmin(np.abs(np.asarray(growth_rates) - BASE_GROWTH)))
+    flat = fair.reshape(N, -1)
+    table = pd.DataFrame({
+        "Ticker": tickers,
+        "Current Price": px,
+        "Free Cash Flow": fund["freeCashflow"].to_numpy(dtype=float),
+        "Shares Out": fund["sharesOutstanding"].to_numpy(dtype=float),
+        "Net Debt": net_debt.to_numpy(dtype=float),
+        "DCF Fair Value": fair[:, rb, gb],
+        "Upside": upside[:, rb, gb],
+        # fmin/fmax skip NaN scenarios without all-NaN warnings
+        "Fair Value Low": np.fmin.reduce(flat, axis=1) if flat.size else np.nan,
+        "Fair Value High": np.fmax.reduce(flat, axis=1) if flat.size else np.nan,
+        "Note": note,
+    })
+    return table, grid
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Batch DCF valuation over a discount-rate x growth grid")
+    ap.add_argument("--tickers", nargs="+", required=True, help="Tickers to value")
+    ap.add_argument("--discount-rates", nargs="+", type=float, default=DISCOUNT_RATES)
+    ap.add_argument("--growth-rates", nargs="+", type=float, default=GROWTH_RATES)
+    ap.add_argument("--terminal-growth", type=float, default=TERMINAL_GROWTH)
+    ap.add_argument("--years", type=int, default=PROJECTION_YEARS, help="Explicit projection years")
+    ap.add_argument("--output", type=str, default=None, help="Optional CSV path for the full grid")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    tickers = [t.strip().upper() for t in args.tickers if t.strip()]
+    table, grid = run_valuation(tickers, discount_rates=args.discount_rates, growth_rates=args.growth_rates,
+                                terminal_growth=args.terminal_growth, years=args.years)
+    if args.output:
+        grid.to_csv(args.output, index=False)
+        print(f"[ok] Wrote {len(grid)} scenarios to {args.output}")
+    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
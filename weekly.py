@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+weekly.py
+---------
+Weekly Summary (README section 8.2) built from what earlier runs persisted,
+so it never needs a 7+ day news re-fetch:
+
+  - daily sentiment / article counts from the signal panel (signal_panel.py)
+  - daily closes from the local price cache (price_cache.py)
+
+Per ticker: article-weighted sentiment this week vs the week before, article
+and negative-article counts, weekly price return, a move rank and a
+LOW / MEDIUM / HIGH harm label. Both weeks come out of one grouped pass.
+
+Usage:
+  python weekly.py --tickers MSFT AAPL YPF
+"""
+
+import argparse
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from signal_panel import PORTFOLIO_PANEL_PATH, load_panel
+from price_cache import PRICE_CACHE_PATH, load_price_history
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+WEEK_DAYS = 7
+
+# harm label: HIGH if sentiment <= HIGH_SENTIMENT or negatives >= HIGH_NEGATIVES,
+# MEDIUM if sentiment <= MEDIUM_SENTIMENT or negatives >= MEDIUM_NEGATIVES
+HARM_HIGH_SENTIMENT = -0.15
+HARM_HIGH_NEGATIVES = 5
+HARM_MEDIUM_SENTIMENT = -0.05
+HARM_MEDIUM_NEGATIVES = 2
+
+PANEL_COLUMNS = ["date", "ticker", "mean_sentiment", "n_articles", "n_negative"]
+
+WEEKLY_COLUMNS = [
+    "Ticker", "Avg Sentiment", "Prev Avg Sentiment", "Sentiment Shift",
+    "Articles", "Articles Change", "Negative Articles", "Close",
+    "Weekly Return", "Move Rank", "Harm",
+]
+
+
+def harm_label(sentiment: pd.Series, negatives: pd.Series) -> np.ndarray:
+    s = sentiment.to_numpy(dtype=float)
+    n = negatives.fillna(0).to_numpy(dtype=float)
+    return np.select(
+        [(s <= HARM_HIGH_SENTIMENT) | (n >= HARM_HIGH_NEGATIVES),
+         (s <= HARM_MEDIUM_SENTIMENT) | (n >= HARM_MEDIUM_NEGATIVES)],
+        ["HIGH", "MEDIUM"],
+        default="LOW",
+    )
+
+
+def weekly_rollup(
+    panel: pd.DataFrame,
+    prices: Optional[pd.DataFrame] = None,
+    tickers: Optional[Sequence[str]] = None,
+    as_of=None,
+    days: int = WEEK_DAYS,
+) -> pd.DataFrame:
+    """
+    panel:  daily rows (date, ticker, mean_sentiment, n_articles[, n_negative])
+    prices: optional close panel (index=date, columns=ticker)
+    The week is the `days` calendar days ending at `as_of` (default: today);
+    the previous week is the `days` before that. Panel dates are trading
+    sessions (bar_align.session_dates), so news from after the close or the
+    weekend up to as_of sits on the next session; those rows count for this
+    week too.
+    """
+    as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+    if tickers is None:
+        tickers = sorted(panel["ticker"].dropna().unique()) if not panel.empty else []
+    tickers = list(dict.fromkeys(tickers))
+
+    # panels written before n_negative existed get NaN there
+    p = panel.reindex(columns=PANEL_COLUMNS)
+    p = p[p["ticker"].isin(tickers)]
+    dates = pd.to_datetime(p["date"])
+    age = (as_of - dates).dt.days
+    # latest session that news published on as_of can roll to
+    last_session = pd.Timestamp(np.busday_offset((as_of + pd.Timedelta(days=1)).date(), 0, roll="forward"))
+    age = age.mask((age < 0) & (dates <= last_session), 0)
+    in_range = (age >= 0) & (age < 2 * days)
+    p, age = p[in_range], age[in_range]
+
+    n = p["n_articles"].astype(float)
+    frame = pd.DataFrame({
+        "ticker": p["ticker"],
+        "week": age // days,  # 0 = this week, 1 = previous week
+        "n": n,
+        "w": p["mean_sentiment"].astype(float) * n,
+        "neg": p["n_negative"].astype(float),
+    })
+    sums = (
+        frame.groupby(["ticker", "week"])[["n", "w", "neg"]].sum(min_count=1)
+        .unstack("week")
+        .reindex(index=tickers, columns=pd.MultiIndex.from_product([["n", "w", "neg"], [0, 1]]))
+    )
+    n_now, n_prev = sums[("n", 0)].fillna(0.0), sums[("n", 1)].fillna(0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s_now = sums[("w", 0)] / n_now.where(n_now > 0)
+        s_prev = sums[("w", 1)] / n_prev.where(n_prev > 0)
+
+    out = pd.DataFrame({
+        "Ticker": tickers,
+        "Avg Sentiment": s_now.to_numpy(),
+        "Prev Avg Sentiment": s_prev.to_numpy(),
+        "Sentiment Shift": (s_now - s_prev).to_numpy(),
+        "Articles": n_now.to_numpy(),
+        "Articles Change": (n_now - n_prev).to_numpy(),
+        "Negative Articles": sums[("neg", 0)].to_numpy(),
+    })
+
+    close = pd.Series(np.nan, index=tickers)
+    ret = pd.Series(np.nan, index=tickers)
+    if prices is not None and not prices.empty:
+        px = prices.reindex(columns=tickers).sort_index().ffill()
+        now = px.loc[:as_of]
+        prev = px.loc[:as_of - pd.Timedelta(days=days)]
+        if not now.empty:
+            close = now.iloc[-1]
+            if not prev.empty:
+                ret = close / prev.iloc[-1] - 1.0
+    out["Close"] = close.to_numpy(dtype=float)
+    out["Weekly Return"] = ret.to_numpy(dtype=float)
+    out["Move Rank"] = out["Weekly Return"].abs().rank(ascending=False, method="min")
+    out["Harm"] = harm_label(out["Avg Sentiment"], out["Negative Articles"])
+
+    severity = out["Harm"].map({"HIGH": 0, "MEDIUM": 1, "LOW": 2})
+    order = np.lexsort((out["Sentiment Shift"].fillna(0.0).to_numpy(), severity.to_numpy()))
+    return out.iloc[order].reset_index(drop=True)[WEEKLY_COLUMNS]
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Weekly sentiment / price rollup from the persisted daily panel")
+    ap.add_argument("--tickers", nargs="*", default=None, help="Tickers to include (default: all in the panel)")
+    ap.add_argument("--panel", type=str, default=PORTFOLIO_PANEL_PATH,
+                    help="Daily panel to roll up (news_harm.py writes news_bot_output/daily_panel.csv)")
+    ap.add_argument("--price-cache", type=str, default=PRICE_CACHE_PATH)
+    ap.add_argument("--as-of", type=str, default=None, help="Last day of the week (default: today)")
+    ap.add_argument("--output", type=str, default=None, help="Optional CSV path")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    tickers = [t.strip().upper() for t in args.tickers if t.strip()] if args.tickers else None
+    weekly = weekly_rollup(load_panel(args.panel), load_price_history(args.price_cache), tickers, args.as_of)
+    if args.output:
+        weekly.to_csv(args.output, index=False)
+        print(f"[ok] Wrote {len(weekly)} rows to {args.output}")
+    print(weekly.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
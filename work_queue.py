@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+work_queue.py
+-------------
+Sharded news_harm runs over a local SQLite work queue, for ticker universes
+too large for one process.
+
+  init   split the feed list of a run (general feeds + one Yahoo feed per
+         ticker) into work units and store them, with the run settings, in
+         the queue database
+  work   claim units one at a time, fetch -> map -> relevance filter ->
+         score them, and write a partial result per unit; start it on as
+         many processes / machines as you like (they only need to share the
+         queue file; partial results go to shards/<run>/ next to it)
+  merge  combine the partial results into the usual raw_news /
+         mapped_scored / daily_signals CSVs and news_outputs.xlsx, and
+         publish signal changes (signal_events.py)
+  status per-status unit counts
+
+Claims are atomic (BEGIN IMMEDIATE); a unit whose worker died is handed
+out again once its lease expires, and failed units are retried up to
+MAX_ATTEMPTS times. SQLite needs a filesystem with working file locks
+(local disk or a properly configured NFS/SMB share).
+
+Usage:
+  python work_queue.py init  --run nightly --tickers-file universe.txt
+  python work_queue.py work  --run nightly --processes 4   # on each machine
+  python work_queue.py merge --run nightly
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import socket
+import sqlite3
+import sys
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+import news_harm as nh
+from feed_reader import parse_dates
+from relevance import DROP_BELOW
+from relevance import load_model as load_relevance_model
+from signal_events import EVENTS_PATH
+from ticker_aliases import DEFAULT_TICKERS
+
+
+# -----------------------------
+# Defaults
+# -----------------------------
+QUEUE_PATH = os.path.join(nh.DATA_DIR, "work_queue.sqlite")
+UNIT_SIZE = 25          # per-ticker feeds per work unit
+LEASE_SECONDS = 900     # a running unit older than this is considered abandoned
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run        TEXT PRIMARY KEY,
+    config     TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run         TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    claimed_at  REAL,
+    finished_at REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS units_run_status ON units (run, status);
+"""
+
+
+def connect(path: str = QUEUE_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    con = sqlite3.connect(path, timeout=60, isolation_level=None)  # explicit transactions
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def shard_dir(run: str, path: str = QUEUE_PATH) -> str:
+    """Partial results live next to the queue file, so sharing one shares both."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), "shards", run)
+
+
+# -----------------------------
+# Queue operations
+# -----------------------------
+def init_run(
+    run: str,
+    tickers: List[str],
+    backend: str = "vader",
+    days: int = 7,
+    mention_radius: Optional[int] = None,
+    unit_size: int = UNIT_SIZE,
+    path: str = QUEUE_PATH,
+    lang_backends: Optional[dict] = None,
+    relevance_model: Optional[str] = None,
+    relevance_threshold: float = DROP_BELOW,
+) -> int:
+    """
+    Create (or replace) a run and its work units. Returns the number of units.
+    relevance_model is a path every worker loads (so it must be reachable
+    from all of them).
+    """
+    tickers = list(dict.fromkeys(tickers))
+    general = list(nh.GENERAL_FEEDS)
+    per_ticker = [nh.YF_TICKER_FEED.format(ticker=t) for t in tickers]
+    units = [[u] for u in general] + [per_ticker[i:i + unit_size] for i in range(0, len(per_ticker), unit_size)]
+    config = dict(tickers=tickers, backend=backend, days=days, mention_radius=mention_radius,
+                  lang_backends=lang_backends, relevance_model=relevance_model,
+                  relevance_threshold=relevance_threshold)
+
+    con = connect(path)
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("DELETE FROM units WHERE run = ?", (run,))
+        con.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)", (run, json.dumps(config), time.time()))
+        con.executemany("INSERT INTO units (run, payload) VALUES (?, ?)", [(run, json.dumps(u)) for u in units])
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    out_dir = shard_dir(run, path)
+    os.makedirs(out_dir, exist_ok=True)
+    for f in os.listdir(out_dir):
+        os.remove(os.path.join(out_dir, f))
+    return len(units)
+
+
+def load_config(con: sqlite3.Connection, run: str) -> dict:
+    row = con.execute("SELECT config FROM runs WHERE run = ?", (run,)).fetchone()
+    if row is None:
+        raise SystemExit(f"Unknown run: {run} (use `work_queue.py init` first)")
+    return json.loads(row[0])
+
+
+def claim(con: sqlite3.Connection, run: str, worker: str, lease: float = LEASE_SECONDS):
+    """Atomically take the next pending (or abandoned) unit; None when the run is drained."""
+    now = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        row = con.execute(
+            "SELECT id, payload FROM units WHERE run = ? AND "
+            "(status = 'pending' OR (status = 'running' AND claimed_at < ?)) "
+            "ORDER BY id LIMIT 1",
+            (run, now - lease),
+        ).fetchone()
+        if row is not None:
+            con.execute(
+                "UPDATE units SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker, now, row[0]),
+            )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return None if row is None else (row[0], json.loads(row[1]))
+
+
+def finish(con: sqlite3.Connection, unit_id: int, error: Optional[str] = None) -> None:
+    if error is None:
+        con.execute("UPDATE units SET status = 'done', finished_at = ?, error = NULL WHERE id = ?",
+                    (time.time(), unit_id))
+    else:
+        con.execute(
+            "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, finished_at = ? WHERE id = ?",
+            (MAX_ATTEMPTS, error, time.time(), unit_id),
+        )
+
+
+def status(run: str, path: str = QUEUE_PATH) -> dict:
+    con = connect(path)
+    try:
+        rows = con.execute("SELECT status, COUNT(*) FROM units WHERE run = ? GROUP BY status", (run,)).fetchall()
+    finally:
+        con.close()
+    return dict(rows)
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def process_unit(urls: List[str], config: dict, relevance=None):
+    """
+    fetch -> recency filter -> map -> relevance filter -> score for one unit
+    (relevance: the model loaded from config["relevance_model"]).
+    Returns (news, scored).
+    """
+    news = nh.fetch_feed_urls(urls)
+    cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=config["days"])
+    news = news[pd.to_datetime(news["date"]) >= cutoff]
+    if news.empty:
+        return news, pd.DataFrame()
+    scored = nh.map_and_score(news, config["tickers"], config["backend"], config.get("mention_radius"),
+                              config.get("lang_backends"), relevance,
+                              config.get("relevance_threshold", DROP_BELOW))
+    return news, scored
+
+
+def _write_shard(df: pd.DataFrame, path: str) -> None:
+    # write-then-rename, so merge never sees half a file
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def work(run: str, path: str = QUEUE_PATH, lease: float = LEASE_SECONDS) -> int:
+    """Process units until none are left. Returns how many this worker completed."""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    con = connect(path)
+    done = 0
+    try:
+        config = load_config(con, run)
+        model_path = config.get("relevance_model")
+        relevance = load_relevance_model(model_path) if model_path else None
+        out_dir = shard_dir(run, path)
+        os.makedirs(out_dir, exist_ok=True)
+        while True:
+            unit = claim(con, run, worker, lease)
+            if unit is None:
+                break
+            unit_id, urls = unit
+            try:
+                news, scored = process_unit(urls, config, relevance)
+                _write_shard(news, os.path.join(out_dir, f"unit_{unit_id:06d}.news.csv"))
+                _write_shard(scored, os.path.join(out_dir, f"unit_{unit_id:06d}.scored.csv"))
+                finish(con, unit_id)
+                done += 1
+            except Exception as ex:
+                print(f"[warn] {worker} unit {unit_id} failed: {ex}", file=sys.stderr)
+                finish(con, unit_id, error=str(ex))
+    finally:
+        con.close()
+    print(f"[info] {worker} finished {done} unit(s)")
+    return done
+
+
+def _work_process(args):
+    return work(*args)
+
+
+def work_parallel(run: str, processes: int, path: str = QUEUE_PATH, lease: float = LEASE_SECONDS) -> int:
+    if processes <= 1:
+        return work(run, path, lease)
+    with mp.Pool(processes) as pool:
+        return sum(pool.map(_work_process, [(run, path, lease)] * processes))
+
+
+# -----------------------------
+# Merge
+# -----------------------------
+def _read_shards(out_dir: str, kind: str) -> pd.DataFrame:
+    files = sorted(f for f in os.listdir(out_dir) if f.endswith(f".{kind}.csv"))
+    parts = []
+    for f in files:
+        try:
+            parts.append(pd.read_csv(os.path.join(out_dir, f)))
+        except pd.errors.EmptyDataError:
+            continue
+    parts = [p for p in parts if not p.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def merge(
+    run: str,
+    path: str = QUEUE_PATH,
+    lookahead: int = 1,
+    allow_partial: bool = False,
+    events_path: Optional[str] = EVENTS_PATH,
+    webhook: Optional[str] = None,
+) -> Optional[dict]:
+    """
+    Combine every unit's partial results into the standard news_harm outputs.
+    Articles seen through several feeds are deduplicated by uid (and ticker).
+    Signal changes go to events_path / webhook as in news_harm.run.
+    """
+    counts = status(run, path)
+    unfinished = {k: v for k, v in counts.items() if k != "done"}
+    if unfinished and not allow_partial:
+        print(f"[warn] run {run} has unfinished units {unfinished}; use --allow-partial to merge anyway")
+        return None
+
+    out_dir = shard_dir(run, path)
+    news = _read_shards(out_dir, "news")
+    scored = _read_shards(out_dir, "scored")
+    if scored.empty:
+        print("[warn] no scored articles in the shards")
+        return None
+    news = news.drop_duplicates(subset=["uid"]).sort_values("date")
+    scored = scored.drop_duplicates(subset=["uid", "ticker"])
+    news["date"] = pd.to_datetime(news["date"])
+    scored["date"] = pd.to_datetime(scored["date"]).dt.date
+    for df in (news, scored):   # shards store timestamps as text
+        if "published" in df.columns:
+            df["published"] = parse_dates(df["published"])
+
+    daily = nh.build_daily(scored, lookahead)
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    news_file, mapped_file, daily_file = nh.save_csv_artifacts(news, scored, daily, ts)
+    nh.publish_signals(daily, events_path, webhook)
+    xlsx_path = nh.save_to_excel(news, scored, daily)
+    print(f"[ok] merged {counts.get('done', 0)} unit(s): {len(news)} articles, {len(scored)} scored rows")
+    return dict(news=news_file, scored=mapped_file, daily=daily_file, xlsx=xlsx_path)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Sharded news_harm runs over a SQLite work queue")
+    ap.add_argument("command", choices=["init", "work", "merge", "status"])
+    ap.add_argument("--run", type=str, default="default", help="Run name (queue + shard directory key)")
+    ap.add_argument("--queue", type=str, default=QUEUE_PATH, help="SQLite queue file (shared by all workers)")
+    ap.add_argument("--tickers", nargs="+", default=None, help="init: tickers (default: news_harm defaults)")
+    ap.add_argument("--tickers-file", type=str, default=None, help="init: one ticker per line")
+    ap.add_argument("--backend", default="vader", choices=nh.BACKEND_NAMES)
+    ap.add_argument("--lang-backends", type=nh.parse_lang_backends, default=None,
+                    help="init: per-language backends, e.g. es=lexicon,en=vader")
+    ap.add_argument("--relevance-model", nargs="?", const=nh.RELEVANCE_MODEL_PATH, default=None, metavar="PATH",
+                    help="init: drop off-topic MARKET articles before scoring (path must be readable by every worker)")
+    ap.add_argument("--relevance-threshold", type=float, default=DROP_BELOW,
+                    help="init: drop MARKET articles whose P(relevant) is below this")
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--mention-window", type=int, default=None)
+    ap.add_argument("--unit-size", type=int, default=UNIT_SIZE, help="init: per-ticker feeds per unit")
+    ap.add_argument("--processes", type=int, default=1, help="work: worker processes on this machine")
+    ap.add_argument("--lease", type=float, default=LEASE_SECONDS,
+                    help="work: seconds before a claimed unit is considered abandoned")
+    ap.add_argument("--lookahead", type=int, default=1, help="merge: days ahead for forward returns")
+    ap.add_argument("--allow-partial", action="store_true", help="merge: ignore unfinished units")
+    ap.add_argument("--events", type=str, default=EVENTS_PATH, metavar="PATH",
+                    help="merge: append signal changes since the last run to this JSONL file ('' disables)")
+    ap.add_argument("--webhook", type=str, default=None, metavar="URL",
+                    help="merge: also POST those events as a JSON array to this URL")
+    args, _ = ap.parse_known_args()  # notebook-friendly
+
+    if args.command == "init":
+        tickers = args.tickers or DEFAULT_TICKERS
+        if args.tickers_file:
+            with open(args.tickers_file, "r", encoding="utf-8") as f:
+                tickers = [ln.strip().upper() for ln in f if ln.strip() and not ln.startswith("#")]
+        n = init_run(args.run, tickers, args.backend, args.days, args.mention_window, args.unit_size, args.queue,
+                     args.lang_backends, args.relevance_model, args.relevance_threshold)
+        print(f"[ok] run {args.run}: {n} unit(s) for {len(tickers)} tickers in {args.queue}")
+    elif args.command == "work":
+        work_parallel(args.run, args.processes, args.queue, args.lease)
+    elif args.command == "merge":
+        merge(args.run, args.queue, args.lookahead, args.allow_partial, args.events, args.webhook)
+    else:
+        print(json.dumps(status(args.run, args.queue)))
+
+
+if __name__ == "__main__":
+    main()